@@ -0,0 +1,39 @@
+import base64
+import sys
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+# The tr_* tools are standalone scripts that import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tr_artwork_generator import TRArtworkGenerator
+
+
+def fake_png() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGBA", (64, 64), (200, 30, 30, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class FakeImages:
+    def generate(self, n=1, **kwargs):
+        item = SimpleNamespace(b64_json=base64.b64encode(fake_png()).decode(), revised_prompt="")
+        return SimpleNamespace(data=[item] * n)
+
+
+@pytest.fixture
+def png_bytes() -> bytes:
+    """A small PNG, the same one the faked Images API returns."""
+    return fake_png()
+
+
+@pytest.fixture
+def generator(tmp_path) -> TRArtworkGenerator:
+    """An artwork generator writing to tmp_path, with the Images API faked."""
+    generator = TRArtworkGenerator(api_key="test", output_dir=str(tmp_path))
+    generator.client = SimpleNamespace(images=FakeImages())
+    return generator
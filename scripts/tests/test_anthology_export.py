@@ -0,0 +1,58 @@
+import zipfile
+
+import pytest
+from PIL import Image
+
+from tr_anthology_export import AnthologyExporter, ExportOptions
+
+
+def publish(directory, comic, color):
+    Image.new("RGB", (40, 40), color).save(directory / f"comic-{comic:03d}-panel1.jpg")
+
+
+@pytest.mark.parametrize("fmt", ["cbz", "pdf"])
+def test_append_replaces_export_atomically(tmp_path, fmt):
+    published = tmp_path / "published"
+    published.mkdir()
+    output = tmp_path / f"tr.{fmt}"
+    exporter = AnthologyExporter(str(published), ExportOptions(format=fmt, workers=1))
+
+    publish(published, 1, "red")
+    assert exporter.export(str(output))["status"] == "rebuilt"
+    publish(published, 2, "blue")
+    assert exporter.export(str(output))["status"] == "appended"
+    assert exporter.export(str(output))["status"] == "cached"
+    assert not list(tmp_path.glob("*.partial"))
+    if fmt == "cbz":
+        assert len(zipfile.ZipFile(output).namelist()) == 2
+
+
+def test_failed_append_keeps_previous_export(tmp_path, monkeypatch):
+    published = tmp_path / "published"
+    published.mkdir()
+    output = tmp_path / "tr.cbz"
+    exporter = AnthologyExporter(str(published), ExportOptions(workers=1))
+    publish(published, 1, "red")
+    exporter.export(str(output))
+    before = output.read_bytes()
+
+    publish(published, 2, "blue")
+    monkeypatch.setattr(exporter, "_encode_page", lambda page: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        exporter.export(str(output))
+    assert output.read_bytes() == before
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_manifest_out_of_sync_forces_rebuild(tmp_path):
+    published = tmp_path / "published"
+    published.mkdir()
+    output = tmp_path / "tr.cbz"
+    exporter = AnthologyExporter(str(published), ExportOptions(workers=1))
+    publish(published, 1, "red")
+    exporter.export(str(output))
+
+    # As if the export was replaced but the crash hit before the manifest was
+    with open(output, 'ab') as f:
+        f.write(b"\0")
+    assert exporter.export(str(output))["status"] == "rebuilt"
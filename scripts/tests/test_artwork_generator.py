@@ -0,0 +1,42 @@
+def test_generate_panel_files_jpg_writes_jpeg_bytes(tmp_path, generator):
+    files = generator.generate_panel_files("prompt", "test", 1, format="jpg")
+
+    assert files == [str(tmp_path / "comic-test-panel1.jpg")]
+    with open(files[0], 'rb') as f:
+        assert f.read(3) == b"\xff\xd8\xff"
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_generate_panel_files_png_keeps_png_bytes(generator):
+    files = generator.generate_panel_files("prompt", "test", 1, format="png")
+
+    with open(files[0], 'rb') as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_generate_panel_files_discards_when_lease_lost(tmp_path, generator):
+    files = generator.generate_panel_files("prompt", "test", 1, format="jpg",
+                                           still_held=lambda: False)
+
+    assert files == []
+    assert not list(tmp_path.iterdir())
+
+
+def test_save_panel_writes_bytes_and_jpeg_copy(tmp_path, generator, png_bytes):
+    path = generator.save_panel(png_bytes, "test", 2)
+
+    assert path == str(tmp_path / "comic-test-panel2.png")
+    assert (tmp_path / "comic-test-panel2.png").read_bytes() == png_bytes
+    assert (tmp_path / "comic-test-panel2.jpg").exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_batch_generate_passes_candidates(tmp_path, generator):
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "comic-draft-boat.md").write_text(
+        "**Title:** Boat\n\n### Panel 1: Dock\n**Scene:** A boat.\n")
+
+    generator.batch_generate(str(scripts), candidates=2)
+
+    assert (tmp_path / "comic-boat-panel1-candidate2.png").exists()
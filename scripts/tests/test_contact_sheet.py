@@ -0,0 +1,69 @@
+import json
+import threading
+from http.client import HTTPConnection
+
+import pytest
+from PIL import Image
+
+from tr_contact_sheet import ContactSheetBuilder, make_review_server
+from tr_pixel_cache import PixelCache
+
+
+@pytest.fixture
+def review(tmp_path):
+    for name, color in (("comic-boat-panel1.png", "red"), ("comic-boat-panel1-candidate2.png", "blue")):
+        Image.new("RGB", (64, 64), color).save(tmp_path / name)
+    builder = ContactSheetBuilder(str(tmp_path), size=32, workers=1, token="secret-token")
+    builder.build(candidates=True)
+    httpd = make_review_server(builder, 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(port, body, headers):
+    conn = HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("POST", "/review", body=json.dumps(body), headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_page_embeds_token(review):
+    root, _ = review
+    assert 'name="review-token" content="secret-token"' in (root / "contact" / "index.html").read_text()
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"Content-Type": "text/plain", "X-Review-Token": "secret-token"}, 415),
+    ({"Content-Type": "application/json"}, 403),
+    ({"Content-Type": "application/json", "X-Review-Token": "wrong"}, 403),
+])
+def test_rejects_forged_posts(review, headers, status):
+    root, port = review
+    response, _ = post(port, {"id": "comic-boat-panel1", "status": "rejected"}, headers)
+    assert response.status == status
+    assert (root / "comic-boat-panel1.png").exists()
+
+
+def test_accepting_candidate_rebuilds_page(review):
+    root, port = review
+    response, body = post(port, {"id": "comic-boat-panel1-candidate2", "status": "approved"},
+                          {"Content-Type": "application/json", "X-Review-Token": "secret-token"})
+    assert response.status == 200
+    assert json.loads(body)["reload"] is True
+    page = (root / "contact" / "index.html").read_text()
+    assert "comic-boat-panel1-candidate2.png" not in page
+    assert "comic-boat-panel1.png" in page
+
+
+def test_thumbnails_come_from_pixel_cache(tmp_path):
+    Image.new("RGB", (640, 640), "green").save(tmp_path / "comic-boat-panel1.png")
+    pixels = PixelCache(str(tmp_path / "cache"))
+    builder = ContactSheetBuilder(str(tmp_path), size=64, workers=1, pixels=pixels)
+    assert builder.build()["items"] == 1
+
+    assert pixels.stats()["panels"] == 1
+    with Image.open(tmp_path / "contact" / "thumbs" / "comic-boat-panel1.jpg") as thumb:
+        assert thumb.size == (64, 64)
@@ -0,0 +1,45 @@
+import pytest
+
+from tr_drafts import DraftManifest, DraftPanel, load_manifest, save_manifest, set_status
+
+
+def make_manifest(output_dir):
+    manifest = DraftManifest(slug="boat", title="Boat", script_path="boat.md", backend="openai",
+                             panels=[DraftPanel(n, f"prompt {n}") for n in (1, 2, 3)])
+    save_manifest(str(output_dir), manifest)
+    return manifest
+
+
+def statuses(output_dir):
+    return {p.number: p.status for p in load_manifest(str(output_dir), "boat").panels}
+
+
+def test_set_status_updates_only_the_listed_panels_and_persists(tmp_path):
+    make_manifest(tmp_path)
+
+    set_status(str(tmp_path), "boat", [1, 3], "approved")
+    set_status(str(tmp_path), "boat", [3], "rejected")
+
+    assert statuses(tmp_path) == {1: "approved", 2: "draft", 3: "rejected"}
+
+
+def test_set_status_ignores_unknown_panels_and_rejects_unknown_statuses(tmp_path):
+    make_manifest(tmp_path)
+
+    set_status(str(tmp_path), "boat", [9], "approved")
+    assert statuses(tmp_path) == {1: "draft", 2: "draft", 3: "draft"}
+    with pytest.raises(ValueError):
+        set_status(str(tmp_path), "boat", [1], "published")
+    assert set_status(str(tmp_path), "ship", [1], "approved") is None
+
+
+def test_promote_renders_only_approved_panels(tmp_path, generator):
+    make_manifest(tmp_path)
+    set_status(str(tmp_path), "boat", [3], "rejected")
+
+    results = generator.promote("boat", [1])
+
+    assert [p["number"] for p in results["panels"]] == [1]
+    assert statuses(tmp_path) == {1: "promoted", 2: "draft", 3: "rejected"}
+    assert (tmp_path / "comic-boat-panel1.png").exists()
+    assert not (tmp_path / "comic-boat-panel2.png").exists()
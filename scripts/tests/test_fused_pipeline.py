@@ -0,0 +1,66 @@
+import base64
+import hashlib
+import shutil
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image, ImageChops, ImageDraw
+
+from tr_artwork_generator import TRArtworkGenerator
+from tr_fused_pipeline import FusedPipeline
+from tr_text_overlay import TextOverlayTool
+
+SCRIPT = Path(__file__).resolve().parent.parent / "comic-draft-biggest-boat-in-the-harbor.md"
+
+
+def art_for(prompt: str) -> bytes:
+    """Deterministic stand-in artwork, different per prompt."""
+    seed = hashlib.sha256(prompt.encode()).digest()
+    img = Image.new("RGB", (512, 512), tuple(seed[:3]))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, 30, 3):
+        draw.ellipse([seed[i] * 2, seed[i + 1] * 2, seed[i] * 2 + 60, seed[i + 1] * 2 + 60], fill=tuple(seed[i:i + 3]))
+    buffer = BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class FakeImages:
+    def generate(self, prompt, n=1, **kwargs):
+        item = SimpleNamespace(b64_json=base64.b64encode(art_for(prompt)).decode(), revised_prompt="")
+        return SimpleNamespace(data=[item] * n)
+
+
+def test_fused_output_matches_staged_pipeline(tmp_path, monkeypatch):
+    # The overlay reads masters from comics/generated relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    script_path = tmp_path / SCRIPT.name
+    shutil.copy(SCRIPT, script_path)
+
+    generator = TRArtworkGenerator(api_key="test", output_dir="comics/generated")
+    generator.client = SimpleNamespace(images=FakeImages())
+
+    # Staged: write masters, then overlay them from disk
+    script = generator.parse_script_file(str(script_path))
+    prompts = {}
+    for panel in script.panels:
+        prompts[panel.number] = generator.generate_panel_prompt(panel, script.title)
+        generator.generate_panel_files(prompts[panel.number], script.slug, panel.number)
+    staged = TextOverlayTool(output_dir="staged")
+    staged.process_comic(str(script_path))
+
+    # Fused: one decode per panel, nothing intermediate on disk
+    fused_overlay = TextOverlayTool(output_dir="fused")
+    results = FusedPipeline(generator, fused_overlay).run(str(script_path))
+    assert [p["status"] for p in results["panels"]] == ["generated"] * 4
+
+    for panel in results["panels"]:
+        name = Path(panel["file"]).name
+        with Image.open(tmp_path / "staged" / name) as a, Image.open(tmp_path / "fused" / name) as b:
+            assert a.size == b.size
+            assert ImageChops.difference(a.convert("RGB"), b.convert("RGB")).getbbox() is None
+
+            # The overlay actually drew text (the script has captions on every panel)
+            art = Image.open(BytesIO(art_for(prompts[panel["number"]]))).convert("RGB")
+            assert ImageChops.difference(b.convert("RGB"), art).getbbox() is not None
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from tr_image_backends import BackendRouter, ImageBackend, OpenAIBackend, PanelJob
+from tr_midapi_generator import MidAPIGenerator
+
+SCRIPT = Path(__file__).resolve().parent.parent / "comic-draft-biggest-boat-in-the-harbor.md"
+
+
+class FakeBackend(ImageBackend):
+    def __init__(self, name, polls_until_done):
+        self.name = name
+        self.polls_until_done = polls_until_done
+        self.polls = 0
+        self.cancelled = []
+
+    def submit(self, job):
+        return f"{self.name}-1"
+
+    def poll(self, handle):
+        self.polls += 1
+        return "success" if self.polls >= self.polls_until_done else "pending"
+
+    def fetch(self, handle, filepath: Path):
+        filepath.write_bytes(self.name.encode())
+        return True
+
+    def estimate_cost(self):
+        return 0.01
+
+    def cancel(self, handle):
+        self.cancelled.append(handle)
+
+
+def test_backend_must_implement_interface():
+    with pytest.raises(TypeError):
+        ImageBackend()
+
+
+def test_race_cancels_loser(tmp_path):
+    fast, slow = FakeBackend("fast", 1), FakeBackend("slow", 99)
+    router = BackendRouter([slow, fast], output_dir=str(tmp_path), poll_interval=0)
+    result = router.generate_panel(PanelJob("x.md", "boat", "Boat", 1), race=True)
+
+    assert result["backend"] == "fast"
+    assert slow.cancelled == ["slow-1"]
+    assert (tmp_path / "comic-boat-panel1.png").read_bytes() == b"fast"
+
+
+def test_router_and_generators_share_panel_numbers(generator):
+    jobs = BackendRouter.panel_jobs(str(SCRIPT))
+    midapi = MidAPIGenerator.parse_script_file(str(SCRIPT))
+    openai = generator.parse_script_file(str(SCRIPT))
+
+    expected = [(j.slug, j.number) for j in jobs]
+    assert expected
+    assert [(midapi.slug, p.number) for p in midapi.panels] == expected
+    assert [(openai.slug, p.number) for p in openai.panels] == expected
+
+
+def test_openai_fetch_renames_part_and_close_stops_pool(tmp_path, generator):
+    with OpenAIBackend(generator) as backend:
+        backend._futures["h"] = backend._pool.submit(
+            backend.generator.request_images, "prompt", "1024x1024", "hd", 1, 1)
+        backend._futures["h"].result()
+        assert backend.fetch("h", tmp_path / "comic-boat-panel1.png")
+    assert backend._pool._shutdown
+    assert (tmp_path / "comic-boat-panel1.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
+    assert not list(tmp_path.glob("*.part"))
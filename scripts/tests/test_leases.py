@@ -0,0 +1,71 @@
+import os
+import time
+
+from tr_leases import LeaseManager
+
+
+def test_expiry_uses_filesystem_clock(tmp_path):
+    manager = LeaseManager(str(tmp_path), worker_id="a", ttl=60)
+    assert manager.acquire("k")
+    path = manager._path("k")
+    # A renewal stamped 30s ago by the filesystem is live, 90s ago is expired
+    now = manager.filesystem_now()
+    os.utime(path, (now - 30, now - 30))
+    assert not manager._expired(path)
+    os.utime(path, (now - 90, now - 90))
+    assert manager._expired(path)
+    manager.close()
+
+
+def test_expired_lease_is_stolen_and_holder_notices(tmp_path):
+    holder = LeaseManager(str(tmp_path), worker_id="a", ttl=60, heartbeat=3600)
+    thief = LeaseManager(str(tmp_path), worker_id="b", ttl=60, heartbeat=3600)
+    assert holder.acquire("k")
+    assert not thief.acquire("k")
+    stale = time.time() - 120
+    os.utime(holder._path("k"), (stale, stale))
+
+    assert thief.acquire("k")
+    assert not holder.still_held("k")
+    holder.renew()
+    assert thief.read("k").worker == "b"  # renew() didn't write over the new holder
+    holder.close()
+    thief.close()
+
+
+def test_renew_skips_released_lease(tmp_path):
+    manager = LeaseManager(str(tmp_path), worker_id="a", heartbeat=3600)
+    assert manager.acquire("k")
+    manager.release("k")
+    manager.renew()
+    assert not manager._path("k").exists()
+    manager.close()
+
+
+def test_close_joins_heartbeat(tmp_path):
+    manager = LeaseManager(str(tmp_path), worker_id="a", heartbeat=0.01)
+    assert manager.acquire("k")
+    thread = manager._thread
+    manager.close()
+    assert not thread.is_alive()
+    assert not list(tmp_path.joinpath(".leases").iterdir())
+
+
+def test_late_stealer_puts_fresh_lease_back(tmp_path):
+    holder = LeaseManager(str(tmp_path), worker_id="holder", ttl=60, heartbeat=3600)
+    first = LeaseManager(str(tmp_path), worker_id="first", ttl=60, heartbeat=3600)
+    late = LeaseManager(str(tmp_path), worker_id="late", ttl=60, heartbeat=3600)
+    assert holder.acquire("k")
+    stale = time.time() - 120
+    os.utime(holder._path("k"), (stale, stale))
+
+    # late saw the lease expired, but first stole it before late's rename
+    assert first.acquire("k")
+    late._expired = lambda path: True
+    assert not late.acquire("k")
+
+    assert first.still_held("k")
+    assert not late.still_held("k")
+    assert [p.name for p in (tmp_path / ".leases").glob("*.lease*")] == ["k.lease"]
+    for manager in (holder, first, late):
+        manager.close()
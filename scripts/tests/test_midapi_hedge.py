@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+import tr_midapi_generator
+from tr_midapi_generator import MidAPIGenerator
+from tr_speed_scheduler import load_tier_stats, record_run
+
+SCRIPT = Path(__file__).resolve().parent.parent / "comic-draft-biggest-boat-in-the-harbor.md"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_relaxed_tier_hedges_before_max_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(tr_midapi_generator, "time", FakeClock())
+    generator = MidAPIGenerator(api_key="test", output_dir=str(tmp_path), hedge_budget=1.0)
+    generator.submit_task = lambda payload: "hedge"
+    generator.check_task = lambda tid: ("success", "https://img/1.png") if tid == "hedge" else ("pending", None)
+
+    # Default relaxed p90 (600s) is past max_wait; the hedge still goes out
+    assert generator._wait_with_hedge("first", {}, "relaxed", max_wait=300) == "https://img/1.png"
+    assert (generator.hedge_stats.hedges, generator.hedge_stats.wins) == (1, 1)
+
+    with open(generator.run_log) as f:
+        records = [json.loads(line) for line in f]
+    loser = next(r for r in records if r["task_id"] == "first")
+    assert loser["success"] is None and loser["censored"]
+
+
+def test_timeouts_are_censored_not_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(tr_midapi_generator, "time", FakeClock())
+    generator = MidAPIGenerator(api_key="test", output_dir=str(tmp_path), hedge_budget=0.0)
+    generator.check_task = lambda tid: ("pending", None)
+
+    assert generator._wait_with_hedge("first", {}, "fast", max_wait=60) is None
+    with open(generator.run_log) as f:
+        record = json.loads(f.readline())
+    assert record["success"] is None and record["censored"]
+
+
+def test_censored_runs_raise_percentiles(tmp_path):
+    log = str(tmp_path / "runs.jsonl")
+    for _ in range(3):
+        record_run(log, "fast", 20, success=True)
+    for _ in range(2):
+        record_run(log, "fast", 300, success=None, censored=True)
+    record_run(log, "fast", 5, success=False)
+
+    stats = load_tier_stats(log)["fast"]
+    assert stats.p90 == 300
+    assert stats.censored == 2
+    assert stats.success_rate == 0.75
+
+
+def test_generate_comic_loads_tier_stats_once_and_falls_back_to_speed(tmp_path, monkeypatch):
+    monkeypatch.setattr(tr_midapi_generator, "time", FakeClock())
+    loads = []
+
+    def counting_load(run_log):
+        loads.append(run_log)
+        return load_tier_stats(run_log)
+
+    monkeypatch.setattr(tr_midapi_generator, "load_tier_stats", counting_load)
+    generator = MidAPIGenerator(api_key="test", output_dir=str(tmp_path), hedge_budget=1.0)
+    generator.submit_task = lambda payload: "task"
+    generator.check_task = lambda tid: ("success", "https://img/1.png")
+    generator.download_image = lambda url, filepath, still_held=None: True
+
+    results = generator.generate_comic(str(SCRIPT), speed="fast", panel_speeds={1: "turbo"})
+
+    assert len(results["panels"]) > 1
+    assert len(loads) == 1
+    with open(generator.run_log) as f:
+        speeds = [json.loads(line)["speed"] for line in f]
+    assert speeds == ["turbo"] + ["fast"] * (len(results["panels"]) - 1)
@@ -0,0 +1,30 @@
+from PIL import Image
+
+from tr_palette_encode import PaletteOptions, perceptual_error, quantize_image
+
+
+def test_hue_shift_at_same_luminance_is_an_error():
+    red = Image.new("RGB", (32, 32), (200, 40, 40))
+    brown = Image.new("RGB", (32, 32), (120, 80, 40))
+    assert red.convert("L").getpixel((0, 0)) == brown.convert("L").getpixel((0, 0)) + 1
+    assert perceptual_error(red, brown) > PaletteOptions().max_error
+
+
+def test_flat_panel_quantizes_cleanly():
+    img = Image.new("RGB", (64, 64), (30, 120, 200))
+    img.paste((250, 220, 40), (0, 0, 32, 64))
+    quantized, colors, error = quantize_image(img, PaletteOptions())
+    assert quantized is not None
+    # Starts at options.colors and never searches below it
+    assert colors == PaletteOptions().colors
+    assert error < 0.5
+
+
+def test_palette_doubles_until_the_guard_passes():
+    img = Image.new("RGB", (64, 64), (30, 120, 200))
+    img.paste((250, 220, 40), (0, 0, 32, 32))
+    img.paste((200, 40, 40), (0, 32, 32, 64))
+    quantized, colors, error = quantize_image(img, PaletteOptions(colors=2))
+    assert quantized is not None
+    assert colors == 4
+    assert error <= PaletteOptions().max_error
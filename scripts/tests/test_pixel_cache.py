@@ -0,0 +1,33 @@
+import os
+
+from PIL import Image
+
+from tr_pixel_cache import PixelCache
+
+
+def make_panel(path, color):
+    Image.new("RGB", (600, 400), color).save(path)
+    return str(path)
+
+
+def test_get_decodes_miss_and_keeps_array(tmp_path):
+    cache = PixelCache(str(tmp_path / "cache"))
+    array = cache.get(make_panel(tmp_path / "a.png", "red"), 256, "RGB")
+    assert array.shape == (171, 256, 3)
+    assert tuple(array[0, 0]) == (255, 0, 0)
+
+
+def test_get_evicts_after_miss(tmp_path):
+    cache = PixelCache(str(tmp_path / "cache"))
+    first = make_panel(tmp_path / "a.png", "red")
+    cache.get(first, 64, "L")
+    old = cache.stats()["bytes"]
+    # Push the first panel's arrays into the past so they are least recently used
+    for path, _ in cache._arrays():
+        os.utime(path, (1, 1))
+    cache.max_bytes = old + 1
+
+    array = cache.get(make_panel(tmp_path / "b.png", "blue"), 64, "L")
+    assert array.shape == (43, 64)
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.stats()["panels"] == 1
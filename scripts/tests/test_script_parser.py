@@ -0,0 +1,27 @@
+from tr_script_parser import parse_script, slugify
+
+SCRIPT = """**Title:** The Biggest Boat!
+**Location:** Harbor
+
+### Panel 1: Arrival
+**Scene:** A huge yacht docks.
+**Dialogue:** "Look at that."
+
+### Panel 2: No scene here
+**Dialogue:** "Skipped."
+
+### Panel 3: Departure
+**Scene:** It leaves.
+**Caption:** Gone.
+"""
+
+
+def test_parse_script_keeps_section_numbers_and_drops_sceneless_panels(tmp_path):
+    path = tmp_path / "script.md"
+    path.write_text(SCRIPT)
+    script = parse_script(str(path))
+
+    assert script.slug == slugify("The Biggest Boat!") == "the-biggest-boat"
+    assert [(p.number, p.title) for p in script.panels] == [(1, "Arrival"), (3, "Departure")]
+    assert script.panels[0].dialogue == '"Look at that."'
+    assert script.panels[1].caption == "Gone."
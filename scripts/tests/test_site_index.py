@@ -0,0 +1,51 @@
+import json
+import shutil
+from pathlib import Path
+
+from tr_site_index import STATE_FILE, SiteIndexBuilder
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+FEEDS = ("feed.json", "feed.xml", "sitemap.xml")
+
+
+def make_site(tmp_path, pages) -> Path:
+    site = tmp_path / "site"
+    (site / "scripts").mkdir(parents=True)
+    for page in pages:
+        shutil.copy(ROOT / page, site / page)
+    for script in (ROOT / "scripts").glob("comic-0*.md"):
+        shutil.copy(script, site / "scripts" / script.name)
+    return site
+
+
+def build(site) -> dict:
+    return SiteIndexBuilder(site_dir=str(site), scripts_dir=str(site / "scripts")).build()
+
+
+def test_rebuild_is_idempotent_and_state_lives_in_cache(tmp_path):
+    site = make_site(tmp_path, ["comic-001.html", "comic-002.html"])
+    build(site)
+    first = {name: (site / name).read_bytes() for name in FEEDS}
+
+    results = build(site)
+
+    assert (results["rss"], results["json_feed"], results["sitemap"]) == ("unchanged",) * 3
+    assert {name: (site / name).read_bytes() for name in FEEDS} == first
+    assert (site / STATE_FILE).exists()
+    assert Path(STATE_FILE).parts[0] == ".cache"
+    assert not list(site.glob("*state*.json"))
+
+
+def test_appended_comic_matches_a_full_rebuild(tmp_path):
+    site = make_site(tmp_path / "a", ["comic-001.html", "comic-002.html"])
+    build(site)
+    shutil.copy(ROOT / "comic-003.html", site / "comic-003.html")
+    results = build(site)
+
+    fresh = make_site(tmp_path / "b", ["comic-001.html", "comic-002.html", "comic-003.html"])
+    build(fresh)
+
+    assert results["rss"] == results["json_feed"] == results["sitemap"] == "appended"
+    for name in FEEDS:
+        assert (site / name).read_bytes() == (fresh / name).read_bytes()
+    assert len(json.loads((site / "feed.json").read_text())["items"]) == 3
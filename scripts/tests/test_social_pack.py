@@ -0,0 +1,52 @@
+import random
+
+from PIL import Image
+
+from tr_site_index import SITE_URL
+from tr_social_pack import encode_to_budget, find_panels, fit_caption
+
+
+def test_fit_caption_keeps_short_captions_and_the_link():
+    assert fit_caption("Bully!", 280) == f"Bully!\n\n{SITE_URL}"
+
+
+def test_fit_caption_trims_on_a_word_boundary_under_the_limit():
+    caption = "TR docks the biggest boat in the harbor, sideways, across three slips. " * 10
+    fitted = fit_caption(caption, 280)
+
+    assert len(fitted) <= 280
+    assert fitted.endswith(f"…\n\n{SITE_URL}")
+    text = fitted[:-len(f"…\n\n{SITE_URL}")]
+    assert caption.startswith(text) and caption[len(text)] in " ,"
+
+
+def test_encode_to_budget_stays_under_max_bytes():
+    rng = random.Random(1)
+    # Noise doesn't compress, so the floor quality is still too big and it has to shrink
+    img = Image.frombytes("RGB", (400, 400), bytes(rng.getrandbits(8) for _ in range(400 * 400 * 3)))
+
+    data, quality, size = encode_to_budget(img, 30_000)
+
+    assert len(data) <= 30_000
+    assert size[0] < 400
+    assert data[:3] == b"\xff\xd8\xff"
+
+
+def test_find_panels_prefers_finals_then_png(tmp_path):
+    for name in ["comic-boat-panel1.png", "comic-boat-panel1.jpg", "comic-boat-panel1-final.jpg",
+                 "comic-boat-panel2.jpg", "comic-boat-panel2.png",
+                 "comic-boat-panel3-candidate2.png", "comic-boat-panel3.jpg"]:
+        (tmp_path / name).write_bytes(b"")
+
+    assert find_panels(str(tmp_path), "comic-draft-boat.md", "boat") == [
+        str(tmp_path / "comic-boat-panel1-final.jpg"),
+        str(tmp_path / "comic-boat-panel2.png"),
+        str(tmp_path / "comic-boat-panel3.jpg"),
+    ]
+
+
+def test_find_panels_falls_back_to_the_published_number(tmp_path):
+    (tmp_path / "comic-004-panel1.jpg").write_bytes(b"")
+
+    assert find_panels(str(tmp_path), "comic-004-waterskiing.md", "waterskiing") == [
+        str(tmp_path / "comic-004-panel1.jpg")]
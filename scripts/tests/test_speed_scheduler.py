@@ -0,0 +1,60 @@
+from tr_speed_scheduler import (DEFAULT_TIER_COST, DEFAULT_TIER_LATENCY, MIN_SAMPLES, PendingComic,
+                                SpeedScheduler, load_tier_stats, record_run)
+
+NOW = 1_000_000.0
+
+
+def scheduler(tmp_path) -> SpeedScheduler:
+    # No run log yet, so every tier uses the default latency and cost
+    return SpeedScheduler(db_path=str(tmp_path / "missing.db"), run_log=str(tmp_path / "runs.jsonl"))
+
+
+def test_deadline_is_scheduled_date_minus_lead_time(tmp_path):
+    s = SpeedScheduler(db_path=str(tmp_path / "missing.db"), run_log=str(tmp_path / "runs.jsonl"),
+                       lead_hours=24)
+    assert (s._parse_deadline("2026-03-02") - s._parse_deadline("2026-03-01 00:00:00")) == 24 * 3600
+    assert s._parse_deadline("2026-03-02T00:00:00") == s._parse_deadline("2026-03-02")
+    assert s._parse_deadline(None) is None
+    assert s._parse_deadline("next tuesday") is None
+
+
+def test_relaxed_when_there_is_time(tmp_path):
+    plan = scheduler(tmp_path).plan([PendingComic("boat", "Boat", NOW + 10_000, [1, 2])], now=NOW)
+
+    assert [a.tier for a in plan.assignments] == ["relaxed", "relaxed"]
+    assert [a.est_finish for a in plan.assignments] == [NOW + 600, NOW + 1200]
+    assert plan.total_cost == 2 * DEFAULT_TIER_COST["relaxed"]
+
+
+def test_escalates_only_as_far_as_the_deadline_needs(tmp_path):
+    # Two relaxed panels take 1200s; one fast panel brings it to 660s
+    plan = scheduler(tmp_path).plan([PendingComic("boat", "Boat", NOW + 700, [1, 2])], now=NOW)
+
+    assert sorted(a.tier for a in plan.assignments) == ["fast", "relaxed"]
+    assert not any(a.at_risk for a in plan.assignments)
+    assert plan.assignments[-1].est_finish <= NOW + 700
+
+
+def test_unsaveable_comic_rolls_back_its_escalations(tmp_path):
+    comics = [PendingComic("late", "Late", NOW + 40, [1, 2]),
+              PendingComic("later", "Later", NOW + 100_000, [1])]
+    plan = scheduler(tmp_path).plan(comics, now=NOW)
+
+    # Even two turbo panels (60s) miss a 40s deadline: nothing is paid to try
+    late = [a for a in plan.assignments if a.slug == "late"]
+    assert [a.tier for a in late] == ["relaxed", "relaxed"]
+    assert all(a.at_risk for a in late)
+    assert plan.total_cost == 3 * DEFAULT_TIER_COST["relaxed"]
+
+
+def test_samples_count_only_timed_runs(tmp_path):
+    log = str(tmp_path / "runs.jsonl")
+    for _ in range(MIN_SAMPLES - 1):
+        record_run(log, "fast", 20, success=True)
+    for _ in range(3):
+        record_run(log, "fast", 5, success=False)
+
+    stats = load_tier_stats(log)["fast"]
+    # Failures aren't timed, so there are too few samples for observed percentiles
+    assert stats.samples == MIN_SAMPLES - 1
+    assert stats.p90 == DEFAULT_TIER_LATENCY["fast"]
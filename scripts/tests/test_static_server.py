@@ -0,0 +1,129 @@
+import gzip
+import socket
+import threading
+import time
+from http.client import HTTPConnection
+
+import pytest
+
+import tr_static_server
+from tr_static_server import PooledHTTPServer, StaticRequestHandler, parse_accept_encoding
+
+BODY = b"".join(b"line %04d of the archive page\n" % i for i in range(200))
+
+
+class ShortTimeoutHandler(StaticRequestHandler):
+    timeout = 0.5
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "page.html").write_bytes(BODY)
+    (tmp_path / "page.html.gz").write_bytes(gzip.compress(BODY))
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.txt").write_text("a")
+
+    def handler(*args, **kwargs):
+        return ShortTimeoutHandler(*args, directory=str(tmp_path), **kwargs)
+
+    httpd = PooledHTTPServer(("127.0.0.1", 0), handler, workers=2, quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(port, path, headers=None, connection=None):
+    conn = connection or HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_single_range(server):
+    response, body = get(server, "/page.html", {"Range": "bytes=10-19"})
+    assert response.status == 206
+    assert response.getheader("Content-Range") == f"bytes 10-19/{len(BODY)}"
+    assert body == BODY[10:20]
+
+
+@pytest.mark.parametrize("header", ["bytes=500-100", f"bytes={len(BODY)}-", "bytes=-0"])
+def test_unsatisfiable_range(server, header):
+    response, body = get(server, "/page.html", {"Range": header})
+    assert response.status == 416
+    assert response.getheader("Content-Range") == f"bytes */{len(BODY)}"
+    assert body == b""
+
+
+def test_multi_range_is_ignored(server):
+    response, body = get(server, "/page.html", {"Range": "bytes=0-1,5-6"})
+    assert response.status == 200
+    assert body == BODY
+
+
+def test_keepalive_range_does_not_leak(server):
+    conn = HTTPConnection("127.0.0.1", server, timeout=5)
+    response, body = get(server, "/page.html", {"Range": "bytes=0-4"}, connection=conn)
+    assert body == BODY[:5]
+    response, body = get(server, "/sub/", connection=conn)
+    assert response.status == 200 and b"a.txt" in body
+    response, body = get(server, "/page.html", connection=conn)
+    assert body == BODY
+    conn.close()
+
+
+def test_idle_keepalive_does_not_pin_workers(server):
+    idle = []
+    for _ in range(2):
+        sock = socket.create_connection(("127.0.0.1", server))
+        sock.sendall(b"GET /sub/a.txt HTTP/1.1\r\nHost: x\r\n\r\n")
+        sock.recv(4096)
+        idle.append(sock)  # Keep the connection open and idle
+
+    start = time.time()
+    response, body = get(server, "/sub/a.txt")
+    assert body == b"a"
+    assert time.time() - start < 3
+    for sock in idle:
+        sock.close()
+
+
+def test_keepalive_request_cap(server, monkeypatch):
+    monkeypatch.setattr(tr_static_server, "MAX_KEEPALIVE_REQUESTS", 2)
+    conn = HTTPConnection("127.0.0.1", server, timeout=5)
+    first, _ = get(server, "/sub/a.txt", connection=conn)
+    second, _ = get(server, "/sub/a.txt", connection=conn)
+    assert first.getheader("Connection") != "close"
+    assert second.getheader("Connection") == "close"
+    conn.close()
+
+
+@pytest.mark.parametrize("accept, encoding", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=0, *;q=1", None),
+    ("*", "gzip"),
+    ("identity", None),
+])
+def test_content_encoding_honors_q_values(server, accept, encoding):
+    response, body = get(server, "/page.html", {"Accept-Encoding": accept})
+    assert response.getheader("Content-Encoding") == encoding
+    assert (gzip.decompress(body) if encoding else body) == BODY
+    # Ranges are only honored on the identity body
+    assert response.getheader("Accept-Ranges") == (None if encoding else "bytes")
+
+
+@pytest.mark.parametrize("query, cache_control", [
+    ("", tr_static_server.CACHE_REVALIDATE),
+    ("?nav=1", tr_static_server.CACHE_REVALIDATE),
+    ("?v=abc", tr_static_server.CACHE_IMMUTABLE),
+    ("?nav=1&v=abc", tr_static_server.CACHE_IMMUTABLE),
+])
+def test_only_v_query_is_immutable(server, query, cache_control):
+    response, _ = get(server, "/page.html" + query)
+    assert response.getheader("Cache-Control") == cache_control
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("br;q=0.5, gzip ; q=0, deflate") == {"br": 0.5, "gzip": 0.0, "deflate": 1.0}
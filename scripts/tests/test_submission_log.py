@@ -0,0 +1,95 @@
+import time
+import threading
+
+import pytest
+
+import tr_submission_log
+from tr_submission_log import SubmissionLog
+
+
+def test_recovery_truncates_index_to_data(tmp_path):
+    with SubmissionLog(str(tmp_path)) as log:
+        for i in range(5):
+            log.append({"n": i})
+    segment = log.segments()[-1]
+    # Crash where the index reached disk but the last two lines of data didn't
+    lines = segment.data_path.read_bytes().splitlines(keepends=True)
+    segment.data_path.write_bytes(b"".join(lines[:3]))
+    size = segment.data_path.stat().st_size
+
+    with SubmissionLog(str(tmp_path)) as log:
+        log.open_writer()
+        assert segment.data_path.stat().st_size == size
+        assert len(segment) == 3
+        assert log.append({"n": "next"}) == 3
+    assert [e.data["n"] for e in log.read()] == [0, 1, 2, "next"]
+
+
+def test_recovery_indexes_unindexed_lines_and_drops_torn_tail(tmp_path):
+    with SubmissionLog(str(tmp_path)) as log:
+        for i in range(3):
+            log.append({"n": i})
+    segment = log.segments()[-1]
+    # Index lost its last record; data has a half-written line at the end
+    segment.index_path.write_bytes(segment.index_path.read_bytes()[:-tr_submission_log.INDEX_RECORD.size])
+    with open(segment.data_path, 'ab') as f:
+        f.write(b'{"seq":3,"ts"')
+
+    with SubmissionLog(str(tmp_path)) as log:
+        log.open_writer()
+    assert [e.data["n"] for e in log.read()] == [0, 1, 2]
+    assert segment.data_path.read_bytes().endswith(b"}\n")
+
+
+def test_flusher_syncs_a_quiet_log(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(tr_submission_log.os, "fsync", lambda fd: synced.append(fd))
+    log = SubmissionLog(str(tmp_path), fsync_every=1000, fsync_interval=0.05)
+    log.append({"n": 0})
+    assert not synced
+    deadline = time.monotonic() + 2
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert synced
+    log.close()
+    assert log._flusher is None
+
+
+def test_concurrent_first_appends(tmp_path, monkeypatch):
+    log = SubmissionLog(str(tmp_path))
+    # Widen the window between "no writer yet" and "writer open"
+    segments = SubmissionLog.segments
+    monkeypatch.setattr(SubmissionLog, "segments", lambda self: time.sleep(0.05) or segments(self))
+    flock = tr_submission_log.fcntl.flock
+    locked = []
+    monkeypatch.setattr(tr_submission_log.fcntl, "flock",
+                        lambda f, op: (locked.append(op), flock(f, op))[1])
+    barrier = threading.Barrier(8)
+    seqs = []
+
+    def writer():
+        barrier.wait()
+        seqs.append(log.append({"t": threading.get_ident()}))
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert locked == [tr_submission_log.fcntl.LOCK_EX]  # One writer open, one flusher
+    log.close()
+    assert sorted(seqs) == list(range(8))
+    assert [e.seq for e in log.read()] == list(range(8))
+
+
+def test_consumer_behind_compaction_raises(tmp_path):
+    with SubmissionLog(str(tmp_path), segment_entries=2) as log:
+        for i in range(5):
+            log.append({"n": i})
+    log.commit("scripter", 5)
+    assert log.compact(str(tmp_path / "submissions.db")) == 4
+
+    with pytest.raises(ValueError, match="compacted"):
+        next(log.consume("latecomer"))
+    assert [e.seq for batch in log.consume("scripter") for e in batch] == []
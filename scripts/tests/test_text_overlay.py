@@ -0,0 +1,82 @@
+import xml.etree.ElementTree as ET
+
+from PIL import Image, ImageDraw
+
+from tr_text_overlay import (BUBBLE_PADDING, CAPTION_MARGIN, LINE_SPACING, MAX_BUBBLE_SHARE,
+                             MAX_CAPTION_SHARE, ComicPanel, SpeechBubble, TextOverlayTool)
+
+LONG = ("Bully! This is without a doubt the most magnificent vessel I have ever had the "
+        "pleasure of inspecting, and I have inspected a great many fine ships in my day.")
+
+
+def fits_at_current_size(tool, panels, width, height, draw) -> bool:
+    for panel in panels:
+        for bubble in panel.bubbles:
+            max_width = bubble.width - BUBBLE_PADDING * 2
+            lines = tool.wrap_text(bubble.text, tool.bubble_font, tool.bubble_advances, max_width)
+            if any(draw.textlength(line, font=tool.bubble_font) > max_width for line in lines):
+                return False
+            if len(lines) * round(tool.bubble_font.size * LINE_SPACING) > height * MAX_BUBBLE_SHARE - BUBBLE_PADDING * 2:
+                return False
+        if panel.caption:
+            max_width = width - CAPTION_MARGIN * 2
+            lines = tool.wrap_text(panel.caption, tool.caption_font, tool.caption_advances, max_width)
+            if any(draw.textlength(line, font=tool.caption_font) > max_width for line in lines):
+                return False
+            if len(lines) * round(tool.caption_font.size * LINE_SPACING) > height * MAX_CAPTION_SHARE - 20:
+                return False
+    return True
+
+
+def test_fit_comic_picks_one_size_that_fits_the_longest_text(tmp_path):
+    panels = [
+        ComicPanel(1, "p1.png", [SpeechBubble("Dee-lighted!", "TR", "top-right")]),
+        ComicPanel(2, "p2.png", [SpeechBubble(LONG, "TR", "top-right", width=260)],
+                   caption="Meanwhile, down at the harbor."),
+    ]
+    tool = TextOverlayTool(output_dir=str(tmp_path), font_size=40)
+    draw = ImageDraw.Draw(Image.new("RGB", (512, 512)))
+
+    size = tool.fit_comic(panels, 512, 512)
+
+    assert size < 40
+    assert tool.bubble_font.size == size
+    assert fits_at_current_size(tool, panels, 512, 512, draw)
+    tool.set_font_size(size + 1)
+    assert not fits_at_current_size(tool, panels, 512, 512, draw)
+
+
+def test_fit_comic_keeps_the_configured_size_when_everything_fits(tmp_path):
+    panels = [ComicPanel(1, "p1.png", [SpeechBubble("Bully!", "TR", "top-right")])]
+    tool = TextOverlayTool(output_dir=str(tmp_path), font_size=18)
+
+    assert tool.fit_comic(panels, 512, 512) == 18
+
+
+def test_text_layer_writes_clean_panel_and_escaped_svg(tmp_path):
+    art = tmp_path / "comic-boat-panel1.png"
+    Image.new("RGB", (512, 512), (30, 120, 200)).save(art)
+    panel = ComicPanel(1, str(art), [SpeechBubble("Ships & <sails>, bully!", "TR", "top-right")],
+                       caption="Meanwhile, at the dock.")
+    tool = TextOverlayTool(output_dir=str(tmp_path / "final"))
+
+    assert tool.write_text_layer(panel, "comic-boat-panel1-final.png")
+
+    final = tmp_path / "final"
+    # The art is copied untouched; no text is burned in
+    assert (final / "comic-boat-panel1.png").read_bytes() == art.read_bytes()
+    assert not (final / "comic-boat-panel1-final.png").exists()
+
+    svg = ET.parse(final / "comic-boat-panel1-text.svg").getroot()
+    ns = {"svg": "http://www.w3.org/2000/svg"}
+    assert svg.get("viewBox") == "0 0 512 512"
+    texts = {}
+    for t in svg.findall("svg:text", ns):
+        texts.setdefault(t.get("class"), []).append(t.text)
+    assert " ".join(texts["b"]) == "Ships & <sails>, bully!"
+    assert " ".join(texts["c"]) == "Meanwhile, at the dock."
+    assert texts["s"] == ["— TR"]
+
+    page = (final / "comic-boat-panel1-text.html").read_text()
+    assert 'src="comic-boat-panel1.png"' in page
+    assert "Ships &amp; &lt;sails&gt;" in page
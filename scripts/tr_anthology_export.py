@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+TR Comic Anthology Exporter
+Streams published comics in publication order into a CBZ (zip) or PDF.
+Pages are re-encoded in a small worker pool and written one at a time, and a
+manifest next to the export lets a rebuild append only new comics.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import zipfile
+import argparse
+from pathlib import Path
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterator
+from dataclasses import dataclass, asdict
+from PIL import Image
+
+PANEL_PATTERN = re.compile(r'comic-(\d+)-panel(\d+)\.(jpg|jpeg|png)$', re.IGNORECASE)
+
+
+@dataclass
+class PageSource:
+    comic: int
+    panel: int
+    path: str
+    sha256: str
+
+    @property
+    def entry_name(self) -> str:
+        return f"comic-{self.comic:03d}-panel{self.panel}.jpg"
+
+
+@dataclass
+class ExportOptions:
+    format: str = "cbz"  # "cbz" or "pdf"
+    max_size: int = 0  # Longest edge in pixels, 0 = keep original
+    quality: int = 85
+    workers: int = 4
+
+    @property
+    def key(self) -> str:
+        """Options that change page bytes - a different key forces a full rebuild."""
+        return f"{self.format}:{self.max_size}:{self.quality}"
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 16) -> str:
+    """Hash a file without reading it all into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AnthologyExporter:
+    def __init__(self, published_dir: str = "comics/published", options: Optional[ExportOptions] = None):
+        self.published_dir = Path(published_dir)
+        self.options = options or ExportOptions()
+
+    def collect_pages(self, start: int = 0, end: int = 0) -> List[PageSource]:
+        """List published panels in publication order (comic number, then panel)."""
+        pages = []
+        for path in self.published_dir.iterdir():
+            match = PANEL_PATTERN.match(path.name)
+            if not match:
+                continue
+            comic, panel = int(match.group(1)), int(match.group(2))
+            if (start and comic < start) or (end and comic > end):
+                continue
+            pages.append((comic, panel, path))
+
+        pages.sort()
+        return [PageSource(comic=c, panel=p, path=str(path), sha256=file_sha256(path))
+                for c, p, path in pages]
+
+    def _encode_page(self, page: PageSource) -> bytes:
+        """Decode, optionally downscale and re-encode one page as JPEG."""
+        with Image.open(page.path) as img:
+            if self.options.max_size:
+                # JPEG can decode straight to a reduced scale
+                img.draft("RGB", (self.options.max_size, self.options.max_size))
+            img = img.convert("RGB")
+            if self.options.max_size and max(img.size) > self.options.max_size:
+                img.thumbnail((self.options.max_size, self.options.max_size), Image.LANCZOS)
+            buffer = BytesIO()
+            img.save(buffer, "JPEG", quality=self.options.quality, optimize=True)
+            return buffer.getvalue()
+
+    def _stream_pages(self, pages: List[PageSource]) -> Iterator[tuple]:
+        """Yield (page, bytes) in order, keeping at most a few pages in flight."""
+        window = max(1, self.options.workers) * 2
+        with ThreadPoolExecutor(max_workers=self.options.workers) as pool:
+            pending = deque()
+            queue = iter(pages)
+            for page in queue:
+                pending.append((page, pool.submit(self._encode_page, page)))
+                if len(pending) >= window:
+                    break
+            while pending:
+                page, future = pending.popleft()
+                yield page, future.result()
+                next_page = next(queue, None)
+                if next_page is not None:
+                    pending.append((next_page, pool.submit(self._encode_page, next_page)))
+
+    @staticmethod
+    def _manifest_path(output: Path) -> Path:
+        return output.with_name(output.name + ".manifest.json")
+
+    def _load_manifest(self, output: Path) -> Optional[Dict]:
+        manifest_path = self._manifest_path(output)
+        if not output.exists() or not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        # The export and manifest are replaced one after the other; a crash in
+        # between leaves an export the manifest doesn't describe
+        if manifest.get("bytes") != output.stat().st_size:
+            return None
+        return manifest
+
+    def _write_manifest(self, output: Path, pages: List[PageSource]):
+        manifest_path = self._manifest_path(output)
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"options": self.options.key, "bytes": output.stat().st_size,
+                       "pages": [asdict(p) for p in pages]}, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def export(self, output: str, start: int = 0, end: int = 0, force: bool = False) -> Dict:
+        """Build or extend an anthology. Returns a summary dict."""
+        output_path = Path(output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        pages = self.collect_pages(start, end)
+
+        if not pages:
+            print(f"  ⚠️  No published panels found in {self.published_dir}")
+            return {"file": None, "pages": 0, "appended": 0, "status": "empty"}
+
+        # Reuse the existing export if it is a prefix of what we want now
+        manifest = None if force else self._load_manifest(output_path)
+        existing = []
+        if manifest and manifest.get("options") == self.options.key:
+            existing = manifest.get("pages", [])
+            wanted = [p.sha256 for p in pages[:len(existing)]]
+            if [p["sha256"] for p in existing] != wanted:
+                existing = []
+
+        if existing and len(existing) == len(pages):
+            print(f"  ⏭️  Up to date: {output_path}")
+            return {"file": str(output_path), "pages": len(pages), "appended": 0, "status": "cached"}
+
+        new_pages = pages[len(existing):]
+        append = bool(existing)
+        print(f"  {'Appending' if append else 'Writing'} {len(new_pages)} pages to {output_path}")
+
+        # Build into a temp file (appending to a copy of the current export) so
+        # a failed export never damages or replaces a good one
+        tmp_path = output_path.with_name(output_path.name + ".partial")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            if append:
+                shutil.copyfile(output_path, tmp_path)
+            self._write(tmp_path, new_pages, append=append)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        self._write_manifest(output_path, pages)
+        return {
+            "file": str(output_path),
+            "pages": len(pages),
+            "appended": len(new_pages),
+            "status": "appended" if append else "rebuilt"
+        }
+
+    def _write(self, path: Path, pages: List[PageSource], append: bool):
+        if self.options.format == "pdf":
+            self._write_pdf(path, pages, append)
+        else:
+            self._write_cbz(path, pages, append)
+
+    def _write_cbz(self, path: Path, pages: List[PageSource], append: bool):
+        # JPEG is already compressed - store entries as-is
+        with zipfile.ZipFile(path, 'a' if append else 'w', compression=zipfile.ZIP_STORED) as archive:
+            for page, data in self._stream_pages(pages):
+                archive.writestr(page.entry_name, data)
+                print(f"    ✅ {page.entry_name}")
+
+    def _write_pdf(self, path: Path, pages: List[PageSource], append: bool):
+        # Pillow's PDF writer appends one page per save without re-reading old pages
+        for page, data in self._stream_pages(pages):
+            with Image.open(BytesIO(data)) as img:
+                img.save(path, "PDF", append=append or path.exists(), resolution=150.0)
+            print(f"    ✅ {page.entry_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export published TR comics as a CBZ or PDF anthology")
+    parser.add_argument("output", help="Output file (.cbz or .pdf)")
+    parser.add_argument("--published", default="comics/published", help="Published panels directory")
+    parser.add_argument("--format", choices=["cbz", "pdf"], help="Export format (default: from extension)")
+    parser.add_argument("--max-size", type=int, default=0, help="Downscale pages to this longest edge")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality for re-encoded pages")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel page encoders")
+    parser.add_argument("--start", type=int, default=0, help="First comic number to include")
+    parser.add_argument("--end", type=int, default=0, help="Last comic number to include")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild")
+
+    args = parser.parse_args()
+
+    export_format = args.format or ("pdf" if args.output.lower().endswith(".pdf") else "cbz")
+    options = ExportOptions(format=export_format, max_size=args.max_size,
+                            quality=args.quality, workers=args.workers)
+
+    print(f"\n📚 Exporting anthology: {args.output}")
+    exporter = AnthologyExporter(published_dir=args.published, options=options)
+    results = exporter.export(args.output, start=args.start, end=args.end, force=args.force)
+    print(f"\nResults: {json.dumps(results, indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
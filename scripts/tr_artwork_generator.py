@@ -6,16 +6,23 @@ Reads comic scripts from .md files and outputs consistent artwork.
 """
 
 import os
-import re
 import json
 import base64
 import argparse
 from pathlib import Path
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, BinaryIO
+from dataclasses import dataclass, asdict
 from openai import OpenAI
 from PIL import Image
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+from tr_palette_encode import PaletteOptions, encode_file
+from tr_drafts import (DraftManifest, DraftPanel, draft_dir, load_manifest,
+                       save_manifest, set_status, parse_panel_list)
+from tr_leases import LeaseManager, DEFAULT_TTL, panel_key, run_until_drained
+from tr_image_scan import IMAGE_EXTENSIONS, conform_to_format
+from tr_script_parser import parse_script
 
 # TR Character consistency string - include in EVERY prompt
 TR_CHARACTER = """Chubby middle-aged man named TR (Tubby Retard), yacht owner character:
@@ -36,6 +43,19 @@ COMIC_STYLE = """Comic book panel style:
 - Yachting/marina setting
 - Slightly exaggerated proportions for humor"""
 
+DEFAULT_MODEL = "dall-e-3"
+
+# gpt-image models always return base64 and use their own quality names
+GPT_IMAGE_QUALITY = {"hd": "high", "standard": "medium"}
+
+# DALL-E 3 can't go below 1024x1024; gpt-image models are cheapest here too
+DRAFT_SIZE = "1024x1024"
+
+# Base64 characters decoded per write - must be a multiple of 4. The client
+# already holds the whole string; chunking only avoids a second full-size
+# copy of the decoded image.
+B64_CHUNK_SIZE = 64 * 1024
+
 
 @dataclass
 class ComicPanel:
@@ -57,78 +77,31 @@ class ComicScript:
 
 
 class TRArtworkGenerator:
-    def __init__(self, api_key: Optional[str] = None, output_dir: str = "comics/generated"):
-        """Initialize generator with OpenAI API key."""
+    def __init__(self, api_key: Optional[str] = None, output_dir: str = "comics/generated",
+                 model: str = DEFAULT_MODEL, response_format: str = "b64_json",
+                 palette: Optional[PaletteOptions] = None):
+        """Initialize generator with OpenAI API key.
+        
+        response_format "b64_json" returns image bytes inline with the API
+        response; "url" falls back to downloading each image separately.
+        palette re-encodes PNG masters as adaptive-palette PNGs.
+        """
         self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self.response_format = response_format
+        self.palette = palette
         
-    def parse_script_file(self, script_path: str) -> ComicScript:
-        """Parse a comic script markdown file."""
-        with open(script_path, 'r') as f:
-            content = f.read()
-        
-        # Extract title
-        title_match = re.search(r'\*\*Title:\*\* (.+)', content)
-        title = title_match.group(1) if title_match else "Untitled"
-        
-        # Extract slug
-        slug_match = re.search(r'\*\*Slug:\*\* (.+)', content)
-        slug = slug_match.group(1) if slug_match else self._slugify(title)
-        
-        # Extract location
-        location_match = re.search(r'\*\*Location:\*\* (.+)', content)
-        location = location_match.group(1) if location_match else "Unknown"
-        
-        # Extract caption
-        caption_match = re.search(r'## Caption:\s*\n+(.+?)(?=\n##|$)', content, re.DOTALL)
-        caption = caption_match.group(1).strip() if caption_match else ""
-        
-        # Parse panels
-        panels = []
-        panel_sections = re.split(r'### Panel \d+:', content)[1:]  # Skip first empty split
-        
-        for i, section in enumerate(panel_sections, 1):
-            panel = self._parse_panel(i, section)
-            if panel:
-                panels.append(panel)
-        
-        return ComicScript(
-            title=title,
-            slug=slug,
-            location=location,
-            panels=panels,
-            caption=caption
-        )
-    
-    def _parse_panel(self, number: int, section: str) -> Optional[ComicPanel]:
-        """Parse a single panel section from the script."""
-        # Extract scene description
-        scene_match = re.search(r'\*\*Scene:\*\* (.+?)(?=\*\*|$)', section, re.DOTALL)
-        description = scene_match.group(1).strip() if scene_match else ""
-        
-        # Extract dialogue
-        dialogue_match = re.search(r'\*\*Dialogue:\*\*(.+?)(?=\*\*|$)', section, re.DOTALL)
-        dialogue = dialogue_match.group(1).strip() if dialogue_match else ""
-        
-        # Extract DALL-E prompt if present
-        prompt_match = re.search(r'\*\*DALL-E Prompt:\*\*\s*```(.+?)```', section, re.DOTALL)
-        dall_e_prompt = prompt_match.group(1).strip() if prompt_match else ""
-        
-        # Extract caption
-        caption_match = re.search(r'\*\*Caption:\*\* (.+?)(?=\*\*|$)', section, re.DOTALL)
-        caption = caption_match.group(1).strip() if caption_match else ""
-        
-        if not description:
-            return None
-            
-        return ComicPanel(
-            number=number,
-            description=description,
-            dialogue=dialogue,
-            dall_e_prompt=dall_e_prompt,
-            caption=caption
-        )
+    @staticmethod
+    def parse_script_file(script_path: str) -> ComicScript:
+        """Parse a comic script markdown file (no API key needed)."""
+        script = parse_script(script_path)
+        panels = [ComicPanel(number=p.number, description=p.scene, dialogue=p.dialogue,
+                             dall_e_prompt=p.dall_e_prompt, caption=p.caption)
+                  for p in script.panels]
+        return ComicScript(title=script.title, slug=script.slug, location=script.location,
+                           panels=panels, caption=script.caption)
     
     def generate_panel_prompt(self, panel: ComicPanel, comic_title: str) -> str:
         """Generate a comprehensive prompt for a panel."""
@@ -154,69 +127,173 @@ Make sure:
 
         return full_prompt
     
+    def request_images(self, prompt: str, size: str = "1024x1024", quality: str = "hd",
+                        n: int = 1, max_retries: int = 3) -> List:
+        """Call the Images API and return the response data items."""
+        kwargs = {"model": self.model, "prompt": prompt, "size": size}
+        if self.model.startswith("gpt-image"):
+            # Always returns b64_json; no response_format parameter
+            kwargs["quality"] = GPT_IMAGE_QUALITY.get(quality, quality)
+        else:
+            kwargs["quality"] = quality
+            kwargs["response_format"] = self.response_format
+        
+        # DALL-E 3 only accepts n=1 - make one call per candidate
+        per_call = 1 if self.model == "dall-e-3" else n
+        
+        images = []
+        while len(images) < n:
+            for attempt in range(max_retries):
+                try:
+                    print(f"  Generating... (attempt {attempt + 1}/{max_retries})")
+                    
+                    response = self.client.images.generate(
+                        n=min(per_call, n - len(images)),
+                        **kwargs
+                    )
+                    
+                    # Store the revised prompt for reference
+                    revised_prompt = getattr(response.data[0], 'revised_prompt', '')
+                    if revised_prompt:
+                        print(f"  Revised prompt: {revised_prompt[:100]}...")
+                    
+                    images.extend(response.data)
+                    break
+                
+                except Exception as e:
+                    print(f"  Error on attempt {attempt + 1}: {e}")
+                    if attempt == max_retries - 1:
+                        return images
+        
+        return images
+    
+    def write_image(self, item, f: BinaryIO):
+        """Write one response item (inline base64 or a URL), or raw bytes, to an open file."""
+        if isinstance(item, bytes):
+            f.write(item)
+            return
+        
+        b64_data = getattr(item, 'b64_json', None)
+        if b64_data:
+            for i in range(0, len(b64_data), B64_CHUNK_SIZE):
+                f.write(base64.b64decode(b64_data[i:i + B64_CHUNK_SIZE]))
+            return
+        
+        # Fallback: provider only gave us a URL
+        import requests
+        
+        image_url = getattr(item, 'url', None)
+        if not image_url:
+            raise ValueError("Image response had neither b64_json nor url")
+        
+        with requests.get(image_url, timeout=30, stream=True) as image_response:
+            image_response.raise_for_status()
+            for chunk in image_response.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+    
     def generate_panel(self, prompt: str, size: str = "1024x1024", quality: str = "hd",
                       max_retries: int = 3) -> Optional[bytes]:
         """Generate a single panel image using OpenAI Images API."""
-        import requests
-
-        for attempt in range(max_retries):
-            try:
-                print(f"  Generating... (attempt {attempt + 1}/{max_retries})")
-
-                response = self.client.images.generate(
-                    model="dall-e-3",  # Use DALL-E 3 (more stable)
-                    prompt=prompt,
-                    size=size,
-                    quality=quality,
-                    n=1
-                )
-
-                # Get image URL and download
-                image_url = response.data[0].url
-
-                # Download the image
-                image_response = requests.get(image_url, timeout=30)
-                image_response.raise_for_status()
-
-                # Store the revised prompt for reference
-                revised_prompt = getattr(response.data[0], 'revised_prompt', '')
-                if revised_prompt:
-                    print(f"  Revised prompt: {revised_prompt[:100]}...")
-
-                return image_response.content
-
-            except Exception as e:
-                print(f"  Error on attempt {attempt + 1}: {e}")
-                if attempt == max_retries - 1:
-                    return None
-
-        return None
+        images = self.request_images(prompt, size, quality, n=1, max_retries=max_retries)
+        if not images:
+            return None
+        
+        try:
+            buffer = BytesIO()
+            self.write_image(images[0], buffer)
+            return buffer.getvalue()
+        except Exception as e:
+            print(f"  Error reading image: {e}")
+            return None
     
     def save_panel(self, image_data: bytes, slug: str, panel_number: int, 
                    format: str = "png") -> str:
         """Save generated panel to disk."""
-        filename = f"comic-{slug}-panel{panel_number}.{format}"
-        filepath = self.output_dir / filename
-        
-        # Save raw image
-        with open(filepath, 'wb') as f:
-            f.write(image_data)
+        filepath = self.output_dir / f"comic-{slug}-panel{panel_number}.{format}"
+        part_path = filepath.with_name(filepath.name + ".part")
+        with open(part_path, 'wb') as f:
+            self.write_image(image_data, f)
+        os.replace(part_path, filepath)
         
-        # Also save a JPEG version for smaller file size if needed
         if format == "png":
+            self._save_jpeg_copy(filepath)
+            self._palette_encode(filepath)
+        return str(filepath)
+    
+    def generate_panel_files(self, prompt: str, slug: str, panel_number: int,
+                             format: str = "png", candidates: int = 1,
+                             size: str = "1024x1024", quality: str = "hd",
+                             max_retries: int = 3, directory: Optional[Path] = None,
+                             variant: str = "", derivatives: bool = True,
+                             still_held: Optional[Callable[[], bool]] = None) -> List[str]:
+        """Generate one or more candidates and write each straight to disk.
+        
+        The first candidate gets the usual comic-{slug}-panel{n}{variant} name,
+        extra ones are saved as comic-{slug}-panel{n}{variant}-candidate{i}.
+        derivatives controls the JPEG copy and palette encoding. still_held is
+        checked before each final rename; once it's False nothing more is written.
+        """
+        images = self.request_images(prompt, size, quality, n=candidates, max_retries=max_retries)
+        
+        saved = []
+        for i, item in enumerate(images, 1):
+            suffix = "" if i == 1 else f"-candidate{i}"
+            filepath = (directory or self.output_dir) / f"comic-{slug}-panel{panel_number}{variant}{suffix}.{format}"
+            # Write under a temp name so a crash never leaves a partial panel
+            # that other workers would take as finished
+            part_path = filepath.with_name(filepath.name + ".part")
             try:
-                img = Image.open(BytesIO(image_data))
-                jpeg_path = self.output_dir / f"comic-{slug}-panel{panel_number}.jpg"
-                img.convert('RGB').save(jpeg_path, 'JPEG', quality=90)
-                print(f"  Also saved JPEG: {jpeg_path}")
+                with open(part_path, 'wb') as f:
+                    self.write_image(item, f)
+                # The API returns PNG; re-encode if --format asked for something else
+                conform_to_format(part_path, IMAGE_EXTENSIONS.get(filepath.suffix.lower()))
+                # Don't overwrite the panel of a worker that took over our lease
+                if still_held and not still_held():
+                    print(f"  ⚠️  Lease lost, discarding {filepath.name}")
+                    part_path.unlink()
+                    break
+                os.replace(part_path, filepath)
             except Exception as e:
-                print(f"  Warning: Could not create JPEG: {e}")
+                print(f"  Error saving candidate {i}: {e}")
+                if part_path.exists():
+                    part_path.unlink()
+                continue
+            
+            if format == "png" and derivatives:
+                self._save_jpeg_copy(filepath)
+                self._palette_encode(filepath)
+            saved.append(str(filepath))
         
-        return str(filepath)
+        return saved
+    
+    def _save_jpeg_copy(self, filepath: Path):
+        """Save a JPEG version next to a PNG for smaller file size."""
+        try:
+            with Image.open(filepath) as img:
+                jpeg_path = filepath.with_suffix(".jpg")
+                img.convert('RGB').save(jpeg_path, 'JPEG', quality=90)
+            print(f"  Also saved JPEG: {jpeg_path}")
+        except Exception as e:
+            print(f"  Warning: Could not create JPEG: {e}")
+    
+    def _palette_encode(self, filepath: Path):
+        """Shrink a PNG master to an adaptive palette if enabled."""
+        if not self.palette:
+            return
+        try:
+            result = encode_file(str(filepath), options=self.palette)
+            if result.status == "palette":
+                print(f"  Palette PNG: {result.colors} colors, saved {result.saved_bytes // 1024}KB")
+        except Exception as e:
+            print(f"  Warning: Could not palette-encode: {e}")
     
     def generate_comic(self, script_path: str, output_format: str = "png",
-                      skip_existing: bool = True) -> Dict:
-        """Generate all panels for a comic script."""
+                      skip_existing: bool = True, candidates: int = 1,
+                      leases: Optional[LeaseManager] = None) -> Dict:
+        """Generate all panels for a comic script.
+        
+        With leases, panels claimed by other workers are reported as "leased".
+        """
         print(f"\n🎨 Processing: {script_path}")
         
         # Parse script
@@ -247,37 +324,148 @@ Make sure:
                 })
                 continue
             
-            # Generate prompt
-            prompt = self.generate_panel_prompt(panel, script.title)
-            print(f"    Prompt: {prompt[:100]}...")
-            
-            # Generate image
-            image_data = self.generate_panel(prompt)
-            
-            if image_data:
-                # Save image
-                filepath = self.save_panel(image_data, script.slug, panel.number, output_format)
-                print(f"    ✅ Saved: {filepath}")
-                results["panels"].append({
-                    "number": panel.number,
-                    "file": filepath,
-                    "status": "generated"
-                })
-            else:
-                print(f"    ❌ Failed to generate panel {panel.number}")
+            # In sharded mode, only the worker holding the lease generates
+            key = panel_key(script.slug, panel.number)
+            if leases and not leases.acquire(key):
+                print(f"    🔒 Claimed by another worker")
                 results["panels"].append({
                     "number": panel.number,
                     "file": None,
-                    "status": "failed"
+                    "status": "leased"
                 })
+                continue
+            
+            try:
+                # The previous holder may have finished before we got the lease
+                if leases and output_file.exists():
+                    print(f"    ⏭️  Skipping (finished by another worker): {output_file}")
+                    results["panels"].append({
+                        "number": panel.number,
+                        "file": str(output_file),
+                        "status": "skipped"
+                    })
+                    continue
+                
+                # Generate prompt
+                prompt = self.generate_panel_prompt(panel, script.title)
+                print(f"    Prompt: {prompt[:100]}...")
+                
+                # Generate image(s) straight to disk
+                files = self.generate_panel_files(
+                    prompt, script.slug, panel.number, output_format, candidates=candidates,
+                    still_held=(lambda: leases.still_held(key)) if leases else None)
+                
+                if leases and not files and not leases.still_held(key):
+                    # Taken over while we generated; the new holder writes it
+                    results["panels"].append({
+                        "number": panel.number,
+                        "file": None,
+                        "status": "leased"
+                    })
+                elif files:
+                    filepath = files[0]
+                    print(f"    ✅ Saved: {filepath}")
+                    if len(files) > 1:
+                        print(f"    ✅ Candidates: {len(files) - 1} more")
+                    results["panels"].append({
+                        "number": panel.number,
+                        "file": filepath,
+                        "candidates": files[1:],
+                        "status": "generated"
+                    })
+                else:
+                    print(f"    ❌ Failed to generate panel {panel.number}")
+                    results["panels"].append({
+                        "number": panel.number,
+                        "file": None,
+                        "status": "failed"
+                    })
+                    results["status"] = "partial"
+            finally:
+                if leases:
+                    leases.release(key)
+        
+        return results
+    
+    def _draft_quality(self) -> str:
+        """Cheapest quality setting for the current model."""
+        return "low" if self.model.startswith("gpt-image") else "standard"
+    
+    def generate_drafts(self, script_path: str, size: str = DRAFT_SIZE, workers: int = 4) -> Dict:
+        """Render every panel cheaply and concurrently into the drafts folder."""
+        print(f"\n✏️  Drafting: {script_path}")
+        
+        script = self.parse_script_file(script_path)
+        print(f"  Title: {script.title}")
+        print(f"  Slug: {script.slug}")
+        
+        manifest = DraftManifest(slug=script.slug, title=script.title,
+                                 script_path=str(script_path), backend="openai")
+        for panel in script.panels:
+            manifest.panels.append(DraftPanel(number=panel.number,
+                                              prompt=self.generate_panel_prompt(panel, script.title)))
+        
+        directory = draft_dir(str(self.output_dir))
+        quality = self._draft_quality()
+        
+        def render(draft: DraftPanel) -> List[str]:
+            return self.generate_panel_files(draft.prompt, script.slug, draft.number, "png",
+                                             size=size, quality=quality, directory=directory,
+                                             variant="-draft", derivatives=False)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for draft, files in zip(manifest.panels, pool.map(render, manifest.panels)):
+                draft.file = files[0] if files else None
+                draft.status = "draft" if files else "failed"
+                print(f"  Panel {draft.number}: {'✅ ' + draft.file if files else '❌ failed'}")
+        
+        save_manifest(str(self.output_dir), manifest)
+        print(f"  📋 Review, then: python tr_drafts.py approve {script.slug} --panels 1,2")
+        return asdict(manifest)
+    
+    def promote(self, slug: str, panels: Optional[List[int]] = None,
+                output_format: str = "png") -> Dict:
+        """Re-render approved draft panels at final quality using the draft prompts."""
+        print(f"\n⬆️  Promoting: {slug}")
+        
+        if panels:
+            manifest = set_status(str(self.output_dir), slug, panels, "approved")
+        else:
+            manifest = load_manifest(str(self.output_dir), slug)
+        if not manifest:
+            print(f"  ❌ No drafts found for {slug}")
+            return {"slug": slug, "panels": [], "status": "missing"}
+        
+        results = {"slug": slug, "panels": [], "status": "success"}
+        for draft in manifest.panels:
+            if draft.status != "approved":
+                continue
+            print(f"\n  Panel {draft.number}:")
+            files = self.generate_panel_files(draft.prompt, slug, draft.number, output_format)
+            if files:
+                draft.status = "promoted"
+                print(f"    ✅ Saved: {files[0]}")
+                results["panels"].append({"number": draft.number, "file": files[0], "status": "generated"})
+            else:
+                print(f"    ❌ Failed to promote panel {draft.number}")
+                results["panels"].append({"number": draft.number, "file": None, "status": "failed"})
                 results["status"] = "partial"
+            # Save as we go so a crash doesn't re-pay for promoted panels
+            save_manifest(str(self.output_dir), manifest)
         
+        if not results["panels"]:
+            print("  ⚠️  No approved panels to promote")
         return results
     
-    def batch_generate(self, scripts_dir: str = "scripts", pattern: str = "comic-draft-*.md"):
-        """Generate artwork for all draft scripts in directory."""
+    def batch_generate(self, scripts_dir: str = "scripts", pattern: str = "comic-draft-*.md",
+                       leases: Optional[LeaseManager] = None, candidates: int = 1):
+        """Generate artwork for all draft scripts in directory.
+        
+        With leases, several workers can run this over shared storage; each
+        panel is generated by whichever worker claims it first.
+        """
         scripts_path = Path(scripts_dir)
-        script_files = list(scripts_path.glob(pattern))
+        script_files = sorted(scripts_path.glob(pattern))
         
         if not script_files:
             print(f"No scripts found matching {pattern} in {scripts_dir}")
@@ -285,10 +473,16 @@ Make sure:
         
         print(f"\n🚀 Batch generating {len(script_files)} comics...")
         
-        all_results = []
-        for script_file in script_files:
-            results = self.generate_comic(str(script_file))
-            all_results.append(results)
+        def run_pass() -> List[Dict]:
+            return [self.generate_comic(str(script_file), candidates=candidates, leases=leases)
+                    for script_file in script_files]
+        
+        if leases:
+            print(f"  Worker: {leases.worker_id}")
+            with leases:
+                all_results = run_until_drained(run_pass, poll=leases.heartbeat)
+        else:
+            all_results = run_pass()
         
         # Summary
         print(f"\n📊 Summary:")
@@ -299,14 +493,6 @@ Make sure:
         print(f"  📁 Output: {self.output_dir.absolute()}")
         
         return all_results
-    
-    @staticmethod
-    def _slugify(text: str) -> str:
-        """Convert text to URL-safe slug."""
-        text = text.lower()
-        text = re.sub(r'[^a-z0-9]+', '-', text)
-        text = text.strip('-')
-        return text[:50]
 
 
 def main():
@@ -317,18 +503,52 @@ def main():
     parser.add_argument("--output", default="comics/generated", help="Output directory")
     parser.add_argument("--format", default="png", choices=["png", "jpg"], help="Output format")
     parser.add_argument("--regenerate", action="store_true", help="Regenerate existing panels")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Image model (dall-e-3, gpt-image-1, ...)")
+    parser.add_argument("--response", default="b64_json", choices=["b64_json", "url"],
+                        help="Inline base64 response (default) or URL download")
+    parser.add_argument("--candidates", type=int, default=1, help="Images to generate per panel")
+    parser.add_argument("--palette", action="store_true", help="Store PNG masters as adaptive-palette PNGs")
+    parser.add_argument("--palette-colors", type=int, default=128, help="Starting palette size")
+    parser.add_argument("--draft", action="store_true", help="Cheap concurrent draft renders for review")
+    parser.add_argument("--promote", metavar="SLUG", help="Re-render approved drafts of SLUG at final quality")
+    parser.add_argument("--panels", help="With --promote: approve and promote these panels (e.g. 1,3)")
+    parser.add_argument("--shard", action="store_true",
+                        help="With --batch: claim panels via lease files so several workers can share --output")
+    parser.add_argument("--worker-id", help="With --shard: worker name (default: hostname-pid)")
+    parser.add_argument("--lease-ttl", type=float, default=DEFAULT_TTL,
+                        help="With --shard: seconds without a heartbeat before a lease can be taken over")
     
     args = parser.parse_args()
+    if args.shard and args.regenerate:
+        # Existing panels are how workers know a claimed panel is finished
+        parser.error("--shard can't be combined with --regenerate")
     
     # Initialize generator
-    generator = TRArtworkGenerator(output_dir=args.output)
+    palette = PaletteOptions(colors=args.palette_colors) if args.palette else None
+    generator = TRArtworkGenerator(output_dir=args.output, model=args.model,
+                                   response_format=args.response, palette=palette)
     
-    if args.batch:
+    if args.promote:
+        results = generator.promote(args.promote, parse_panel_list(args.panels), args.format)
+        print(f"\nResults: {json.dumps(results, indent=2)}")
+    elif args.draft:
+        if args.batch:
+            script_files = sorted(Path(args.scripts_dir).glob("comic-draft-*.md"))
+        else:
+            script_files = [Path(args.script)] if args.script else []
+        for script_file in script_files:
+            generator.generate_drafts(str(script_file))
+    elif args.batch:
         # Generate all drafts
-        results = generator.batch_generate(args.scripts_dir)
+        leases = None
+        if args.shard:
+            leases = LeaseManager(args.output, worker_id=args.worker_id, ttl=args.lease_ttl,
+                                  heartbeat=args.lease_ttl / 10)
+        results = generator.batch_generate(args.scripts_dir, leases=leases, candidates=args.candidates)
     elif args.script:
         # Generate single script
-        results = generator.generate_comic(args.script, args.format, skip_existing=not args.regenerate)
+        results = generator.generate_comic(args.script, args.format, skip_existing=not args.regenerate,
+                                           candidates=args.candidates)
         print(f"\nResults: {json.dumps(results, indent=2)}")
     else:
         parser.print_help()
@@ -336,6 +556,9 @@ def main():
         print("  python tr_artwork_generator.py scripts/comic-draft-test.md")
         print("  python tr_artwork_generator.py --batch --scripts-dir scripts")
         print("  python tr_artwork_generator.py --batch --regenerate  # Force regenerate all")
+        print("  python tr_artwork_generator.py --batch --shard  # Run on several machines at once")
+        print("  python tr_artwork_generator.py scripts/comic-draft-test.md --draft")
+        print("  python tr_artwork_generator.py --promote test --panels 1,3")
 
 
 if __name__ == "__main__":
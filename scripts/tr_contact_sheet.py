@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+TR Comic Contact Sheets
+Builds thumbnail grids of generated panels (one sheet per comic, or one row
+per panel showing every candidate) plus a single HTML review page. Accept and
+reject on the page write back to the pipeline: draft manifests for drafts,
+comics/Crap for rejected panels, and .review.json for everything else.
+
+Layout ({output_dir}/contact/):
+  thumbs/{panel file stem}.jpg  cached thumbnails
+  sheet-{slug}.jpg              labeled grid per comic
+  index.html                    review page (use --serve for accept/reject)
+"""
+
+import os
+import re
+import json
+import html
+import hmac
+import hashlib
+import secrets
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from dataclasses import dataclass
+from PIL import Image, ImageDraw, ImageFont
+
+from tr_drafts import DRAFTS_SUBDIR, list_manifests, set_status
+from tr_pixel_cache import PixelCache, open_pixel_cache, DEFAULT_CACHE_DIR, SIZES as PIXEL_SIZES
+from tr_static_server import PooledHTTPServer, StaticRequestHandler
+
+CONTACT_SUBDIR = "contact"
+REVIEW_STATE = ".review.json"
+THUMB_SIZE = 256
+LABEL_HEIGHT = 18
+SHEET_GAP = 6
+
+PANEL_FILE = re.compile(
+    r'^comic-(?P<slug>.+?)-panel(?P<panel>\d+)(?P<draft>-draft)?(?:-candidate(?P<candidate>\d+))?\.(?:png|jpg)$'
+)
+
+
+@dataclass
+class ReviewItem:
+    slug: str
+    panel: int
+    path: str  # Relative to the output directory
+    kind: str  # "panel", "candidate" or "draft"
+    candidate: int = 1
+    prompt_hash: str = ""
+    status: str = ""
+
+    @property
+    def item_id(self) -> str:
+        return Path(self.path).stem
+
+    @property
+    def thumb_path(self) -> str:
+        return f"thumbs/{self.item_id}.jpg"
+
+    @property
+    def label(self) -> str:
+        candidate = f" c{self.candidate}" if self.candidate > 1 else ""
+        draft = " draft" if self.kind == "draft" else ""
+        return f"{self.slug} p{self.panel}{candidate}{draft} #{self.prompt_hash or '-'}"
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha1(prompt.encode()).hexdigest()[:8]
+
+
+def load_review_state(output_dir: str) -> Dict[str, str]:
+    path = Path(output_dir) / REVIEW_STATE
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_review_state(output_dir: str, state: Dict[str, str]):
+    path = Path(output_dir) / REVIEW_STATE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def collect_items(output_dir: str, candidates: bool = False, drafts: bool = False) -> List[ReviewItem]:
+    """Find reviewable panels. PNG masters win over their JPEG copies."""
+    root = Path(output_dir)
+    state = load_review_state(output_dir)
+
+    # Prompts and statuses from draft manifests
+    prompts: Dict[tuple, str] = {}
+    draft_status: Dict[tuple, str] = {}
+    for manifest in list_manifests(output_dir):
+        for panel in manifest.panels:
+            prompts[(manifest.slug, panel.number)] = prompt_hash(panel.prompt)
+            draft_status[(manifest.slug, panel.number)] = panel.status
+
+    directories = [root] + ([root / DRAFTS_SUBDIR] if drafts else [])
+    items = []
+    for directory in directories:
+        if not directory.exists():
+            continue
+        for path in sorted(directory.iterdir()):
+            match = PANEL_FILE.match(path.name)
+            if not match:
+                continue
+            if path.suffix == ".jpg" and path.with_suffix(".png").exists():
+                continue
+            candidate = int(match.group("candidate") or 1)
+            if candidate > 1 and not candidates:
+                continue
+            slug, panel = match.group("slug"), int(match.group("panel"))
+            is_draft = bool(match.group("draft"))
+            item = ReviewItem(
+                slug=slug,
+                panel=panel,
+                path=str(path.relative_to(root)),
+                kind="draft" if is_draft else ("candidate" if candidate > 1 else "panel"),
+                candidate=candidate,
+                prompt_hash=prompts.get((slug, panel), ""),
+            )
+            item.status = draft_status.get((slug, panel), "") if is_draft else state.get(item.item_id, "")
+            items.append(item)
+
+    items.sort(key=lambda i: (i.slug, i.kind == "draft", i.panel, i.candidate))
+    return items
+
+
+def thumbnail_is_fresh(source: str, thumb: str) -> bool:
+    thumb_path = Path(thumb)
+    return thumb_path.exists() and thumb_path.stat().st_mtime >= Path(source).stat().st_mtime
+
+
+def save_thumbnail(img: Image.Image, thumb: str, size: int = THUMB_SIZE):
+    thumb_path = Path(thumb)
+    img.thumbnail((size, size), Image.Resampling.BILINEAR)
+    tmp_path = thumb_path.with_name(thumb_path.name + ".tmp")
+    img.convert("RGB").save(tmp_path, "JPEG", quality=80)
+    os.replace(tmp_path, thumb_path)
+
+
+def make_thumbnail(source: str, thumb: str, size: int = THUMB_SIZE) -> str:
+    """Decode at reduced size and write a JPEG thumbnail. Skips fresh thumbnails."""
+    if thumbnail_is_fresh(source, thumb):
+        return thumb
+    with Image.open(source) as img:
+        # JPEG: scale in the DCT domain while decoding
+        img.draft("RGB", (size, size))
+        # PNG has no reduced decode; reduce() box-averages cheaply before resampling
+        factor = min(img.width, img.height) // (size * 2)
+        small = img.reduce(factor) if factor > 1 else img
+        save_thumbnail(small, thumb, size)
+    return thumb
+
+
+class ContactSheetBuilder:
+    def __init__(self, output_dir: str = "comics/generated", size: int = THUMB_SIZE, workers: int = 0,
+                 token: str = "", pixels: Optional[PixelCache] = None):
+        self.output_dir = Path(output_dir)
+        self.contact_dir = self.output_dir / CONTACT_SUBDIR
+        (self.contact_dir / "thumbs").mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.workers = workers or os.cpu_count() or 1
+        self.token = token  # Review server's per-run token, embedded in the page
+        self.options = {"candidates": False, "drafts": False}  # Last build, for rebuild()
+        self.pixels = pixels  # Decoded-pixel cache shared with the other analysis passes
+
+    def _cached_thumbnails(self, items: List[ReviewItem]) -> List[ReviewItem]:
+        """Thumbnails from the pixel cache's 256px arrays; misses are decoded in parallel."""
+        stale = [item for item in items
+                 if not thumbnail_is_fresh(str(self.output_dir / item.path), str(self.contact_dir / item.thumb_path))]
+        self.pixels.warm([str(self.output_dir / item.path) for item in stale], workers=self.workers)
+        stale_ids = {item.item_id for item in stale}
+        ready = []
+        for item in items:
+            try:
+                if item.item_id in stale_ids:
+                    array = self.pixels.get(str(self.output_dir / item.path), max(PIXEL_SIZES), "RGB")
+                    save_thumbnail(Image.fromarray(array), str(self.contact_dir / item.thumb_path), self.size)
+                ready.append(item)
+            except Exception as e:
+                print(f"  ❌ {item.path}: {e}")
+        return ready
+
+    def build_thumbnails(self, items: List[ReviewItem]) -> List[ReviewItem]:
+        """Thumbnail every item in parallel across processes. Returns the ones that decoded."""
+        if self.pixels and self.size <= max(PIXEL_SIZES):
+            return self._cached_thumbnails(items)
+        ready = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(make_thumbnail, str(self.output_dir / item.path),
+                                   str(self.contact_dir / item.thumb_path), self.size)
+                       for item in items]
+            for item, future in zip(items, futures):
+                try:
+                    future.result()
+                    ready.append(item)
+                except Exception as e:
+                    print(f"  ❌ {item.path}: {e}")
+        return ready
+
+    def build_sheet(self, slug: str, items: List[ReviewItem]) -> Path:
+        """One labeled grid: a row per panel, a column per candidate."""
+        rows: Dict[tuple, List[ReviewItem]] = {}
+        for item in items:
+            rows.setdefault((item.kind == "draft", item.panel), []).append(item)
+        # Single-candidate comics read better as one strip
+        if all(len(row) == 1 for row in rows.values()):
+            rows = {(0, 0): items}
+
+        columns = max(len(row) for row in rows.values())
+        cell_w, cell_h = self.size + SHEET_GAP, self.size + LABEL_HEIGHT + SHEET_GAP
+        sheet = Image.new("RGB", (columns * cell_w + SHEET_GAP, len(rows) * cell_h + SHEET_GAP), "white")
+        draw = ImageDraw.Draw(sheet)
+        font = ImageFont.load_default()
+
+        for y, key in enumerate(sorted(rows)):
+            for x, item in enumerate(rows[key]):
+                left, top = SHEET_GAP + x * cell_w, SHEET_GAP + y * cell_h
+                with Image.open(self.contact_dir / item.thumb_path) as thumb:
+                    sheet.paste(thumb, (left + (self.size - thumb.width) // 2, top))
+                label = item.label
+                while len(label) > 4 and draw.textlength(label, font=font) > self.size:
+                    label = label[:-2] + "…"
+                draw.text((left, top + self.size + 3), label, fill="black", font=font)
+
+        sheet_path = self.contact_dir / f"sheet-{slug}.jpg"
+        sheet.save(sheet_path, "JPEG", quality=85)
+        return sheet_path
+
+    def render_page(self, groups: Dict[str, List[ReviewItem]]) -> Path:
+        """Every comic's thumbnails on one page with accept/reject buttons."""
+        sections = []
+        for slug, items in groups.items():
+            figures = []
+            for item in items:
+                figures.append(f'''    <figure class="{item.kind} {html.escape(item.status)}" data-id="{html.escape(item.item_id)}">
+      <a href="../{html.escape(item.path)}" target="_blank"><img src="{item.thumb_path}" loading="lazy" alt="{html.escape(item.label)}"></a>
+      <figcaption>{html.escape(item.label)} <span class="status">{html.escape(item.status)}</span></figcaption>
+      <button onclick="review(this, 'approved')">✅ Accept</button>
+      <button onclick="review(this, 'rejected')">❌ Reject</button>
+    </figure>''')
+            sections.append(f'''<section>
+  <h2>{html.escape(slug)} <a href="sheet-{html.escape(slug)}.jpg">sheet</a></h2>
+  <div class="grid">
+{chr(10).join(figures)}
+  </div>
+</section>''')
+
+        page = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>TR Panel Review</title>
+<meta name="review-token" content="{html.escape(self.token)}">
+<style>
+  body {{ font-family: sans-serif; background: #f4f4f4; margin: 20px; }}
+  .grid {{ display: flex; flex-wrap: wrap; gap: 10px; }}
+  figure {{ margin: 0; background: white; padding: 6px; border: 3px solid transparent; width: {self.size}px; }}
+  figure img {{ width: 100%; display: block; }}
+  figcaption {{ font-size: 12px; margin: 4px 0; }}
+  figure.approved {{ border-color: #2e9d3a; }}
+  figure.promoted {{ border-color: #1c6fd1; }}
+  figure.rejected {{ border-color: #c0392b; opacity: 0.4; }}
+  figure.candidate {{ background: #fff8e1; }}
+  figure.draft {{ background: #eef3ff; }}
+</style>
+</head>
+<body>
+<h1>TR Panel Review ({sum(len(items) for items in groups.values())} panels, {len(groups)} comics)</h1>
+<p id="notice">Serve with <code>python tr_contact_sheet.py --serve</code> to enable accept/reject.</p>
+{chr(10).join(sections)}
+<script>
+async function review(button, status) {{
+  const figure = button.closest('figure');
+  const response = await fetch('/review', {{
+    method: 'POST',
+    headers: {{'Content-Type': 'application/json',
+               'X-Review-Token': document.querySelector('meta[name=review-token]').content}},
+    body: JSON.stringify({{id: figure.dataset.id, status: status}})
+  }});
+  if (!response.ok) {{
+    document.getElementById('notice').textContent = 'Review failed: ' + await response.text();
+    return;
+  }}
+  const result = await response.json();
+  // Accepting a candidate renames files, so reload to show the new layout
+  if (result.reload) {{ location.reload(); return; }}
+  figure.classList.remove('approved', 'rejected');
+  figure.classList.add(status);
+  figure.querySelector('.status').textContent = status;
+}}
+</script>
+</body>
+</html>
+'''
+        page_path = self.contact_dir / "index.html"
+        page_path.write_text(page)
+        return page_path
+
+    def build(self, candidates: bool = False, drafts: bool = False) -> Dict:
+        self.options = {"candidates": candidates, "drafts": drafts}
+        items = collect_items(str(self.output_dir), candidates=candidates, drafts=drafts)
+        if not items:
+            print(f"No panels found in {self.output_dir}")
+            return {"items": 0}
+
+        print(f"\n🖼️  Thumbnailing {len(items)} panels ({self.workers} workers)...")
+        items = self.build_thumbnails(items)
+
+        groups: Dict[str, List[ReviewItem]] = {}
+        for item in items:
+            groups.setdefault(item.slug, []).append(item)
+        for slug, group in groups.items():
+            sheet = self.build_sheet(slug, group)
+            print(f"  ✅ {sheet.name} ({len(group)} panels)")
+
+        page = self.render_page(groups)
+        print(f"\n📋 Review page: {page}")
+        return {"items": len(items), "comics": len(groups), "page": str(page)}
+
+    def rebuild(self) -> Dict:
+        """Rebuild sheets and page with the last build's options (thumbnails are cached)."""
+        return self.build(**self.options)
+
+
+def crap_dir(output_dir: str) -> Path:
+    """comics/Crap next to comics/generated, where rejects have always gone."""
+    path = Path(output_dir).resolve().parent / "Crap"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _move_to_crap(output_dir: str, path: Path):
+    for sibling in (path, path.with_suffix(".jpg")):
+        if sibling.exists():
+            os.replace(sibling, crap_dir(output_dir) / sibling.name)
+
+
+def apply_review(output_dir: str, item_id: str, status: str,
+                 rebuild: Optional[Callable[[], Dict]] = None) -> Dict:
+    """Write an accept/reject decision back to pipeline state.
+
+    rebuild regenerates the sheets and page when files were renamed, so the
+    reloaded page doesn't point at the old names.
+    """
+    if status not in ("approved", "rejected"):
+        raise ValueError(f"Unknown review status: {status}")
+    items = {item.item_id: item for item in collect_items(output_dir, candidates=True, drafts=True)}
+    item = items.get(item_id)
+    if not item:
+        raise KeyError(item_id)
+
+    root = Path(output_dir)
+    path = root / item.path
+    if item.kind == "draft":
+        set_status(output_dir, item.slug, [item.panel], status)
+        return {"id": item_id, "status": status, "reload": False}
+
+    state = load_review_state(output_dir)
+    reload = False
+    if status == "rejected":
+        _move_to_crap(output_dir, path)
+    elif item.kind == "candidate":
+        # The accepted candidate replaces the panel; the old panel is a reject
+        main = path.with_name(f"comic-{item.slug}-panel{item.panel}{path.suffix}")
+        _move_to_crap(output_dir, main)
+        for suffix in (path.suffix, ".jpg"):
+            source = path.with_suffix(suffix)
+            if source.exists():
+                os.replace(source, main.with_suffix(suffix))
+        state.pop(item_id, None)
+        item_id = main.stem
+        reload = True
+    state[item_id] = status
+    save_review_state(output_dir, state)
+    if reload and rebuild:
+        rebuild()
+    return {"id": item_id, "status": status, "reload": reload}
+
+
+class ReviewRequestHandler(StaticRequestHandler):
+    """Static files from the output directory plus POST /review.
+
+    Reviews must be JSON and carry the server's per-run token from the page,
+    so other sites open in the browser can't POST reviews to localhost (the
+    custom header and JSON type force a CORS preflight, which isn't answered).
+    """
+
+    def do_POST(self):
+        if self.path != "/review":
+            self.send_error(404, "Not found")
+            return
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self.send_error(415, "Reviews must be application/json")
+            return
+        token = self.headers.get("X-Review-Token", "")
+        if not self.server.token or not hmac.compare_digest(token, self.server.token):
+            self.send_error(403, "Bad review token")
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            result = apply_review(self.directory, body["id"], body["status"], rebuild=self.server.rebuild)
+        except (KeyError, ValueError) as e:
+            self.send_error(400, f"Bad review: {e}")
+            return
+        print(f"  {'✅' if result['status'] == 'approved' else '❌'} {result['id']}: {result['status']}")
+        payload = json.dumps(result).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_review_server(builder: ContactSheetBuilder, port: int) -> PooledHTTPServer:
+    """Review server for a built page; builder.token must be the token in that page."""
+    directory = str(builder.output_dir.resolve())
+
+    def handler(*handler_args, **handler_kwargs):
+        return ReviewRequestHandler(*handler_args, directory=directory, **handler_kwargs)
+
+    server = PooledHTTPServer(("127.0.0.1", port), handler, quiet=True)
+    server.token = builder.token
+    server.rebuild = builder.rebuild
+    return server
+
+
+def serve(builder: ContactSheetBuilder, port: int):
+    server = make_review_server(builder, port)
+    print(f"🌐 Review at http://localhost:{port}/{CONTACT_SUBDIR}/index.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build TR panel contact sheets and review page")
+    parser.add_argument("--output", default="comics/generated", help="Generator output directory")
+    parser.add_argument("--candidates", action="store_true", help="Include every candidate per panel")
+    parser.add_argument("--drafts", action="store_true", help="Include draft renders")
+    parser.add_argument("--size", type=int, default=THUMB_SIZE, help="Thumbnail size in pixels")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--serve", type=int, nargs="?", const=8090, metavar="PORT",
+                        help="Serve the review page with working accept/reject (default port 8090)")
+    parser.add_argument("--pixel-cache", default=DEFAULT_CACHE_DIR, help="Decoded-pixel cache directory")
+    parser.add_argument("--no-pixel-cache", action="store_true", help="Decode thumbnails directly")
+
+    args = parser.parse_args()
+
+    # Fresh token per run: only the page built now can submit reviews
+    token = secrets.token_urlsafe(16) if args.serve else ""
+    pixels = None if args.no_pixel_cache else open_pixel_cache(args.pixel_cache)
+    builder = ContactSheetBuilder(args.output, size=args.size, workers=args.workers, token=token,
+                                  pixels=pixels)
+    builder.build(candidates=args.candidates, drafts=args.drafts)
+    if args.serve:
+        serve(builder, args.serve)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+TR Comic Draft Manifests
+Tracks cheap draft renders and their review state so approved panels can be
+promoted (re-rendered at final quality with the same prompt).
+
+Drafts live in {output_dir}/drafts/:
+  comic-{slug}-panel{n}-draft.png
+  comic-{slug}.json  (manifest: prompts + draft/approved/rejected/promoted)
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+from typing import List, Optional
+from dataclasses import dataclass, field, asdict
+
+DRAFTS_SUBDIR = "drafts"
+DRAFT_STATUSES = ["draft", "approved", "rejected", "promoted", "failed"]
+
+
+@dataclass
+class DraftPanel:
+    number: int
+    prompt: str
+    file: Optional[str] = None
+    status: str = "draft"
+
+
+@dataclass
+class DraftManifest:
+    slug: str
+    title: str
+    script_path: str
+    backend: str  # "openai" or "midapi"
+    panels: List[DraftPanel] = field(default_factory=list)
+
+    def panel(self, number: int) -> Optional[DraftPanel]:
+        return next((p for p in self.panels if p.number == number), None)
+
+
+def draft_dir(output_dir: str) -> Path:
+    path = Path(output_dir) / DRAFTS_SUBDIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def draft_filename(slug: str, panel_number: int, format: str = "png") -> str:
+    return f"comic-{slug}-panel{panel_number}-draft.{format}"
+
+
+def manifest_path(output_dir: str, slug: str) -> Path:
+    return draft_dir(output_dir) / f"comic-{slug}.json"
+
+
+def load_manifest(output_dir: str, slug: str) -> Optional[DraftManifest]:
+    path = manifest_path(output_dir, slug)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        data = json.load(f)
+    panels = [DraftPanel(**p) for p in data.pop("panels", [])]
+    return DraftManifest(panels=panels, **data)
+
+
+def save_manifest(output_dir: str, manifest: DraftManifest):
+    path = manifest_path(output_dir, manifest.slug)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(asdict(manifest), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_manifests(output_dir: str) -> List[DraftManifest]:
+    manifests = []
+    for path in sorted(draft_dir(output_dir).glob("comic-*.json")):
+        manifest = load_manifest(output_dir, path.stem[len("comic-"):])
+        if manifest:
+            manifests.append(manifest)
+    return manifests
+
+
+def set_status(output_dir: str, slug: str, panels: List[int], status: str) -> Optional[DraftManifest]:
+    """Mark draft panels approved/rejected. Returns the updated manifest."""
+    if status not in DRAFT_STATUSES:
+        raise ValueError(f"Unknown draft status: {status}")
+    manifest = load_manifest(output_dir, slug)
+    if not manifest:
+        return None
+    for number in panels:
+        panel = manifest.panel(number)
+        if panel:
+            panel.status = status
+    save_manifest(output_dir, manifest)
+    return manifest
+
+
+def parse_panel_list(value: Optional[str]) -> List[int]:
+    """'1,3' -> [1, 3]"""
+    if not value:
+        return []
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review TR comic drafts")
+    parser.add_argument("action", choices=["list", "approve", "reject"])
+    parser.add_argument("slug", nargs="?", help="Comic slug")
+    parser.add_argument("--panels", help="Comma-separated panel numbers (default: all)")
+    parser.add_argument("--output", default="comics/generated", help="Generator output directory")
+
+    args = parser.parse_args()
+
+    if args.action == "list":
+        manifests = list_manifests(args.output)
+        if args.slug:
+            manifests = [m for m in manifests if m.slug == args.slug]
+        if not manifests:
+            print("No drafts found")
+        for manifest in manifests:
+            print(f"\n📝 {manifest.title} ({manifest.slug}, {manifest.backend})")
+            for panel in manifest.panels:
+                print(f"  Panel {panel.number}: {panel.status:<9} {panel.file or '-'}")
+        return
+
+    if not args.slug:
+        parser.error("slug is required for approve/reject")
+
+    manifest = load_manifest(args.output, args.slug)
+    if not manifest:
+        print(f"❌ No drafts for {args.slug}")
+        return
+    panels = parse_panel_list(args.panels) or [p.number for p in manifest.panels]
+    status = "approved" if args.action == "approve" else "rejected"
+    set_status(args.output, args.slug, panels, status)
+    print(f"✅ {args.slug}: panels {', '.join(map(str, panels))} {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+TR Fused Panel Pipeline
+Runs generate → text overlay → encode for each panel with the image decoded
+exactly once. The staged tools write the panel to disk, re-open it for the
+JPEG copy and palette pass, then re-open it again for the overlay; here the
+decoded pixels are passed along in memory and handed to encoder processes
+through shared memory, so the next panel can generate while the last one
+encodes.
+
+Only the final panel is written by default. Intermediates (the raw master,
+its JPEG copy) are persisted with --keep.
+"""
+
+import os
+import argparse
+from pathlib import Path
+from io import BytesIO
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from PIL import Image
+
+from tr_artwork_generator import TRArtworkGenerator, DEFAULT_MODEL
+from tr_text_overlay import TextOverlayTool, ComicPanel as OverlayPanel
+from tr_palette_encode import PaletteOptions, encode_png
+
+INTERMEDIATES = ["master", "jpeg"]
+
+
+@dataclass
+class FusedOptions:
+    keep: Set[str] = field(default_factory=set)  # Subset of INTERMEDIATES
+    palette: Optional[PaletteOptions] = None  # Palette-encode PNG outputs
+    jpeg_quality: int = 90
+    workers: int = 2
+
+
+def encode_shared(shm_name: str, mode: str, size: tuple, path: str, format: str,
+                  palette: Optional[PaletteOptions] = None, jpeg_quality: int = 90) -> int:
+    """Encode pixels from a shared-memory block to path. Runs in a worker process.
+
+    Returns bytes written.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        img = Image.frombytes(mode, size, shm.buf)
+    finally:
+        shm.close()
+
+    output_path = Path(path)
+    tmp_path = output_path.with_name(output_path.name + ".part")
+    if format == "JPEG":
+        img.convert("RGB").save(tmp_path, "JPEG", quality=jpeg_quality)
+    elif palette:
+        encode_png(img, tmp_path, palette)
+    else:
+        img.save(tmp_path, "PNG")
+    os.replace(tmp_path, output_path)
+    return output_path.stat().st_size
+
+
+class SharedImage:
+    """Raw pixels of one decoded image in a shared-memory block."""
+
+    def __init__(self, img: Image.Image):
+        data = img.tobytes()
+        self.mode, self.size = img.mode, img.size
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        self.shm.buf[:len(data)] = data
+
+    def release(self, _future: Optional[Future] = None):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FusedPipeline:
+    def __init__(self, generator: TRArtworkGenerator, overlay: TextOverlayTool,
+                 options: Optional[FusedOptions] = None):
+        self.generator = generator
+        self.overlay = overlay
+        self.options = options or FusedOptions()
+
+    def _submit(self, pool: ProcessPoolExecutor, shared: SharedImage, path: Path,
+                format: str, palette: Optional[PaletteOptions] = None) -> Future:
+        return pool.submit(encode_shared, shared.shm.name, shared.mode, shared.size, str(path),
+                           format, palette, self.options.jpeg_quality)
+
+    def _overlay_panels(self, script_path: str) -> Dict[int, OverlayPanel]:
+        return {p.number: p for p in self.overlay.load_panel_data(script_path)}
+
+    def run(self, script_path: str, skip_existing: bool = True) -> Dict:
+        """Generate, overlay and encode every panel of a script."""
+        print(f"\n⚡ Fused pipeline: {script_path}")
+
+        script = self.generator.parse_script_file(script_path)
+        slug = script.slug.strip()
+        text = self._overlay_panels(script_path)
+        print(f"  Title: {script.title}")
+        print(f"  Slug: {slug}")
+
+        results = {"title": script.title, "slug": slug, "panels": [], "status": "success"}
+        pending: List[tuple] = []
+        fitted = False
+
+        with ProcessPoolExecutor(max_workers=self.options.workers) as pool:
+            for panel in script.panels:
+                print(f"\n  Panel {panel.number}:")
+                final_path = self.overlay.output_dir / f"comic-{slug}-panel{panel.number}-final.png"
+                if skip_existing and final_path.exists():
+                    print(f"    ⏭️  Skipping (already exists): {final_path}")
+                    results["panels"].append({"number": panel.number, "file": str(final_path),
+                                              "status": "skipped"})
+                    continue
+
+                prompt = self.generator.generate_panel_prompt(panel, script.title)
+                data = self.generator.generate_panel(prompt)
+                if not data:
+                    print(f"    ❌ Failed to generate panel {panel.number}")
+                    results["panels"].append({"number": panel.number, "file": None, "status": "failed"})
+                    results["status"] = "partial"
+                    continue
+
+                # The one and only decode
+                img = Image.open(BytesIO(data))
+                img.load()
+                if not fitted:
+                    # Same font size on every panel of the comic
+                    size = self.overlay.fit_comic(list(text.values()), *img.size)
+                    print(f"    🔤 Font size {size}px")
+                    fitted = True
+
+                futures = []
+                master_path = self.generator.output_dir / f"comic-{slug}-panel{panel.number}.png"
+                if "master" in self.options.keep and not self.options.palette:
+                    # Already encoded by the API - write the bytes as-is
+                    tmp_path = master_path.with_name(master_path.name + ".part")
+                    tmp_path.write_bytes(data)
+                    os.replace(tmp_path, master_path)
+
+                encode_master = "master" in self.options.keep and self.options.palette
+                if encode_master or "jpeg" in self.options.keep:
+                    # Snapshot the clean pixels before the overlay draws on them
+                    clean = SharedImage(img)
+                    if encode_master:
+                        futures.append(self._submit(pool, clean, master_path, "PNG", self.options.palette))
+                    if "jpeg" in self.options.keep:
+                        futures.append(self._submit(pool, clean, master_path.with_suffix(".jpg"), "JPEG"))
+
+                    # Free the block once every encoder reading it is done
+                    remaining = [len(futures)]
+
+                    def done(_future, shared=clean, remaining=remaining):
+                        remaining[0] -= 1
+                        if remaining[0] == 0:
+                            shared.release()
+
+                    for future in futures:
+                        future.add_done_callback(done)
+                del data
+
+                # Overlay draws on the decoded pixels in place
+                overlay_panel = text.get(panel.number)
+                if overlay_panel:
+                    self.overlay.render_panel(img, overlay_panel)
+                else:
+                    print(f"    ⚠️  No dialogue or caption for panel {panel.number} - final has no text")
+
+                final = SharedImage(img)
+                final_future = self._submit(pool, final, final_path, "PNG", self.options.palette)
+                final_future.add_done_callback(final.release)
+                del img
+
+                pending.append((panel.number, final_path, final_future, futures))
+                print(f"    🧵 Encoding in background → {final_path.name}")
+
+            # Next panel's generation overlapped with these encodes
+            for number, final_path, final_future, futures in pending:
+                try:
+                    size = final_future.result()
+                    for future in futures:
+                        future.result()
+                except Exception as e:
+                    print(f"    ❌ Panel {number} encode failed: {e}")
+                    results["panels"].append({"number": number, "file": None, "status": "failed"})
+                    results["status"] = "partial"
+                    continue
+                print(f"  ✅ Panel {number}: {final_path} ({size // 1024}KB)")
+                results["panels"].append({"number": number, "file": str(final_path), "status": "generated"})
+
+        results["panels"].sort(key=lambda p: p["number"])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate finished TR panels in one in-memory pass")
+    parser.add_argument("script", nargs="?", help="Path to comic script .md file")
+    parser.add_argument("--batch", action="store_true", help="Run all draft scripts")
+    parser.add_argument("--scripts-dir", default="scripts", help="Directory containing scripts")
+    parser.add_argument("--generated", default="comics/generated", help="Where kept masters go")
+    parser.add_argument("--output", default="comics/final", help="Final panel directory")
+    parser.add_argument("--keep", default="", help=f"Intermediates to persist: {','.join(INTERMEDIATES)}")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Image model")
+    parser.add_argument("--palette", action="store_true", help="Palette-encode PNG outputs")
+    parser.add_argument("--palette-colors", type=int, default=128, help="Starting palette size")
+    parser.add_argument("--workers", type=int, default=2, help="Encoder processes")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate existing finals")
+
+    args = parser.parse_args()
+
+    keep = {k.strip() for k in args.keep.split(",") if k.strip()}
+    unknown = keep - set(INTERMEDIATES)
+    if unknown:
+        parser.error(f"Unknown --keep value(s): {', '.join(sorted(unknown))}")
+
+    palette = PaletteOptions(colors=args.palette_colors) if args.palette else None
+    pipeline = FusedPipeline(
+        TRArtworkGenerator(output_dir=args.generated, model=args.model),
+        TextOverlayTool(output_dir=args.output),
+        FusedOptions(keep=keep, palette=palette, workers=args.workers)
+    )
+
+    if args.batch:
+        script_files = sorted(Path(args.scripts_dir).glob("comic-draft-*.md"))
+    elif args.script:
+        script_files = [Path(args.script)]
+    else:
+        parser.print_help()
+        return
+
+    for script_file in script_files:
+        results = pipeline.run(str(script_file), skip_existing=not args.regenerate)
+        done = sum(1 for p in results["panels"] if p["status"] == "generated")
+        print(f"\n✅ {results['slug']}: {done}/{len(results['panels'])} panels finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+TR Comic Image Backends
+Common submit/poll/fetch/cost interface over the OpenAI and MidAPI generators,
+plus a router that sends each panel to the fastest healthy backend (or races
+them under a deadline). Every backend writes the same
+comics/generated/comic-{slug}-panel{n}.png layout.
+"""
+
+import os
+import json
+import time
+import uuid
+import argparse
+from abc import ABC, abstractmethod
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass
+
+from tr_script_parser import parse_script
+
+# OpenAI list prices per 1024x1024 image (USD)
+OPENAI_COST = {
+    ("dall-e-3", "standard"): 0.04,
+    ("dall-e-3", "hd"): 0.08,
+    ("gpt-image-1", "hd"): 0.17,
+    ("gpt-image-1", "standard"): 0.04,
+}
+
+# Health tracking
+HEALTH_WINDOW = 20  # Most recent results kept per backend
+MIN_SUCCESS_RATE = 0.5
+MAX_CONSECUTIVE_FAILURES = 3
+COOLDOWN_SECONDS = 300
+
+
+@dataclass
+class PanelJob:
+    script_path: str
+    slug: str
+    title: str
+    number: int
+
+
+class ImageBackend(ABC):
+    """One image provider. Subclasses implement submit/poll/fetch/estimate_cost."""
+
+    name = "base"
+    default_latency = 60.0  # Seconds, used until we've seen real results
+
+    @abstractmethod
+    def submit(self, job: PanelJob) -> str:
+        """Start generating a panel and return a handle for poll/fetch."""
+
+    @abstractmethod
+    def poll(self, handle: str) -> str:
+        """Return "pending", "success" or "failed"."""
+
+    @abstractmethod
+    def fetch(self, handle: str, filepath: Path) -> bool:
+        """Write the finished image to filepath (via a temp file and rename)."""
+
+    @abstractmethod
+    def estimate_cost(self) -> float:
+        """Estimated USD per panel."""
+
+    def cancel(self, handle: str):
+        """Stop waiting for a handle (e.g. it lost a race). The default does nothing."""
+
+    def close(self):
+        """Release threads or connections. The default does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class OpenAIBackend(ImageBackend):
+    name = "openai"
+    default_latency = 30.0
+
+    def __init__(self, generator, size: str = "1024x1024", quality: str = "hd", workers: int = 2):
+        """Wrap a TRArtworkGenerator. The Images API call is blocking, so it runs in a thread."""
+        self.generator = generator
+        self.size = size
+        self.quality = quality
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._futures = {}
+        self._scripts = {}
+
+    def _script(self, script_path: str):
+        if script_path not in self._scripts:
+            self._scripts[script_path] = self.generator.parse_script_file(script_path)
+        return self._scripts[script_path]
+
+    def submit(self, job: PanelJob) -> str:
+        script = self._script(job.script_path)
+        panel = next(p for p in script.panels if p.number == job.number)
+        prompt = self.generator.generate_panel_prompt(panel, script.title)
+        handle = f"{self.name}-{uuid.uuid4().hex[:12]}"
+        self._futures[handle] = self._pool.submit(
+            self.generator.request_images, prompt, self.size, self.quality, 1, 1
+        )
+        return handle
+
+    def poll(self, handle: str) -> str:
+        future = self._futures[handle]
+        if not future.done():
+            return "pending"
+        if future.exception() or not future.result():
+            return "failed"
+        return "success"
+
+    def fetch(self, handle: str, filepath: Path) -> bool:
+        from tr_image_scan import IMAGE_EXTENSIONS, conform_to_format
+
+        item = self._futures.pop(handle).result()[0]
+        # Temp name + rename so a failed write never leaves a partial panel
+        part_path = filepath.with_name(filepath.name + ".part")
+        try:
+            with open(part_path, 'wb') as f:
+                self.generator.write_image(item, f)
+            conform_to_format(part_path, IMAGE_EXTENSIONS.get(filepath.suffix.lower()))
+            os.replace(part_path, filepath)
+            return True
+        except Exception as e:
+            print(f"  [{self.name}] Fetch error: {e}")
+            part_path.unlink(missing_ok=True)
+            return False
+
+    def estimate_cost(self) -> float:
+        return OPENAI_COST.get((self.generator.model, self.quality), 0.08)
+
+    def cancel(self, handle: str):
+        # Only a request still queued can be cancelled; a running one finishes unread
+        future = self._futures.pop(handle, None)
+        if future:
+            future.cancel()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
+
+
+class MidAPIBackend(ImageBackend):
+    name = "midapi"
+    default_latency = 60.0
+
+    def __init__(self, generator, speed: str = "fast", version: str = "7"):
+        """Wrap a MidAPIGenerator."""
+        from tr_speed_scheduler import load_tier_stats
+
+        self.generator = generator
+        self.speed = speed
+        self.version = version
+        self._tier = load_tier_stats(generator.run_log)[speed]
+        self.default_latency = self._tier.p50
+        self._tasks = {}  # task_id -> (submitted_at, image_url)
+        self._scripts = {}
+
+    def _script(self, script_path: str):
+        if script_path not in self._scripts:
+            self._scripts[script_path] = self.generator.parse_script_file(script_path)
+        return self._scripts[script_path]
+
+    def submit(self, job: PanelJob) -> str:
+        script = self._script(job.script_path)
+        panel = next(p for p in script.panels if p.number == job.number)
+        payload = self.generator.build_payload(panel, script.title, self.version, self.speed)
+        task_id = self.generator.submit_task(payload)
+        if not task_id:
+            raise RuntimeError("MidAPI rejected the task")
+        self._tasks[task_id] = (time.time(), None)
+        return task_id
+
+    def poll(self, handle: str) -> str:
+        from tr_speed_scheduler import record_run
+
+        submitted_at, _ = self._tasks[handle]
+        state, image_url = self.generator.check_task(handle)
+        if state == "success":
+            self._tasks[handle] = (submitted_at, image_url)
+            record_run(self.generator.run_log, self.speed, time.time() - submitted_at,
+                       success=True, task_id=handle)
+            return "success"
+        if state == "failed":
+            record_run(self.generator.run_log, self.speed, time.time() - submitted_at,
+                       success=False, task_id=handle)
+            return "failed"
+        return "pending"
+
+    def fetch(self, handle: str, filepath: Path) -> bool:
+        # download_image writes a .part file and renames it
+        _, image_url = self._tasks.pop(handle)
+        return self.generator.download_image(image_url, filepath)
+
+    def estimate_cost(self) -> float:
+        return self._tier.cost
+
+    def cancel(self, handle: str):
+        from tr_speed_scheduler import record_run
+
+        # MidAPI has no cancel endpoint; the task finishes unread. Still pending
+        # when abandoned, so the run is censored rather than a failure.
+        submitted_at, _ = self._tasks.pop(handle, (None, None))
+        if submitted_at is not None:
+            record_run(self.generator.run_log, self.speed, time.time() - submitted_at,
+                       success=None, task_id=handle, censored=True)
+
+
+class BackendHealth:
+    """Rolling success rate and latency for one backend."""
+
+    def __init__(self, default_latency: float):
+        self.results = deque(maxlen=HEALTH_WINDOW)  # (success, seconds)
+        self.default_latency = default_latency
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record(self, success: bool, seconds: float):
+        self.results.append((success, seconds))
+        if success:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                # Circuit breaker - stop sending work for a while
+                self.cooldown_until = time.time() + COOLDOWN_SECONDS
+
+    @property
+    def success_rate(self) -> float:
+        if not self.results:
+            return 1.0
+        return sum(1 for ok, _ in self.results if ok) / len(self.results)
+
+    @property
+    def latency(self) -> float:
+        """Median latency of recent successes."""
+        times = sorted(t for ok, t in self.results if ok)
+        return times[len(times) // 2] if times else self.default_latency
+
+    @property
+    def healthy(self) -> bool:
+        if time.time() < self.cooldown_until:
+            return False
+        return len(self.results) < 3 or self.success_rate >= MIN_SUCCESS_RATE
+
+
+class BackendRouter:
+    def __init__(self, backends: List[ImageBackend], output_dir: str = "comics/generated",
+                 max_wait: int = 300, poll_interval: int = 5):
+        self.backends = backends
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.health = {b.name: BackendHealth(b.default_latency) for b in backends}
+        self.spent = 0.0
+
+    @staticmethod
+    def panel_jobs(script_path: str) -> List[PanelJob]:
+        """Panel jobs for a script, from the parser every generator shares."""
+        script = parse_script(script_path)
+        return [PanelJob(script_path, script.slug, script.title, p.number) for p in script.panels]
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ranked_backends(self) -> List[ImageBackend]:
+        """Healthy backends, fastest first. Falls back to all if none are healthy."""
+        healthy = [b for b in self.backends if self.health[b.name].healthy]
+        # Expected time to a good image: latency inflated by the failure rate
+        return sorted(healthy or self.backends,
+                      key=lambda b: self.health[b.name].latency / max(self.health[b.name].success_rate, 0.1))
+
+    def _run(self, job: PanelJob, backends: List[ImageBackend], filepath: Path) -> Optional[str]:
+        """Submit to every given backend, keep the first success. Returns its name."""
+        in_flight: Dict[str, Tuple[ImageBackend, float]] = {}
+        for backend in backends:
+            try:
+                handle = backend.submit(job)
+            except Exception as e:
+                print(f"    [{backend.name}] Submit error: {e}")
+                self.health[backend.name].record(False, 0.0)
+                continue
+            in_flight[handle] = (backend, time.time())
+            self.spent += backend.estimate_cost()
+
+        start_time = time.time()
+        while in_flight and time.time() - start_time < self.max_wait:
+            for handle, (backend, submitted_at) in list(in_flight.items()):
+                try:
+                    state = backend.poll(handle)
+                except Exception as e:
+                    print(f"    [{backend.name}] Poll error: {e}")
+                    continue
+                if state == "pending":
+                    continue
+
+                del in_flight[handle]
+                elapsed = time.time() - submitted_at
+                if state == "success" and backend.fetch(handle, filepath):
+                    self.health[backend.name].record(True, elapsed)
+                    for loser, (other, _) in in_flight.items():
+                        other.cancel(loser)
+                    return backend.name
+                self.health[backend.name].record(False, elapsed)
+
+            if in_flight:
+                time.sleep(self.poll_interval)
+
+        for handle, (backend, submitted_at) in in_flight.items():
+            self.health[backend.name].record(False, time.time() - submitted_at)
+            backend.cancel(handle)
+        return None
+
+    def generate_panel(self, job: PanelJob, race: bool = False) -> Dict:
+        """Generate one panel, failing over to the next backend on error."""
+        filepath = self.output_dir / f"comic-{job.slug}-panel{job.number}.png"
+        ranked = self.ranked_backends()
+
+        if race and len(ranked) > 1:
+            print(f"    🏁 Racing {', '.join(b.name for b in ranked)}")
+            winner = self._run(job, ranked, filepath)
+        else:
+            winner = None
+            for backend in ranked:
+                print(f"    → {backend.name}")
+                winner = self._run(job, [backend], filepath)
+                if winner:
+                    break
+                print(f"    ⚠️  {backend.name} failed, trying next backend")
+
+        if winner:
+            print(f"    ✅ Saved: {filepath} ({winner})")
+            return {"number": job.number, "file": str(filepath), "backend": winner, "status": "generated"}
+        print(f"    ❌ Failed to generate panel {job.number}")
+        return {"number": job.number, "file": None, "backend": None, "status": "failed"}
+
+    def generate_comic(self, script_path: str, deadline_seconds: Optional[float] = None,
+                       skip_existing: bool = True) -> Dict:
+        """Generate all panels for a comic through the router.
+
+        With a deadline, panels are raced across backends whenever the fastest
+        one's typical latency no longer fits in the remaining time per panel.
+        """
+        print(f"\n🎨 Processing: {script_path}")
+        jobs = self.panel_jobs(script_path)
+        start_time = time.time()
+
+        results = {"script": script_path, "panels": [], "status": "success"}
+        for i, job in enumerate(jobs):
+            print(f"\n  Panel {job.number}:")
+            filepath = self.output_dir / f"comic-{job.slug}-panel{job.number}.png"
+            if skip_existing and filepath.exists():
+                print(f"    ⏭️  Skipping (already exists): {filepath}")
+                results["panels"].append({"number": job.number, "file": str(filepath), "status": "skipped"})
+                continue
+
+            race = False
+            if deadline_seconds is not None:
+                remaining = deadline_seconds - (time.time() - start_time)
+                per_panel = remaining / (len(jobs) - i)
+                fastest = self.ranked_backends()[0]
+                race = self.health[fastest.name].latency > per_panel
+
+            panel_result = self.generate_panel(job, race=race)
+            results["panels"].append(panel_result)
+            if panel_result["status"] == "failed":
+                results["status"] = "partial"
+
+        results["slug"] = jobs[0].slug if jobs else None
+        return results
+
+    def print_health(self):
+        print("\n📡 Backends:")
+        for backend in self.backends:
+            h = self.health[backend.name]
+            state = "healthy" if h.healthy else "unhealthy"
+            print(f"  {backend.name:<7} {state:<9} success {h.success_rate:.0%}  "
+                  f"latency ~{h.latency:.0f}s  ${backend.estimate_cost():.3f}/panel")
+        print(f"  Estimated spend: ${self.spent:.2f}")
+
+
+def build_backends(names: List[str], output_dir: str, speed: str = "fast") -> List[ImageBackend]:
+    """Instantiate the named backends, skipping any that can't be configured."""
+    backends = []
+    for name in names:
+        try:
+            if name == "openai":
+                from tr_artwork_generator import TRArtworkGenerator
+                backends.append(OpenAIBackend(TRArtworkGenerator(output_dir=output_dir)))
+            elif name == "midapi":
+                from tr_midapi_generator import MidAPIGenerator
+                backends.append(MidAPIBackend(MidAPIGenerator(output_dir=output_dir), speed=speed))
+            else:
+                print(f"⚠️  Unknown backend: {name}")
+        except Exception as e:
+            print(f"⚠️  Skipping {name}: {e}")
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate TR comics across image backends")
+    parser.add_argument("script", nargs="?", help="Path to comic script .md file")
+    parser.add_argument("--batch", action="store_true", help="Generate all draft scripts")
+    parser.add_argument("--scripts-dir", default="scripts", help="Directory containing scripts")
+    parser.add_argument("--output", default="comics/generated", help="Output directory")
+    parser.add_argument("--backends", default="openai,midapi", help="Comma-separated backends, in preference order")
+    parser.add_argument("--speed", default="fast", choices=["relaxed", "fast", "turbo"], help="MidAPI speed")
+    parser.add_argument("--deadline-minutes", type=float, help="Race backends when a comic risks missing this")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate existing panels")
+
+    args = parser.parse_args()
+
+    backends = build_backends(args.backends.split(","), args.output, args.speed)
+    if not backends:
+        print("❌ No backends available (check OPENAI_API_KEY / MIDAPI_KEY)")
+        return
+
+    router = BackendRouter(backends, output_dir=args.output)
+    deadline = args.deadline_minutes * 60 if args.deadline_minutes else None
+
+    if args.batch:
+        script_files = sorted(Path(args.scripts_dir).glob("comic-draft-*.md"))
+    elif args.script:
+        script_files = [Path(args.script)]
+    else:
+        parser.print_help()
+        print("\n💡 Examples:")
+        print("  python tr_image_backends.py scripts/comic-draft-test.md")
+        print("  python tr_image_backends.py --batch --backends midapi,openai --deadline-minutes 20")
+        return
+
+    with router:
+        for script_file in script_files:
+            results = router.generate_comic(str(script_file), deadline_seconds=deadline,
+                                            skip_existing=not args.regenerate)
+            print(f"\nResults: {json.dumps(results, indent=2)}")
+
+        router.print_health()
+
+
+if __name__ == "__main__":
+    main()
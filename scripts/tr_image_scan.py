@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+TR Image Integrity Scanner
+Checks every panel image for the problems that otherwise only show up as a
+broken page: format bytes that don't match the extension (e.g. JPEG data from
+a provider saved as .png), truncated downloads, unreadable headers, and
+dimensions/color modes that don't fit the directory.
+
+Results are cached by size + mtime, so rescans only read files that changed.
+--repair re-encodes fixable files in place; broken ones are moved to
+{root}/.quarantine/ so the generators regenerate them on the next run.
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field, asdict
+from PIL import Image
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_ROOTS = [str(SCRIPT_DIR / "comics"), str(SCRIPT_DIR.parent / "comics" / "published")]
+DEFAULT_CACHE = str(SCRIPT_DIR / ".image-scan-cache.json")
+QUARANTINE_DIR = ".quarantine"
+
+IMAGE_EXTENSIONS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".webp": "WEBP", ".gif": "GIF"}
+
+# Bytes from the end of the file to search for an end marker (encoders may pad)
+TAIL_BYTES = 64
+
+# Bump when checks change so cached results are re-evaluated
+SCAN_VERSION = 1
+
+
+@dataclass
+class Expectation:
+    formats: Optional[Set[str]] = None  # None = whatever the extension says
+    modes: Set[str] = field(default_factory=lambda: {"RGB", "RGBA", "P", "L"})
+    min_edge: int = 1
+
+
+# Keyed by directory name anywhere in the path; the deepest match wins
+EXPECTATIONS: Dict[str, Optional[Expectation]] = {
+    "published": Expectation(formats={"JPEG"}, modes={"RGB"}, min_edge=512),
+    "generated": Expectation(modes={"RGB", "RGBA", "P"}, min_edge=512),
+    "final": Expectation(modes={"RGB", "RGBA", "P"}, min_edge=512),
+    "drafts": Expectation(modes={"RGB", "RGBA", "P"}, min_edge=256),
+    "Crap": None,  # Rejects - not worth checking
+}
+
+
+@dataclass
+class ScanResult:
+    path: str
+    size: int
+    mtime_ns: int
+    format: str = ""
+    width: int = 0
+    height: int = 0
+    mode: str = ""
+    issues: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+
+def sniff_format(head: bytes) -> str:
+    """Image format from magic bytes ("" if unknown)."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "GIF"
+    return ""
+
+
+def is_truncated(format: str, head: bytes, tail: bytes, size: int) -> bool:
+    """Cheap end-of-stream check without decoding."""
+    if format == "PNG":
+        return b"IEND" not in tail
+    if format == "JPEG":
+        return b"\xff\xd9" not in tail
+    if format == "WEBP":
+        return int.from_bytes(head[4:8], "little") + 8 > size
+    if format == "GIF":
+        return not tail.rstrip(b"\x00").endswith(b"\x3b")
+    return False
+
+
+def expectation_for(path: Path) -> Optional[Expectation]:
+    expectation = Expectation()
+    for part in path.parts[:-1]:
+        if part in EXPECTATIONS:
+            expectation = EXPECTATIONS[part]
+    return expectation
+
+
+def scan_file(path: str, deep: bool = False) -> ScanResult:
+    """Check one file: magic vs extension, truncation, header, dimensions and mode."""
+    file_path = Path(path)
+    stat = file_path.stat()
+    result = ScanResult(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    if stat.st_size == 0:
+        result.issues.append("empty")
+        return result
+
+    with open(file_path, 'rb') as f:
+        head = f.read(32)
+        f.seek(max(0, stat.st_size - TAIL_BYTES))
+        tail = f.read()
+
+    result.format = sniff_format(head)
+    if not result.format:
+        result.issues.append("unknown_format")
+        return result
+
+    expected = IMAGE_EXTENSIONS.get(file_path.suffix.lower())
+    if expected and expected != result.format:
+        result.issues.append(f"extension_mismatch:{result.format}")
+
+    if is_truncated(result.format, head, tail, stat.st_size):
+        result.issues.append("truncated")
+
+    try:
+        # Header only - Pillow doesn't decode pixels until load()
+        with Image.open(file_path) as img:
+            result.width, result.height, result.mode = img.width, img.height, img.mode
+            if deep:
+                img.load()
+    except Exception as e:
+        result.issues.append(f"unreadable:{type(e).__name__}")
+        return result
+
+    rules = expectation_for(file_path)
+    if rules:
+        if rules.formats and result.format not in rules.formats:
+            result.issues.append(f"format:{result.format}")
+        if result.mode not in rules.modes:
+            result.issues.append(f"mode:{result.mode}")
+        if min(result.width, result.height) < rules.min_edge:
+            result.issues.append(f"too_small:{result.width}x{result.height}")
+    return result
+
+
+def conform_to_format(path: Path, target: Optional[str]) -> bool:
+    """Re-encode path in place if its bytes aren't in target format (e.g. "JPEG").
+
+    Used by the generators on freshly written files. Returns True if rewritten.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(32)
+    if not target or sniff_format(head) == target:
+        return False
+    with Image.open(path) as img:
+        img.load()
+        if target == "JPEG":
+            # JPEG can't hold alpha or palettes
+            img = img.convert("RGB")
+        tmp_path = path.with_name(path.name + ".tmp")
+        img.save(tmp_path, target, **({"quality": 90} if target == "JPEG" else {}))
+    os.replace(tmp_path, path)
+    return True
+
+
+def _fixable(issue: str) -> bool:
+    return issue.startswith(("extension_mismatch", "format:", "mode:"))
+
+
+def repair_file(result: ScanResult) -> bool:
+    """Re-encode in place to the extension's format and an allowed mode.
+
+    Only for intact files (no truncation or decode errors).
+    """
+    path = Path(result.path)
+    rules = expectation_for(path) or Expectation()
+    target = IMAGE_EXTENSIONS.get(path.suffix.lower(), result.format)
+
+    with Image.open(path) as img:
+        img.load()
+        if target == "JPEG" or img.mode not in rules.modes:
+            # JPEG can't hold alpha or palettes
+            img = img.convert("RGB")
+        tmp_path = path.with_name(path.name + ".tmp")
+        if target == "JPEG":
+            img.save(tmp_path, "JPEG", quality=90)
+        else:
+            img.save(tmp_path, target)
+    os.replace(tmp_path, path)
+    return True
+
+
+def quarantine_file(path: str, root: str) -> Path:
+    """Move a broken file under {root}/.quarantine/, keeping its relative path."""
+    source = Path(path)
+    destination = Path(root) / QUARANTINE_DIR / source.relative_to(root)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, destination)
+    return destination
+
+
+class ImageScanner:
+    def __init__(self, cache_path: str = DEFAULT_CACHE, workers: int = 0, deep: bool = False):
+        self.cache_path = Path(cache_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.deep = deep
+        self.cache = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except ValueError:
+            return {}
+        if data.get("version") != SCAN_VERSION or data.get("deep") != self.deep:
+            return {}
+        return data.get("files", {})
+
+    def _save_cache(self):
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": SCAN_VERSION, "deep": self.deep, "files": self.cache}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def find_images(roots: List[str]) -> List[tuple]:
+        """(root, path) for every image, skipping hidden dirs and rejects."""
+        found = []
+        for root in roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = sorted(d for d in dirnames
+                                     if not d.startswith(".") and EXPECTATIONS.get(d, True) is not None)
+                for name in sorted(filenames):
+                    if Path(name).suffix.lower() in IMAGE_EXTENSIONS:
+                        found.append((root, os.path.join(dirpath, name)))
+        return found
+
+    def scan(self, roots: List[str]) -> List[ScanResult]:
+        images = self.find_images(roots)
+        results: Dict[str, ScanResult] = {}
+        to_scan = []
+        for _, path in images:
+            stat = os.stat(path)
+            cached = self.cache.get(path)
+            if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                results[path] = ScanResult(**cached)
+            else:
+                to_scan.append(path)
+
+        print(f"\n🔍 Scanning {len(images)} images ({len(images) - len(to_scan)} cached, "
+              f"{len(to_scan)} to check)")
+        if to_scan:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for path, result in zip(to_scan, pool.map(scan_file, to_scan, [self.deep] * len(to_scan),
+                                                          chunksize=16)):
+                    results[path] = result
+
+        # Drop cache entries for files that no longer exist
+        self.cache = {path: asdict(result) for path, result in results.items()}
+        self._save_cache()
+        return [results[path] for _, path in images]
+
+    def fix(self, results: List[ScanResult], roots: List[str], repair: bool, quarantine: bool) -> Dict:
+        root_of = {path: root for root, path in self.find_images(roots)}
+        counts = {"repaired": 0, "quarantined": 0}
+        for result in results:
+            if result.ok:
+                continue
+            if all(_fixable(issue) for issue in result.issues):
+                if not repair:
+                    continue
+                try:
+                    repair_file(result)
+                except Exception as e:
+                    print(f"  ❌ Repair failed for {result.path}: {e}")
+                    continue
+                rescanned = scan_file(result.path, self.deep)
+                self.cache[result.path] = asdict(rescanned)
+                counts["repaired"] += 1
+                status = "✅ repaired" if rescanned.ok else f"⚠️  still {', '.join(rescanned.issues)}"
+                print(f"  🔧 {result.path}: {status}")
+            elif quarantine and not all(i.startswith("too_small") for i in result.issues):
+                destination = quarantine_file(result.path, root_of[result.path])
+                self.cache.pop(result.path, None)
+                counts["quarantined"] += 1
+                print(f"  🚧 {result.path} → {destination}")
+        self._save_cache()
+        return counts
+
+    @staticmethod
+    def print_report(results: List[ScanResult]):
+        bad = [r for r in results if not r.ok]
+        for result in bad:
+            print(f"  ❌ {result.path}: {', '.join(result.issues)}")
+        print(f"\n📊 {len(results) - len(bad)}/{len(results)} images OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check TR panel images for format and integrity problems")
+    parser.add_argument("paths", nargs="*", help="Directories to scan (default: scripts/comics and comics/published)")
+    parser.add_argument("--deep", action="store_true", help="Fully decode every image (slower)")
+    parser.add_argument("--repair", action="store_true",
+                        help="Re-encode files whose format or mode is wrong but whose data is intact")
+    parser.add_argument("--quarantine", action="store_true",
+                        help="Move truncated/unreadable files to {root}/.quarantine/")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Scan cache file")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    args = parser.parse_args()
+
+    roots = [p for p in (args.paths or DEFAULT_ROOTS) if os.path.isdir(p)]
+    if not roots:
+        print("No directories to scan")
+        return
+
+    scanner = ImageScanner(cache_path=args.cache, workers=args.workers, deep=args.deep)
+    results = scanner.scan(roots)
+
+    if args.json:
+        print(json.dumps([asdict(r) for r in results if not r.ok], indent=2))
+    else:
+        scanner.print_report(results)
+
+    if args.repair or args.quarantine:
+        counts = scanner.fix(results, roots, repair=args.repair, quarantine=args.quarantine)
+        print(f"\n🛠️  Repaired {counts['repaired']}, quarantined {counts['quarantined']}")
+
+
+if __name__ == "__main__":
+    main()
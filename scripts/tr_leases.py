@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+TR Panel Leases
+Lets several workers (on one or many machines) split a batch over shared
+storage without a coordinator. A worker claims a panel by atomically
+creating {output_dir}/.leases/{key}.lease, renews it from a heartbeat
+thread while generating, and deletes it when done. A lease that hasn't
+been renewed within its TTL belongs to a crashed worker and can be stolen.
+
+Lease ages are measured against the filesystem's own clock (the mtime of a
+probe file this worker just wrote), not time.time(), so workers with skewed
+clocks still agree on when a lease expired.
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from dataclasses import dataclass, asdict
+
+LEASES_SUBDIR = ".leases"
+DEFAULT_TTL = 600  # Seconds without a heartbeat before a lease can be stolen
+DEFAULT_HEARTBEAT = 60
+
+
+@dataclass
+class Lease:
+    key: str
+    worker: str
+    acquired: float
+    renewed: float
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def panel_key(slug: str, panel_number: int) -> str:
+    return f"comic-{slug}-panel{panel_number}"
+
+
+class LeaseManager:
+    def __init__(self, output_dir: str, worker_id: Optional[str] = None,
+                 ttl: float = DEFAULT_TTL, heartbeat: float = DEFAULT_HEARTBEAT):
+        self.lease_dir = Path(output_dir) / LEASES_SUBDIR
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+
+        self._held: Dict[str, Lease] = {}
+        self._lost: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, key: str) -> Path:
+        return self.lease_dir / f"{key}.lease"
+
+    def read(self, key: str) -> Optional[Lease]:
+        return self.read_file(self._path(key))
+
+    def filesystem_now(self) -> float:
+        """Current time by the clock that stamps lease mtimes.
+
+        Touches a per-worker probe file and reads its mtime back. On NFS/SMB
+        the server sets mtimes, so this is the server's clock rather than
+        ours; locally it is the same clock as time.time().
+        """
+        probe = self.lease_dir / f".clock-{self.worker_id}"
+        with open(probe, 'w'):
+            pass
+        return probe.stat().st_mtime
+
+    def age(self, path: Path, now: Optional[float] = None) -> Optional[float]:
+        """Seconds since the lease file was last renewed; None if it's gone."""
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        return (self.filesystem_now() if now is None else now) - mtime
+
+    def _expired(self, path: Path) -> bool:
+        # Both timestamps come from the filesystem's clock, never ours
+        age = self.age(path)
+        return age is not None and age > self.ttl
+
+    def _create(self, key: str) -> bool:
+        """Atomically create the lease file. False if it already exists."""
+        try:
+            fd = os.open(self._path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        now = time.time()
+        lease = Lease(key=key, worker=self.worker_id, acquired=now, renewed=now)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(asdict(lease), f)
+        with self._lock:
+            self._held[key] = lease
+            self._lost.discard(key)
+        return True
+
+    def acquire(self, key: str) -> bool:
+        """Claim key, stealing it if its holder stopped heartbeating."""
+        with self._lock:
+            if key in self._held:
+                return True
+        if self._create(key):
+            self._start_heartbeat()
+            return True
+
+        path = self._path(key)
+        if not self._expired(path):
+            return False
+
+        # Only one stealer can win the rename; the rest see FileNotFoundError
+        stale = path.with_name(f"{path.name}.stale-{self.worker_id}")
+        try:
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return False
+        # Another stealer may have replaced the expired lease between our
+        # check and the rename; then we just moved its fresh lease aside
+        age = self.age(stale)
+        if age is not None and age <= self.ttl:
+            try:
+                os.link(stale, path)  # Put it back, unless someone created one since
+            except FileExistsError:
+                pass
+            stale.unlink()
+            return False
+        previous = self.read_file(stale)
+        stale.unlink()
+        # A holder renewing at this moment recreates the file first and wins
+        if self._create(key):
+            print(f"  ♻️  Took over {key} from {previous.worker if previous else 'unknown worker'}")
+            self._start_heartbeat()
+            return True
+        return False
+
+    @staticmethod
+    def read_file(path: Path) -> Optional[Lease]:
+        try:
+            with open(path, 'r') as f:
+                return Lease(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def still_held(self, key: str) -> bool:
+        """False if another worker stole the lease (e.g. we stalled past the TTL).
+
+        Check this right before writing a panel's final file.
+        """
+        if key in self._lost:
+            return False
+        lease = self.read(key)
+        return lease is not None and lease.worker == self.worker_id
+
+    def release(self, key: str):
+        # Under the lock so a concurrent renew() can't recreate the file
+        with self._lock:
+            self._held.pop(key, None)
+            self._lost.discard(key)
+            lease = self.read(key)
+            if lease and lease.worker == self.worker_id:
+                try:
+                    self._path(key).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def renew(self):
+        """Refresh every held lease; drop ones another worker has taken.
+
+        Holds the lock across each check-and-write, so a lease released
+        meanwhile is skipped rather than written back.
+        """
+        with self._lock:
+            keys = list(self._held)
+        for key in keys:
+            with self._lock:
+                lease = self._held.get(key)
+                if lease is None:
+                    continue  # Released since we listed it
+                current = self.read(key)
+                if not current or current.worker != self.worker_id:
+                    print(f"  ⚠️  Lost lease {key}")
+                    self._held.pop(key, None)
+                    self._lost.add(key)
+                    continue
+                lease.renewed = time.time()
+                path = self._path(key)
+                tmp_path = path.with_name(f"{path.name}.{self.worker_id}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump(asdict(lease), f)
+                os.replace(tmp_path, path)
+
+    def _start_heartbeat(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._thread.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat):
+            try:
+                self.renew()
+            except OSError as e:
+                print(f"  ⚠️  Lease heartbeat failed: {e}")
+
+    def close(self):
+        """Stop heartbeating and release everything still held."""
+        self._stop.set()
+        if self._thread:
+            # A renew() in flight finishes before we delete the files
+            self._thread.join()
+            self._thread = None
+        for key in list(self._held):
+            self.release(key)
+        (self.lease_dir / f".clock-{self.worker_id}").unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def active(self) -> List[Lease]:
+        leases = []
+        for path in sorted(self.lease_dir.glob("*.lease")):
+            lease = self.read_file(path)
+            if lease:
+                leases.append(lease)
+        return leases
+
+
+def run_until_drained(run_pass: Callable[[], List[Dict]], poll: float = DEFAULT_HEARTBEAT) -> List[Dict]:
+    """Repeat a batch pass while other workers hold leases on some of its panels.
+
+    Panels whose holder finishes are skipped as existing on the next pass;
+    panels whose holder crashed are stolen once the lease expires. Results
+    from later passes replace earlier "leased" panel entries.
+    """
+    merged: Dict[str, Dict] = {}
+    while True:
+        waiting = 0
+        for result in run_pass():
+            previous = merged.get(result["slug"])
+            if previous:
+                done = {p["number"]: p for p in previous["panels"] if p["status"] != "leased"}
+                for panel in result["panels"]:
+                    done.setdefault(panel["number"], panel)
+                result["panels"] = sorted(done.values(), key=lambda p: p["number"])
+            merged[result["slug"]] = result
+            waiting += sum(1 for p in result["panels"] if p["status"] == "leased")
+        if not waiting:
+            return list(merged.values())
+        print(f"\n⏳ {waiting} panels leased by other workers, rechecking in {poll:.0f}s...")
+        time.sleep(poll)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect TR panel leases")
+    parser.add_argument("action", choices=["list", "clear-expired"])
+    parser.add_argument("--output", default="comics/generated", help="Generator output directory")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Lease TTL in seconds")
+
+    args = parser.parse_args()
+    manager = LeaseManager(args.output, ttl=args.ttl)
+
+    leases = manager.active()
+    if not leases:
+        print("No active leases")
+        return
+
+    with manager:  # Removes the clock probe file
+        now = manager.filesystem_now()
+    for lease in leases:
+        path = manager._path(lease.key)
+        age = manager.age(path, now) or 0
+        expired = age > args.ttl
+        if args.action == "clear-expired" and expired:
+            path.unlink()
+            print(f"  🗑️  {lease.key} ({lease.worker}, {age:.0f}s since heartbeat)")
+        elif args.action == "list":
+            state = "expired" if expired else "live"
+            print(f"  {'💀' if expired else '🔒'} {lease.key:<45} {lease.worker:<30} "
+                  f"{state}, {age:.0f}s since heartbeat")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,35 @@ Correct API endpoints and parameters
 """
 
 import os
-import re
 import json
 import time
 import argparse
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Tuple
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
+from tr_speed_scheduler import SpeedScheduler, TierStats, record_run, load_tier_stats, DEFAULT_DB_PATH
+from tr_leases import LeaseManager, DEFAULT_TTL, panel_key, run_until_drained
+from tr_image_scan import IMAGE_EXTENSIONS, sniff_format, is_truncated, conform_to_format, TAIL_BYTES
+from tr_script_parser import parse_script
+from tr_drafts import (DraftManifest, DraftPanel, draft_dir, draft_filename,
+                       load_manifest, save_manifest, set_status, parse_panel_list)
+
 # Default settings
 DEFAULT_VERSION = "7"
 DEFAULT_ASPECT_RATIO = "1:1"
 DEFAULT_SPEED = "fast"  # relaxed, fast, turbo
 
+# Drafts use the cheap queue; relaxed jobs can sit for a while before starting
+DRAFT_SPEED = "relaxed"
+DRAFT_MAX_WAIT = 900
+
+# Hedge no later than this fraction of max_wait, so the duplicate has time to finish
+HEDGE_DEADLINE_FRACTION = 0.5
+
 
 @dataclass
 class ComicPanel:
@@ -39,16 +54,33 @@ class ComicScript:
     caption: str = ""
 
 
+@dataclass
+class HedgeStats:
+    hedges: int = 0  # Duplicate tasks submitted
+    wins: int = 0  # Times the duplicate finished first
+    spent: float = 0.0  # Extra spend on duplicates (USD, estimated)
+
+
 class MidAPIGenerator:
     def __init__(self, api_key: Optional[str] = None, 
                  tr_reference_url: Optional[str] = None,
-                 output_dir: str = "comics/generated"):
-        """Initialize MidAPI.ai generator."""
+                 output_dir: str = "comics/generated",
+                 hedge_budget: float = 0.0):
+        """Initialize MidAPI.ai generator.
+        
+        hedge_budget caps extra spend (USD) on duplicate tasks for slow
+        generations; 0 disables hedging.
+        """
         self.api_key = api_key or os.getenv("MIDAPI_KEY")
         self.tr_reference_url = tr_reference_url or os.getenv("TR_REFERENCE_URL")
         self.base_url = "https://api.midapi.ai/api/v1/mj"
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Per-task latency/cost history, read by tr_speed_scheduler.py
+        self.run_log = str(self.output_dir / ".midapi-runs.jsonl")
+        self.hedge_budget = hedge_budget
+        self.hedge_stats = HedgeStats()
+        self._hedge_lock = threading.Lock()  # Drafts poll from several threads
         
         if not self.api_key:
             raise ValueError("MidAPI key required. Set MIDAPI_KEY env var.")
@@ -58,57 +90,15 @@ class MidAPIGenerator:
             "Content-Type": "application/json"
         }
     
-    def parse_script_file(self, script_path: str) -> ComicScript:
+    @staticmethod
+    def parse_script_file(script_path: str) -> ComicScript:
         """Parse a comic script markdown file."""
-        with open(script_path, 'r') as f:
-            content = f.read()
-        
-        # Extract title
-        title_match = re.search(r'\*\*Title:\*\* (.+)', content)
-        title = title_match.group(1) if title_match else "Untitled"
-        
-        # Extract slug
-        slug_match = re.search(r'\*\*Slug:\*\* (.+)', content)
-        slug = slug_match.group(1) if slug_match else self._slugify(title)
-        
-        # Extract location
-        location_match = re.search(r'\*\*Location:\*\* (.+)', content)
-        location = location_match.group(1) if location_match else "Unknown"
-        
-        # Parse panels
-        panels = []
-        panel_sections = re.split(r'### Panel \d+:', content)[1:]
-        
-        for i, section in enumerate(panel_sections, 1):
-            panel = self._parse_panel(i, section)
-            if panel:
-                panels.append(panel)
-        
-        return ComicScript(title=title, slug=slug, location=location, panels=panels)
-    
-    def _parse_panel(self, number: int, section: str) -> Optional[ComicPanel]:
-        """Parse a single panel section."""
-        lines = section.strip().split('\n')
-        panel_title = lines[0].strip() if lines else f"Panel {number}"
-        
-        # Extract scene
-        scene_match = re.search(r'\*\*Scene:\*\* (.+?)(?=\*\*|$)', section, re.DOTALL)
-        scene = scene_match.group(1).strip() if scene_match else ""
-        
-        # Extract caption
-        caption_match = re.search(r'\*\*Caption:\*\* (.+?)(?=\*\*|$)', section, re.DOTALL)
-        caption = caption_match.group(1).strip() if caption_match else ""
-        
-        if not scene:
-            return None
-        
-        return ComicPanel(
-            number=number,
-            title=panel_title,
-            scene=scene,
-            description=caption,
-            simplified_prompt=scene  # We'll build the full prompt later
-        )
+        script = parse_script(script_path)
+        panels = [ComicPanel(number=p.number, title=p.title, scene=p.scene,
+                             description=p.caption, simplified_prompt=p.scene)
+                  for p in script.panels]
+        return ComicScript(title=script.title, slug=script.slug, location=script.location,
+                           panels=panels, caption=script.caption)
     
     def _build_panel_prompt(self, panel: ComicPanel, comic_title: str) -> str:
         """Build specific prompt for each panel to match comic-003 style."""
@@ -132,17 +122,21 @@ class MidAPIGenerator:
         
         return panel_prompts.get(panel.number, f"{panel.simplified_prompt}, {tr_character}")
     
-    def generate_panel(self, panel: ComicPanel, comic_title: str,
-                      version: str = DEFAULT_VERSION,
-                      speed: str = DEFAULT_SPEED,
-                      max_retries: int = 3) -> Optional[str]:
-        """Generate a single panel using MidAPI.ai."""
+    def build_payload(self, panel: ComicPanel, comic_title: str,
+                       version: str = DEFAULT_VERSION,
+                       speed: str = DEFAULT_SPEED) -> Dict:
+        """Build the generate request body for a panel."""
         
         # Build specific prompt for this panel
         prompt = self._build_panel_prompt(panel, comic_title)
         
         print(f"  Panel {panel.number} prompt: {prompt[:120]}...")
         
+        return self._payload_for_prompt(prompt, version, speed)
+    
+    def _payload_for_prompt(self, prompt: str, version: str = DEFAULT_VERSION,
+                            speed: str = DEFAULT_SPEED) -> Dict:
+        """Build the generate request body for a finished prompt."""
         payload = {
             "taskType": "mj_txt2img",
             "prompt": prompt,
@@ -156,32 +150,51 @@ class MidAPIGenerator:
             payload["cref"] = self.tr_reference_url
             print(f"  Using character reference: {self.tr_reference_url[:50]}...")
         
+        return payload
+    
+    def generate_panel(self, panel: ComicPanel, comic_title: str,
+                      version: str = DEFAULT_VERSION,
+                      speed: str = DEFAULT_SPEED,
+                      max_retries: int = 3,
+                      tier_stats: Optional[Dict[str, TierStats]] = None) -> Optional[str]:
+        """Generate a single panel using MidAPI.ai."""
+        payload = self.build_payload(panel, comic_title, version, speed)
+        return self._generate_from_payload(payload, speed, max_retries, tier_stats=tier_stats)
+    
+    def _generate_from_payload(self, payload: Dict, speed: str = DEFAULT_SPEED,
+                               max_retries: int = 3, max_wait: int = 300,
+                               tier_stats: Optional[Dict[str, TierStats]] = None) -> Optional[str]:
+        """Submit a task (with retries) and wait for its image URL.
+        
+        tier_stats is passed to the hedge; callers generating many panels load
+        it once instead of re-reading the run log per panel.
+        """
         for attempt in range(max_retries):
             try:
                 print(f"  Submitting task... (attempt {attempt + 1}/{max_retries})")
                 
                 # Submit generation task
-                response = requests.post(
-                    f"{self.base_url}/generate",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60
-                )
-                
-                result = response.json()
-                
-                if result.get("code") != 200:
-                    print(f"  API Error: {result.get('msg', 'Unknown error')}")
+                task_id = self.submit_task(payload)
+                if not task_id:
                     if attempt < max_retries - 1:
                         time.sleep(5)
                         continue
                     return None
                 
-                task_id = result["data"]["taskId"]
                 print(f"  Task started: {task_id}")
                 
                 # Wait for completion
-                image_url = self._wait_for_completion(task_id)
+                if self.hedge_budget > 0:
+                    image_url = self._wait_with_hedge(task_id, payload, speed, max_wait, tier_stats)
+                else:
+                    submitted_at = time.time()
+                    image_url = self._wait_for_completion(task_id, max_wait)
+                    elapsed = time.time() - submitted_at
+                    # A timeout is censored (still pending), not a failure
+                    timed_out = not image_url and elapsed >= max_wait
+                    record_run(self.run_log, speed, elapsed,
+                               success=None if timed_out else bool(image_url),
+                               task_id=task_id, **({"censored": True} if timed_out else {}))
                 if image_url:
                     return image_url
                     
@@ -194,62 +207,195 @@ class MidAPIGenerator:
         
         return None
     
+    def submit_task(self, payload: Dict) -> Optional[str]:
+        """Submit a generation task and return its task ID."""
+        response = requests.post(
+            f"{self.base_url}/generate",
+            headers=self.headers,
+            json=payload,
+            timeout=60
+        )
+        
+        result = response.json()
+        
+        if result.get("code") != 200:
+            print(f"  API Error: {result.get('msg', 'Unknown error')}")
+            return None
+        
+        return result["data"]["taskId"]
+    
+    def check_task(self, task_id: str) -> Tuple[str, Optional[str]]:
+        """Check a task once. Returns (state, image_url).
+        
+        state is "pending", "success", "failed" or "error" (status check
+        itself failed - try again later).
+        """
+        try:
+            response = requests.get(
+                f"{self.base_url}/record-info?taskId={task_id}",
+                headers=self.headers,
+                timeout=30
+            )
+            
+            result = response.json()
+        except Exception as e:
+            print(f"  Poll error: {e}")
+            return "error", None
+        
+        if result.get("code") != 200:
+            print(f"  Status check error: {result.get('msg')}")
+            return "error", None
+        
+        data = result["data"]
+        success_flag = data.get("successFlag", 0)
+        
+        if success_flag == 1:
+            # Success - get image URLs
+            result_info = data.get("resultInfoJson", {})
+            urls = result_info.get("resultUrls", [])
+            if urls:
+                # Return first image (you can upscale later if needed)
+                return "success", urls[0].get("resultUrl")
+            return "failed", None
+        elif success_flag in [2, 3]:
+            # Failed
+            error_msg = data.get("errorMessage", "Generation failed")
+            print(f"  Generation failed: {error_msg}")
+            return "failed", None
+        
+        return "pending", None
+    
     def _wait_for_completion(self, task_id: str, max_wait: int = 300) -> Optional[str]:
         """Poll for task completion."""
         start_time = time.time()
         poll_interval = 10  # Check every 10 seconds initially
         
         while time.time() - start_time < max_wait:
-            try:
-                response = requests.get(
-                    f"{self.base_url}/record-info?taskId={task_id}",
-                    headers=self.headers,
-                    timeout=30
-                )
-                
-                result = response.json()
-                
-                if result.get("code") != 200:
-                    print(f"  Status check error: {result.get('msg')}")
-                    time.sleep(poll_interval)
-                    continue
-                
-                data = result["data"]
-                success_flag = data.get("successFlag", 0)
-                
-                if success_flag == 0:
-                    print(f"  Generating... ({int(time.time() - start_time)}s)")
-                elif success_flag == 1:
-                    # Success - get image URLs
-                    result_info = data.get("resultInfoJson", {})
-                    urls = result_info.get("resultUrls", [])
-                    if urls:
-                        # Return first image (you can upscale later if needed)
-                        return urls[0].get("resultUrl")
-                    return None
-                elif success_flag in [2, 3]:
-                    # Failed
-                    error_msg = data.get("errorMessage", "Generation failed")
-                    print(f"  Generation failed: {error_msg}")
-                    return None
-                
-                time.sleep(poll_interval)
-                
-            except Exception as e:
-                print(f"  Poll error: {e}")
-                time.sleep(poll_interval)
+            state, image_url = self.check_task(task_id)
+            
+            if state == "pending":
+                print(f"  Generating... ({int(time.time() - start_time)}s)")
+            elif state == "success":
+                return image_url
+            elif state == "failed":
+                return None
+            
+            time.sleep(poll_interval)
         
         print("  Timeout waiting for generation")
         return None
     
-    def download_image(self, url: str, filepath: Path) -> bool:
-        """Download image from URL to local file."""
+    def _wait_with_hedge(self, task_id: str, payload: Dict, speed: str,
+                         max_wait: int = 300,
+                         tier_stats: Optional[Dict[str, TierStats]] = None) -> Optional[str]:
+        """Poll a task, submitting one duplicate if it outlives the tier's p90.
+        
+        The hedge point is capped at HEDGE_DEADLINE_FRACTION of max_wait, so
+        tiers whose p90 exceeds max_wait (relaxed) still hedge. Whichever task
+        finishes first wins; MidAPI has no cancel endpoint, so the loser is
+        left to finish and ignored. tier_stats defaults to the run log.
+        """
+        tier = (tier_stats or load_tier_stats(self.run_log))[speed]
+        hedge_at = min(tier.p90, max_wait * HEDGE_DEADLINE_FRACTION)
+        start_time = time.time()
+        poll_interval = 10
+        tasks = {task_id: start_time}  # task_id -> submitted at
+        hedge_id = None
+        
+        while tasks and time.time() - start_time < max_wait:
+            for tid, submitted_at in list(tasks.items()):
+                state, image_url = self.check_task(tid)
+                if state == "success":
+                    record_run(self.run_log, speed, time.time() - submitted_at, success=True,
+                               task_id=tid, hedge=tid == hedge_id,
+                               won=True if hedge_id else None)
+                    for loser in tasks:
+                        if loser != tid:
+                            # Still pending when abandoned - censored, not a failure
+                            record_run(self.run_log, speed, time.time() - tasks[loser],
+                                       success=None, task_id=loser, censored=True,
+                                       hedge=loser == hedge_id, won=False)
+                    if tid == hedge_id:
+                        with self._hedge_lock:
+                            self.hedge_stats.wins += 1
+                        print(f"  🏁 Hedge won ({int(time.time() - start_time)}s)")
+                    return image_url
+                elif state == "failed":
+                    record_run(self.run_log, speed, time.time() - submitted_at, success=False,
+                               task_id=tid, hedge=tid == hedge_id)
+                    del tasks[tid]
+            
+            if not tasks:
+                return None
+            
+            elapsed = time.time() - start_time
+            print(f"  Generating... ({int(elapsed)}s, {len(tasks)} task(s))")
+            
+            if hedge_id is None and elapsed > hedge_at:
+                # Reserve the budget first so concurrent waits can't overspend it
+                with self._hedge_lock:
+                    reserved = self.hedge_stats.spent + tier.cost <= self.hedge_budget
+                    if reserved:
+                        self.hedge_stats.spent += tier.cost
+                if not reserved:
+                    hedge_id = ""  # Budget exhausted - don't check again
+                else:
+                    print(f"  ⏱️  Past {hedge_at:.0f}s ({speed} p90 {tier.p90:.0f}s), submitting hedge...")
+                    try:
+                        hedge_id = self.submit_task(payload) or ""
+                    except Exception as e:
+                        print(f"  Hedge submit error: {e}")
+                        hedge_id = ""
+                    with self._hedge_lock:
+                        if hedge_id:
+                            self.hedge_stats.hedges += 1
+                        else:
+                            self.hedge_stats.spent -= tier.cost
+                    if hedge_id:
+                        tasks[hedge_id] = time.time()
+            
+            time.sleep(poll_interval)
+        
+        if tasks:
+            print("  Timeout waiting for generation")
+            for tid, submitted_at in tasks.items():
+                record_run(self.run_log, speed, time.time() - submitted_at, success=None,
+                           task_id=tid, censored=True, hedge=tid == hedge_id)
+        return None
+    
+    def download_image(self, url: str, filepath: Path,
+                       still_held: Optional[Callable[[], bool]] = None) -> bool:
+        """Download image from URL to local file.
+
+        still_held is checked before the final rename; False discards the download.
+        """
         try:
             response = requests.get(url, timeout=60)
             response.raise_for_status()
             
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            # A dropped connection can still end in a 200 - don't save half a panel
+            data = response.content
+            expected = response.headers.get("Content-Length")
+            if expected and int(expected) != len(data) and not response.headers.get("Content-Encoding"):
+                print(f"  Download truncated: {len(data)}/{expected} bytes")
+                return False
+            format = sniff_format(data[:32])
+            if not format or is_truncated(format, data[:32], data[-TAIL_BYTES:], len(data)):
+                print(f"  Download is not a complete image ({len(data)} bytes)")
+                return False
+            
+            # Temp name + rename so other workers never see a partial panel
+            part_path = filepath.with_name(filepath.name + ".part")
+            with open(part_path, 'wb') as f:
+                f.write(data)
+            # Midjourney serves JPEG/WebP as often as PNG - match the extension
+            conform_to_format(part_path, IMAGE_EXTENSIONS.get(filepath.suffix.lower()))
+            # Don't overwrite the panel of a worker that took over our lease
+            if still_held and not still_held():
+                print(f"  ⚠️  Lease lost, discarding {filepath.name}")
+                part_path.unlink()
+                return False
+            os.replace(part_path, filepath)
             
             return True
         except Exception as e:
@@ -258,8 +404,15 @@ class MidAPIGenerator:
     
     def generate_comic(self, script_path: str, version: str = DEFAULT_VERSION,
                       speed: str = DEFAULT_SPEED,
-                      skip_existing: bool = True) -> Dict:
-        """Generate all panels for a comic script."""
+                      skip_existing: bool = True,
+                      panel_speeds: Optional[Dict[int, str]] = None,
+                      leases: Optional[LeaseManager] = None) -> Dict:
+        """Generate all panels for a comic script.
+
+        panel_speeds overrides speed per panel number (see tr_speed_scheduler.py);
+        panels missing from it use speed. With leases, panels claimed by other
+        workers are reported as "leased".
+        """
         print(f"\n🎨 Processing: {script_path}")
         
         script = self.parse_script_file(script_path)
@@ -273,6 +426,8 @@ class MidAPIGenerator:
             "panels": [],
             "status": "success"
         }
+        # Hedging needs the tier percentiles; read the run log once per comic
+        tier_stats = load_tier_stats(self.run_log) if self.hedge_budget > 0 else None
         
         for panel in script.panels:
             print(f"\n  Panel {panel.number}: {panel.title}")
@@ -288,45 +443,152 @@ class MidAPIGenerator:
                 })
                 continue
             
-            # Generate image
-            image_url = self.generate_panel(panel, script.title, version, speed)
+            # In sharded mode, only the worker holding the lease generates
+            key = panel_key(script.slug, panel.number)
+            if leases and not leases.acquire(key):
+                print(f"    🔒 Claimed by another worker")
+                results["panels"].append({
+                    "number": panel.number,
+                    "file": None,
+                    "status": "leased"
+                })
+                continue
             
-            if image_url:
-                # Download and save
-                if self.download_image(image_url, output_file):
-                    print(f"    ✅ Saved: {output_file}")
+            try:
+                # The previous holder may have finished before we got the lease
+                if leases and output_file.exists():
+                    print(f"    ⏭️  Skipping (finished by another worker)")
                     results["panels"].append({
                         "number": panel.number,
                         "file": str(output_file),
-                        "url": image_url,
-                        "status": "generated"
+                        "status": "skipped"
                     })
+                    continue
+                
+                # Generate image
+                if panel_speeds is not None and panel.number not in panel_speeds:
+                    print(f"    No scheduled speed, using {speed}")
+                panel_speed = (panel_speeds or {}).get(panel.number, speed)
+                if panel_speed != speed:
+                    print(f"    Scheduled speed: {panel_speed}")
+                image_url = self.generate_panel(panel, script.title, version, panel_speed,
+                                                tier_stats=tier_stats)
+                
+                if image_url:
+                    # Download and save
+                    still_held = (lambda: leases.still_held(key)) if leases else None
+                    if self.download_image(image_url, output_file, still_held=still_held):
+                        print(f"    ✅ Saved: {output_file}")
+                        results["panels"].append({
+                            "number": panel.number,
+                            "file": str(output_file),
+                            "url": image_url,
+                            "status": "generated"
+                        })
+                    elif still_held and not still_held():
+                        # Taken over while we generated; the new holder writes it
+                        results["panels"].append({
+                            "number": panel.number,
+                            "file": None,
+                            "url": image_url,
+                            "status": "leased"
+                        })
+                    else:
+                        print(f"    ⚠️  Generated but failed to download")
+                        results["panels"].append({
+                            "number": panel.number,
+                            "file": None,
+                            "url": image_url,
+                            "status": "download_failed"
+                        })
                 else:
-                    print(f"    ⚠️  Generated but failed to download")
+                    print(f"    ❌ Failed to generate")
                     results["panels"].append({
                         "number": panel.number,
                         "file": None,
-                        "url": image_url,
-                        "status": "download_failed"
+                        "status": "failed"
                     })
+                    results["status"] = "partial"
+            finally:
+                if leases:
+                    leases.release(key)
+        
+        return results
+    
+    def generate_drafts(self, script_path: str, version: str = DEFAULT_VERSION,
+                        workers: int = 4) -> Dict:
+        """Render every panel on relaxed speed, concurrently, into the drafts folder."""
+        print(f"\n✏️  Drafting: {script_path}")
+        
+        script = self.parse_script_file(script_path)
+        print(f"  Title: {script.title}")
+        print(f"  Slug: {script.slug}")
+        
+        manifest = DraftManifest(slug=script.slug, title=script.title,
+                                 script_path=str(script_path), backend="midapi")
+        for panel in script.panels:
+            manifest.panels.append(DraftPanel(number=panel.number,
+                                              prompt=self._build_panel_prompt(panel, script.title)))
+        
+        directory = draft_dir(str(self.output_dir))
+        tier_stats = load_tier_stats(self.run_log) if self.hedge_budget > 0 else None
+        
+        def render(draft: DraftPanel) -> Optional[str]:
+            payload = self._payload_for_prompt(draft.prompt, version, DRAFT_SPEED)
+            image_url = self._generate_from_payload(payload, DRAFT_SPEED, max_wait=DRAFT_MAX_WAIT,
+                                                    tier_stats=tier_stats)
+            if not image_url:
+                return None
+            filepath = directory / draft_filename(script.slug, draft.number)
+            return str(filepath) if self.download_image(image_url, filepath) else None
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for draft, filepath in zip(manifest.panels, pool.map(render, manifest.panels)):
+                draft.file = filepath
+                draft.status = "draft" if filepath else "failed"
+                print(f"  Panel {draft.number}: {'✅ ' + filepath if filepath else '❌ failed'}")
+        
+        save_manifest(str(self.output_dir), manifest)
+        print(f"  📋 Review, then: python tr_drafts.py approve {script.slug} --panels 1,2")
+        return asdict(manifest)
+    
+    def promote(self, slug: str, panels: Optional[List[int]] = None,
+                version: str = DEFAULT_VERSION, speed: str = DEFAULT_SPEED) -> Dict:
+        """Re-render approved draft panels at final speed using the draft prompts."""
+        print(f"\n⬆️  Promoting: {slug}")
+        
+        if panels:
+            manifest = set_status(str(self.output_dir), slug, panels, "approved")
+        else:
+            manifest = load_manifest(str(self.output_dir), slug)
+        if not manifest:
+            print(f"  ❌ No drafts found for {slug}")
+            return {"slug": slug, "panels": [], "status": "missing"}
+        
+        results = {"slug": slug, "panels": [], "status": "success"}
+        tier_stats = load_tier_stats(self.run_log) if self.hedge_budget > 0 else None
+        for draft in manifest.panels:
+            if draft.status != "approved":
+                continue
+            print(f"\n  Panel {draft.number}:")
+            output_file = self.output_dir / f"comic-{slug}-panel{draft.number}.png"
+            payload = self._payload_for_prompt(draft.prompt, version, speed)
+            image_url = self._generate_from_payload(payload, speed, tier_stats=tier_stats)
+            if image_url and self.download_image(image_url, output_file):
+                draft.status = "promoted"
+                print(f"    ✅ Saved: {output_file}")
+                results["panels"].append({"number": draft.number, "file": str(output_file),
+                                          "url": image_url, "status": "generated"})
             else:
-                print(f"    ❌ Failed to generate")
-                results["panels"].append({
-                    "number": panel.number,
-                    "file": None,
-                    "status": "failed"
-                })
+                print(f"    ❌ Failed to promote panel {draft.number}")
+                results["panels"].append({"number": draft.number, "file": None, "status": "failed"})
                 results["status"] = "partial"
+            # Save as we go so a crash doesn't re-pay for promoted panels
+            save_manifest(str(self.output_dir), manifest)
         
+        if not results["panels"]:
+            print("  ⚠️  No approved panels to promote")
         return results
-    
-    @staticmethod
-    def _slugify(text: str) -> str:
-        """Convert text to URL-safe slug."""
-        text = text.lower()
-        text = re.sub(r'[^a-z0-9]+', '-', text)
-        text = text.strip('-')
-        return text[:50]
 
 
 def main():
@@ -337,11 +599,47 @@ def main():
     parser.add_argument("--output", default="comics/generated", help="Output directory")
     parser.add_argument("--ref-url", help="TR character reference image URL")
     parser.add_argument("--version", default="7", help="Midjourney model version (6, 6.1, 7)")
-    parser.add_argument("--speed", default="fast", choices=["relaxed", "fast", "turbo"],
-                       help="Generation speed (affects cost)")
+    parser.add_argument("--speed", default="fast", choices=["relaxed", "fast", "turbo", "auto"],
+                       help="Generation speed (affects cost); auto plans from scheduled_date deadlines")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Admin database used by --speed auto")
+    parser.add_argument("--plan", action="store_true", help="Show the --speed auto plan and exit")
+    parser.add_argument("--hedge-budget", type=float, default=0.0,
+                       help="Max extra USD for duplicate tasks when one runs past its tier's p90 (0 = off)")
+    parser.add_argument("--draft", action="store_true", help="Cheap concurrent relaxed-speed drafts for review")
+    parser.add_argument("--promote", metavar="SLUG", help="Re-render approved drafts of SLUG at --speed")
+    parser.add_argument("--panels", help="With --promote: approve and promote these panels (e.g. 1,3)")
     parser.add_argument("--regenerate", action="store_true", help="Force regenerate existing panels")
+    parser.add_argument("--shard", action="store_true",
+                       help="With --batch: claim panels via lease files so several workers can share --output")
+    parser.add_argument("--worker-id", help="With --shard: worker name (default: hostname-pid)")
+    parser.add_argument("--lease-ttl", type=float, default=DEFAULT_TTL,
+                       help="With --shard: seconds without a heartbeat before a lease can be taken over")
     
     args = parser.parse_args()
+    if args.shard and args.regenerate:
+        # Existing panels are how workers know a claimed panel is finished
+        parser.error("--shard can't be combined with --regenerate")
+    
+    # Plan speed tiers from publication deadlines
+    speed_plan = None
+    if args.speed == "auto" or args.plan:
+        scheduler = SpeedScheduler(db_path=args.db,
+                                   run_log=str(Path(args.output) / ".midapi-runs.jsonl"))
+        speed_plan = scheduler.plan()
+        if args.plan:
+            scheduler.print_plan(speed_plan)
+            return
+    
+    def speeds_for(script_file: str) -> Dict:
+        """Default speed and per-panel overrides for one script."""
+        if speed_plan is None:
+            return {"speed": args.speed}
+        slug = generator.parse_script_file(script_file).slug
+        panel_speeds = speed_plan.tiers_for(slug)
+        if not panel_speeds:
+            print(f"  ⚠️  {slug} is not in the speed plan, using {DEFAULT_SPEED}")
+        # Panels the plan doesn't cover use the default speed
+        return {"speed": DEFAULT_SPEED, "panel_speeds": panel_speeds}
     
     # Check for API key
     if not os.getenv("MIDAPI_KEY"):
@@ -354,15 +652,29 @@ def main():
     try:
         generator = MidAPIGenerator(
             tr_reference_url=args.ref_url,
-            output_dir=args.output
+            output_dir=args.output,
+            hedge_budget=args.hedge_budget
         )
     except ValueError as e:
         print(f"❌ {e}")
         return
     
-    if args.batch:
+    if args.promote:
+        results = generator.promote(args.promote, parse_panel_list(args.panels), args.version,
+                                    args.speed if args.speed != "auto" else DEFAULT_SPEED)
+        print(f"\n  Results: {json.dumps(results, indent=2)}")
+    
+    elif args.draft:
+        if args.batch:
+            script_files = sorted(Path(args.scripts_dir).glob("comic-draft-*.md"))
+        else:
+            script_files = [Path(args.script)] if args.script else []
+        for script_file in script_files:
+            generator.generate_drafts(str(script_file), version=args.version)
+    
+    elif args.batch:
         scripts_path = Path(args.scripts_dir)
-        script_files = list(scripts_path.glob("comic-draft-*.md"))
+        script_files = sorted(scripts_path.glob("comic-draft-*.md"))
         
         if not script_files:
             print(f"No scripts found in {args.scripts_dir}")
@@ -370,21 +682,38 @@ def main():
         
         print(f"\n🚀 Batch generating {len(script_files)} comics...")
         
-        for script_file in script_files:
-            results = generator.generate_comic(
-                str(script_file),
-                version=args.version,
-                speed=args.speed,
-                skip_existing=not args.regenerate
-            )
-            print(f"\n  Results: {json.dumps(results, indent=2)}")
+        leases = None
+        if args.shard:
+            leases = LeaseManager(args.output, worker_id=args.worker_id, ttl=args.lease_ttl,
+                                  heartbeat=args.lease_ttl / 10)
+            print(f"  Worker: {leases.worker_id}")
+        
+        def run_pass() -> List[Dict]:
+            all_results = []
+            for script_file in script_files:
+                results = generator.generate_comic(
+                    str(script_file),
+                    version=args.version,
+                    skip_existing=not args.regenerate,
+                    leases=leases,
+                    **speeds_for(str(script_file))
+                )
+                print(f"\n  Results: {json.dumps(results, indent=2)}")
+                all_results.append(results)
+            return all_results
+        
+        if leases:
+            with leases:
+                run_until_drained(run_pass, poll=leases.heartbeat)
+        else:
+            run_pass()
     
     elif args.script:
         results = generator.generate_comic(
             args.script,
             version=args.version,
-            speed=args.speed,
-            skip_existing=not args.regenerate
+            skip_existing=not args.regenerate,
+            **speeds_for(args.script)
         )
         print(f"\n✅ Done!")
         print(f"   Generated: {sum(1 for p in results['panels'] if p['status'] == 'generated')}")
@@ -397,6 +726,12 @@ def main():
         print("  export MIDAPI_KEY='your-key'")
         print("  export TR_REFERENCE_URL='https://your-tr-image.png'")
         print("  python tr_midapi_generator.py scripts/comic-draft-biggest-boat-in-the-harbor.md")
+        return
+    
+    if generator.hedge_budget > 0:
+        stats = generator.hedge_stats
+        print(f"\n🏁 Hedges: {stats.hedges} submitted, {stats.wins} won, "
+              f"~${stats.spent:.2f} of ${generator.hedge_budget:.2f} budget")
 
 
 if __name__ == "__main__":
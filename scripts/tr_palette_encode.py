@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+TR Comic Palette Encoder
+Re-encodes flat-color comic panels as optimized adaptive-palette PNGs.
+A perceptual-error guard raises the palette size (or keeps full RGB) for
+panels that don't quantize cleanly.
+"""
+
+import os
+import math
+import argparse
+from pathlib import Path
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+
+try:
+    from PIL import ImageCms  # Needs Pillow built with LittleCMS
+    SRGB_TO_LAB = ImageCms.buildTransformFromOpenProfiles(
+        ImageCms.createProfile("sRGB"), ImageCms.createProfile("LAB"), "RGB", "LAB")
+except ImportError:
+    SRGB_TO_LAB = None
+
+QUANTIZE_METHODS = {
+    "mediancut": Image.Quantize.MEDIANCUT,
+    "maxcoverage": Image.Quantize.MAXCOVERAGE,
+    "fastoctree": Image.Quantize.FASTOCTREE,
+}
+
+# Blur applied before measuring error, so dithering noise that the eye
+# averages out isn't counted against the palette
+ERROR_BLUR_RADIUS = 1.5
+
+
+@dataclass
+class PaletteOptions:
+    colors: int = 128  # Starting palette size, doubled up to 256 if the guard trips
+    dither: bool = False
+    max_error: float = 3.5  # Blurred RMS color difference, CIE76 delta E
+    method: str = "fastoctree"
+
+
+@dataclass
+class EncodeResult:
+    path: str
+    original_bytes: int
+    encoded_bytes: int
+    colors: int  # 0 = kept as RGB
+    error: float
+    status: str  # "palette", "rgb" or "kept"
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.encoded_bytes
+
+
+def perceptual_error(original: Image.Image, encoded: Image.Image) -> float:
+    """RMS color difference (CIE76 delta E in Lab) of the blurred images.
+
+    Hue shifts count, not just brightness: a red remapped to an orange of the
+    same luminance is an error. Without LittleCMS, falls back to the worst
+    per-channel RGB RMS (0-255).
+    """
+    a = original.convert("RGB").filter(ImageFilter.GaussianBlur(ERROR_BLUR_RADIUS))
+    b = encoded.convert("RGB").filter(ImageFilter.GaussianBlur(ERROR_BLUR_RADIUS))
+    if SRGB_TO_LAB is None:
+        return max(ImageStat.Stat(ImageChops.difference(a, b)).rms)
+    a = ImageCms.applyTransform(a, SRGB_TO_LAB)
+    b = ImageCms.applyTransform(b, SRGB_TO_LAB)
+    l_rms, a_rms, b_rms = (ImageStat.Stat(ImageChops.difference(x, y)).rms[0]
+                           for x, y in zip(a.split(), b.split()))
+    # Pillow stores L* as 0-255; a* and b* are already in Lab units
+    return math.sqrt((l_rms * 100 / 255) ** 2 + a_rms ** 2 + b_rms ** 2)
+
+
+def quantize_image(img: Image.Image, options: PaletteOptions) -> Tuple[Optional[Image.Image], int, float]:
+    """Quantize to the first palette at or above options.colors that passes
+    the error guard, doubling the size up to 256.
+
+    Returns (image, colors, error); image is None if even 256 colors fail.
+    """
+    rgb = img.convert("RGB")
+    method = QUANTIZE_METHODS.get(options.method, Image.Quantize.FASTOCTREE)
+    dither = Image.Dither.FLOYDSTEINBERG if options.dither else Image.Dither.NONE
+
+    colors = max(2, min(options.colors, 256))
+    error = 0.0
+    while True:
+        palette = rgb.quantize(colors=colors, method=method)
+        # Remap against the palette so the dither setting applies
+        quantized = rgb.quantize(palette=palette, dither=dither)
+        error = perceptual_error(rgb, quantized)
+        if error <= options.max_error:
+            return quantized, colors, error
+        if colors >= 256:
+            return None, colors, error
+        colors = min(colors * 2, 256)
+
+
+def encode_png(img: Image.Image, path: Path, options: Optional[PaletteOptions] = None,
+               original_bytes: int = 0) -> EncodeResult:
+    """Write img as an optimized palette PNG (or optimized RGB if the guard trips)."""
+    options = options or PaletteOptions()
+    quantized, colors, error = quantize_image(img, options)
+
+    buffer = BytesIO()
+    if quantized is not None:
+        quantized.save(buffer, "PNG", optimize=True)
+        status = "palette"
+    else:
+        img.convert("RGB").save(buffer, "PNG", optimize=True)
+        colors, status = 0, "rgb"
+
+    with open(path, 'wb') as f:
+        f.write(buffer.getvalue())
+
+    return EncodeResult(path=str(path), original_bytes=original_bytes,
+                        encoded_bytes=len(buffer.getvalue()), colors=colors,
+                        error=round(error, 2), status=status)
+
+
+def encode_file(src: str, dst: Optional[str] = None,
+                options: Optional[PaletteOptions] = None) -> EncodeResult:
+    """Palette-encode one PNG file. In place unless dst is given.
+
+    In-place encodes only replace the file when the result is smaller.
+    """
+    options = options or PaletteOptions()
+    src_path = Path(src)
+    dst_path = Path(dst) if dst else src_path
+    original_bytes = src_path.stat().st_size
+
+    with Image.open(src_path) as img:
+        img.load()
+        if img.mode == "P" and dst_path == src_path:
+            # Already palette - nothing to gain
+            return EncodeResult(str(src_path), original_bytes, original_bytes, 0, 0.0, "kept")
+
+        tmp_path = dst_path.with_name(dst_path.name + ".tmp")
+        result = encode_png(img, tmp_path, options, original_bytes)
+
+    if dst_path == src_path and result.encoded_bytes >= original_bytes:
+        tmp_path.unlink()
+        result.encoded_bytes = original_bytes
+        result.status = "kept"
+    else:
+        os.replace(tmp_path, dst_path)
+    result.path = str(dst_path)
+    return result
+
+
+class PaletteEncoder:
+    def __init__(self, options: Optional[PaletteOptions] = None, workers: int = 0):
+        self.options = options or PaletteOptions()
+        self.workers = workers or os.cpu_count() or 1
+
+    def encode_many(self, files: List[str], output_dir: Optional[str] = None) -> List[EncodeResult]:
+        """Encode files in parallel across processes."""
+        if output_dir:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+        destinations = [str(Path(output_dir) / Path(f).name) if output_dir else None for f in files]
+
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(encode_file, src, dst, self.options)
+                       for src, dst in zip(files, destinations)]
+            for src, future in zip(files, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"  ❌ {src}: {e}")
+                    continue
+                label = f"{result.colors} colors" if result.colors else result.status
+                print(f"  ✅ {Path(src).name}: {result.original_bytes // 1024}KB → "
+                      f"{result.encoded_bytes // 1024}KB ({label}, error {result.error})")
+                results.append(result)
+        return results
+
+    @staticmethod
+    def print_summary(results: List[EncodeResult]):
+        original = sum(r.original_bytes for r in results)
+        encoded = sum(r.encoded_bytes for r in results)
+        print(f"\n📦 Encoded {len(results)} panels")
+        if original:
+            print(f"  {original / 1e6:.1f}MB → {encoded / 1e6:.1f}MB "
+                  f"(saved {(original - encoded) / 1e6:.1f}MB, {original / max(encoded, 1):.1f}x)")
+        kept = sum(1 for r in results if r.status != "palette")
+        if kept:
+            print(f"  ⚠️  {kept} panels kept as RGB (error guard or no size gain)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode TR comic panels as palette PNGs")
+    parser.add_argument("paths", nargs="+", help="PNG files or directories")
+    parser.add_argument("--output", help="Write here instead of replacing files in place")
+    parser.add_argument("--colors", type=int, default=128, help="Starting palette size (2-256)")
+    parser.add_argument("--dither", action="store_true", help="Floyd-Steinberg dithering")
+    parser.add_argument("--max-error", type=float, default=PaletteOptions.max_error,
+                        help="Max blurred RMS color difference (delta E) before using more colors")
+    parser.add_argument("--method", default="fastoctree", choices=sorted(QUANTIZE_METHODS))
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+
+    args = parser.parse_args()
+
+    files = []
+    for path in map(Path, args.paths):
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.glob("*.png")))
+        elif path.suffix.lower() == ".png":
+            files.append(str(path))
+
+    if not files:
+        print("No PNG files found")
+        return
+
+    options = PaletteOptions(colors=args.colors, dither=args.dither,
+                             max_error=args.max_error, method=args.method)
+    encoder = PaletteEncoder(options, workers=args.workers)
+
+    print(f"\n🎨 Palette-encoding {len(files)} panels...")
+    results = encoder.encode_many(files, args.output)
+    encoder.print_summary(results)
+
+
+if __name__ == "__main__":
+    main()
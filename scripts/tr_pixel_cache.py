@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+TR Decoded-Pixel Cache
+Analysis passes (scanning, thumbnails, layout) mostly need a small version of
+each panel, yet every one of them decodes the full JPEG/PNG. This cache
+decodes a panel once into reduced RGB and grayscale arrays and stores them as
+.npy files keyed by the panel's content hash. Readers get them back with
+np.load(mmap_mode="r"), so every process shares the same pages of the OS page
+cache and nothing is copied.
+
+Layout ({cache_dir}/):
+  index.json                      path → [size, mtime_ns, sha256]
+  {hash[:2]}/{hash}-{px}{mode}.npy  e.g. ab/ab12...-256L.npy
+
+Arrays keep the panel's aspect ratio with the long side at {px}. The total
+size is kept under max_bytes by evicting the least recently used arrays.
+
+Requires numpy (optional for the rest of the pipeline).
+"""
+
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from tr_anthology_export import file_sha256
+
+SIZES = (256, 64)  # Long side in pixels
+MODES = ("RGB", "L")
+DEFAULT_CACHE_DIR = "comics/.pixel-cache"
+DEFAULT_MAX_BYTES = 1 << 30  # ~3,500 panels at ~280KB each
+TOUCH_INTERVAL = 3600  # Only bump an array's mtime (its LRU age) once an hour
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg")
+
+
+def array_name(digest: str, size: int, mode: str) -> str:
+    return f"{digest[:2]}/{digest}-{size}{mode}.npy"
+
+
+def decode_variants(source: str, cache_dir: str, digest: str) -> int:
+    """Decode one image and write every size/mode variant. Returns bytes written.
+
+    Top-level so it can run in a worker process.
+    """
+    written = 0
+    with Image.open(source) as img:
+        # JPEG: scale in the DCT domain while decoding
+        img.draft("RGB", (max(SIZES), max(SIZES)))
+        # PNG has no reduced decode; reduce() box-averages cheaply before resampling
+        factor = max(img.width, img.height) // (max(SIZES) * 2)
+        small = img.reduce(factor) if factor > 1 else img
+        small = small.convert("RGB")
+
+    for size in SIZES:
+        variant = small.copy()
+        variant.thumbnail((size, size), Image.Resampling.BILINEAR)
+        for mode in MODES:
+            path = Path(cache_dir) / array_name(digest, size, mode)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(variant.convert(mode)))
+            os.replace(tmp_path, path)
+            written += path.stat().st_size
+    return written
+
+
+class PixelCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        if np is None:
+            raise RuntimeError("The pixel cache needs numpy (pip install numpy)")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.index_path = self.cache_dir / "index.json"
+        self.index: Dict[str, List] = self._load_index()
+        self._dirty: Dict[str, Optional[List]] = {}  # Index changes not yet saved
+
+    def _load_index(self) -> Dict[str, List]:
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_index(self):
+        """Merge our index changes into the on-disk index (other processes may have written)."""
+        if not self._dirty:
+            return
+        index = self._load_index()
+        for path, entry in self._dirty.items():
+            if entry is None:
+                index.pop(path, None)
+            else:
+                index[path] = entry
+        tmp_path = self.index_path.with_name(f"index.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self.index = index
+        self._dirty = {}
+
+    def _set_entry(self, path: str, entry: Optional[List]):
+        if entry is None:
+            self.index.pop(path, None)
+        else:
+            self.index[path] = entry
+        self._dirty[path] = entry
+
+    def content_hash(self, path: str) -> str:
+        """sha256 of the file, from the index while size and mtime are unchanged."""
+        key = str(Path(path).resolve())
+        stat = os.stat(key)
+        entry = self.index.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = file_sha256(Path(key))
+        self._set_entry(key, [stat.st_size, stat.st_mtime_ns, digest])
+        return digest
+
+    def _array_path(self, digest: str, size: int, mode: str) -> Path:
+        return self.cache_dir / array_name(digest, size, mode)
+
+    def _has_variants(self, digest: str) -> bool:
+        return all(self._array_path(digest, s, m).exists() for s in SIZES for m in MODES)
+
+    def get(self, path: str, size: int = 256, mode: str = "RGB"):
+        """Read-only memory-mapped array (H, W[, 3]) for a panel, decoding it on a miss."""
+        if size not in SIZES or mode not in MODES:
+            raise ValueError(f"Cached variants are {SIZES} x {MODES}, not {size} {mode}")
+        digest = self.content_hash(path)
+        array_path = self._array_path(digest, size, mode)
+        if array_path.exists():
+            # mtime is the LRU clock for eviction
+            age = time.time() - array_path.stat().st_mtime
+            if age > TOUCH_INTERVAL:
+                os.utime(array_path)
+            return np.load(array_path, mmap_mode="r")
+
+        decode_variants(path, str(self.cache_dir), digest)
+        self.save_index()
+        # Map before evicting: the mapping stays valid even if the file goes
+        array = np.load(array_path, mmap_mode="r")
+        self.evict()
+        return array
+
+    def warm(self, paths: List[str], workers: int = 0) -> int:
+        """Decode every panel not yet cached, in parallel. Returns how many were decoded."""
+        missing: Dict[str, str] = {}
+        for path in paths:
+            digest = self.content_hash(path)
+            if digest not in missing.values() and not self._has_variants(digest):
+                missing[path] = digest
+        self.save_index()
+        if not missing:
+            return 0
+
+        decoded = 0
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            futures = {pool.submit(decode_variants, path, str(self.cache_dir), digest): path
+                       for path, digest in missing.items()}
+            for future, path in futures.items():
+                try:
+                    future.result()
+                    decoded += 1
+                except Exception as e:
+                    print(f"  ⚠️  Could not decode {path}: {e}")
+        self.evict()
+        return decoded
+
+    def _arrays(self) -> List[tuple]:
+        return [(path, path.stat()) for path in self.cache_dir.glob("*/*.npy")]
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Delete least recently used arrays until the cache fits. Returns bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        arrays = sorted(self._arrays(), key=lambda a: a[1].st_mtime)
+        total = sum(stat.st_size for _, stat in arrays)
+        freed = 0
+        for path, stat in arrays:
+            if total - freed <= limit:
+                break
+            try:
+                path.unlink()
+                freed += stat.st_size
+            except FileNotFoundError:
+                pass
+        return freed
+
+    def invalidate(self, path: str):
+        """Forget a panel and delete its arrays unless another path has the same content."""
+        key = str(Path(path).resolve())
+        entry = self.index.get(key)
+        self._set_entry(key, None)
+        if entry and not any(e[2] == entry[2] for e in self.index.values()):
+            for size in SIZES:
+                for mode in MODES:
+                    self._array_path(entry[2], size, mode).unlink(missing_ok=True)
+        self.save_index()
+
+    def prune(self) -> int:
+        """Drop index entries for changed or deleted files, then orphaned arrays."""
+        stale = []
+        for key, (size, mtime_ns, _) in self.index.items():
+            try:
+                stat = os.stat(key)
+                if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                    stale.append(key)
+            except FileNotFoundError:
+                stale.append(key)
+        for key in stale:
+            self._set_entry(key, None)
+        self.save_index()
+
+        live = {entry[2] for entry in self.index.values()}
+        for path, _ in self._arrays():
+            if path.name.split("-")[0] not in live:
+                path.unlink(missing_ok=True)
+        return len(stale)
+
+    def stats(self) -> Dict:
+        arrays = self._arrays()
+        return {
+            "panels": len({path.name.split("-")[0] for path, _ in arrays}),
+            "arrays": len(arrays),
+            "bytes": sum(stat.st_size for _, stat in arrays),
+            "max_bytes": self.max_bytes,
+            "indexed_paths": len(self.index),
+        }
+
+
+def open_pixel_cache(cache_dir: str = DEFAULT_CACHE_DIR) -> Optional[PixelCache]:
+    """PixelCache, or None (with a warning) when numpy isn't installed."""
+    if np is None:
+        print("  ⚠️  numpy not installed - pixel cache disabled")
+        return None
+    return PixelCache(cache_dir)
+
+
+def find_images(directories: List[str]) -> List[str]:
+    paths = []
+    for directory in directories:
+        for pattern in IMAGE_PATTERNS:
+            paths.extend(str(p) for p in Path(directory).rglob(pattern)
+                         if not any(part.startswith(".") for part in p.parts))
+    return sorted(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the TR decoded-pixel cache")
+    parser.add_argument("action", choices=["warm", "stats", "evict", "prune", "clear"])
+    parser.add_argument("paths", nargs="*", default=["comics/generated", "comics/final"],
+                        help="Image directories to warm")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Cache directory")
+    parser.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES >> 20, help="Cache size limit")
+    parser.add_argument("--workers", type=int, default=0, help="Decode processes (default: CPU count)")
+
+    args = parser.parse_args()
+    if np is None:
+        print("❌ numpy is required: pip install numpy")
+        return
+    cache = PixelCache(args.cache_dir, max_bytes=args.max_mb << 20)
+
+    if args.action == "warm":
+        paths = find_images(args.paths)
+        start = time.time()
+        decoded = cache.warm(paths, workers=args.workers)
+        print(f"🔥 {decoded} decoded, {len(paths) - decoded} already cached ({time.time() - start:.1f}s)")
+    elif args.action == "evict":
+        print(f"🗑️  Freed {cache.evict() / 1e6:.1f}MB")
+    elif args.action == "prune":
+        print(f"🧹 Dropped {cache.prune()} stale index entries")
+    elif args.action == "clear":
+        print(f"🗑️  Freed {cache.evict(0) / 1e6:.1f}MB")
+        cache.index = {}
+        cache.index_path.unlink(missing_ok=True)
+
+    stats = cache.stats()
+    print(f"📊 {stats['panels']} panels, {stats['arrays']} arrays, "
+          f"{stats['bytes'] / 1e6:.1f}/{stats['max_bytes'] / 1e6:.0f}MB, {stats['indexed_paths']} paths indexed")
+
+
+if __name__ == "__main__":
+    main()
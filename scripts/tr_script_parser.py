@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+TR Comic Script Parser
+One parser for the comic script markdown shared by the OpenAI and MidAPI
+generators and the backend router, so every backend sees the same slug and
+panel numbers for a script.
+"""
+
+import re
+from typing import List, Optional
+from dataclasses import dataclass
+
+
+@dataclass
+class ScriptPanel:
+    number: int
+    title: str  # Text after "### Panel N:"
+    scene: str
+    dialogue: str = ""
+    dall_e_prompt: str = ""
+    caption: str = ""
+
+
+@dataclass
+class ParsedScript:
+    title: str
+    slug: str
+    location: str
+    panels: List[ScriptPanel]
+    caption: str = ""
+
+
+def slugify(text: str) -> str:
+    """Convert text to URL-safe slug."""
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9]+', '-', text)
+    text = text.strip('-')
+    return text[:50]
+
+
+def parse_panel(number: int, section: str) -> Optional[ScriptPanel]:
+    """Parse a single panel section. None if it has no scene."""
+    lines = section.strip().split('\n')
+    title = lines[0].strip() if lines else f"Panel {number}"
+
+    scene_match = re.search(r'\*\*Scene:\*\* (.+?)(?=\*\*|$)', section, re.DOTALL)
+    scene = scene_match.group(1).strip() if scene_match else ""
+
+    dialogue_match = re.search(r'\*\*Dialogue:\*\*(.+?)(?=\*\*|$)', section, re.DOTALL)
+    dialogue = dialogue_match.group(1).strip() if dialogue_match else ""
+
+    prompt_match = re.search(r'\*\*DALL-E Prompt:\*\*\s*```(.+?)```', section, re.DOTALL)
+    dall_e_prompt = prompt_match.group(1).strip() if prompt_match else ""
+
+    caption_match = re.search(r'\*\*Caption:\*\* (.+?)(?=\*\*|$)', section, re.DOTALL)
+    caption = caption_match.group(1).strip() if caption_match else ""
+
+    if not scene:
+        return None
+
+    return ScriptPanel(number=number, title=title, scene=scene, dialogue=dialogue,
+                       dall_e_prompt=dall_e_prompt, caption=caption)
+
+
+def parse_script(script_path: str) -> ParsedScript:
+    """Parse a comic script markdown file."""
+    with open(script_path, 'r') as f:
+        content = f.read()
+
+    title_match = re.search(r'\*\*Title:\*\* (.+)', content)
+    title = title_match.group(1) if title_match else "Untitled"
+
+    slug_match = re.search(r'\*\*Slug:\*\* (.+)', content)
+    slug = slug_match.group(1) if slug_match else slugify(title)
+
+    location_match = re.search(r'\*\*Location:\*\* (.+)', content)
+    location = location_match.group(1) if location_match else "Unknown"
+
+    caption_match = re.search(r'## Caption:\s*\n+(.+?)(?=\n##|$)', content, re.DOTALL)
+    caption = caption_match.group(1).strip() if caption_match else ""
+
+    panels = []
+    for i, section in enumerate(re.split(r'### Panel \d+:', content)[1:], 1):
+        panel = parse_panel(i, section)
+        if panel:
+            panels.append(panel)
+
+    return ParsedScript(title=title, slug=slug, location=location, panels=panels, caption=caption)
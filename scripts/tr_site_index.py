@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+TR Site Search Index & Feeds
+Builds a prebuilt inverted search index (static JSON shards) for archive.html,
+plus RSS, JSON Feed and sitemap.xml, from the published comic pages and their
+scripts/comic-NNN-*.md scripts.
+
+Everything is written incrementally: index shards are only rewritten when
+their content changes, and feeds/sitemap list comics oldest-first so a new
+comic is appended in place of the closing tags instead of rewriting the file.
+"""
+
+import re
+import html
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+
+SITE_URL = "https://tubbyretard.com"
+SITE_TITLE = "Tubby Retard"
+SITE_DESCRIPTION = "The World's Worst Yacht Owner - a comic about life aboard with TR."
+
+SHARD_SIZE = 50  # Comics per index shard
+# Build state, kept in a dot-dir (not published, git-ignored)
+STATE_FILE = ".cache/site-index-state.json"
+
+# Search weight per field
+FIELD_WEIGHTS = {"title": 5, "location": 3, "characters": 3, "caption": 2, "dialogue": 1}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "he", "his",
+    "i", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "we", "with", "you",
+}
+
+# Bold labels in scripts that aren't spoken lines
+NON_DIALOGUE_LABELS = {
+    "scene", "visual details", "dall-e prompt", "caption", "title", "slug",
+    "location", "dialogue", "status",
+}
+
+PAGE_PATTERN = re.compile(r'comic-(\d{3})\.html$')
+SCRIPT_PATTERN = re.compile(r'comic-(\d{3})-.+\.md$')
+
+
+@dataclass
+class ComicDoc:
+    number: int
+    title: str
+    url: str
+    date: str  # ISO date
+    location: str = ""
+    caption: str = ""
+    characters: List[str] = field(default_factory=list)
+    dialogue: List[str] = field(default_factory=list)
+    image: str = ""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords (mirrored in archive.html)."""
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower().replace("'", ""))
+            if t not in STOPWORDS and len(t) > 1]
+
+
+def _clean(text: str) -> str:
+    """Strip markdown emphasis, stage directions and quotes from script text."""
+    text = re.sub(r'\*\(.*?\)\*', '', text)
+    text = text.replace('*', '').strip()
+    return text.strip('"“” ')
+
+
+def parse_comic_page(path: Path) -> Optional[ComicDoc]:
+    """Read number, title, date and first panel from a published comic page."""
+    match = PAGE_PATTERN.search(path.name)
+    if not match:
+        return None
+    content = path.read_text(encoding="utf-8")
+
+    title_match = re.search(r'class="comic-title">(.+?)</h1>', content)
+    date_match = re.search(r'class="comic-date">(.+?)</p>', content)
+    image_match = re.search(r'<img src="([^"]+)"[^>]*class="comic-image"', content)
+
+    date = ""
+    if date_match:
+        try:
+            date = datetime.strptime(date_match.group(1).strip(), "%B %d, %Y").date().isoformat()
+        except ValueError:
+            pass
+
+    return ComicDoc(
+        number=int(match.group(1)),
+        title=html.unescape(title_match.group(1).strip()) if title_match else f"Comic #{match.group(1)}",
+        url=path.name,
+        date=date,
+        image=image_match.group(1) if image_match else ""
+    )
+
+
+def parse_script_text(path: Path) -> Dict:
+    """Extract title, location, captions, speakers and dialogue from a script.
+
+    Handles both the draft layout (**Title:**, ### Panel, **Dialogue:** list)
+    and the published layout (## Title:, ## Panel, **Speaker:** "line").
+    """
+    content = path.read_text(encoding="utf-8")
+    fields = {"title": "", "location": "", "caption": "", "characters": [], "dialogue": []}
+
+    title_match = re.search(r'(?:\*\*Title:\*\*|## Title:)\s*(.+)', content)
+    if title_match:
+        fields["title"] = title_match.group(1).strip()
+
+    location_match = re.search(r'\*\*Location:\*\*\s*(.+)', content)
+    if location_match:
+        fields["location"] = location_match.group(1).strip()
+
+    captions = []
+    caption_match = re.search(r'## Caption:\s*\n+(.+?)(?=\n##|\n---|$)', content, re.DOTALL)
+    if caption_match:
+        captions.append(caption_match.group(1).strip())
+    captions.extend(m.strip() for m in re.findall(r'\*\*Caption:\*\*\s*(.+)', content))
+    fields["caption"] = " ".join(captions)
+
+    speakers = []
+
+    def add_line(speaker: str, text: str):
+        speaker = re.sub(r'\s*\(.*?\)', '', speaker).strip()
+        text = _clean(text)
+        if not text:
+            return
+        fields["dialogue"].append(text)
+        # "Sound effect" lines are searchable text but not a character
+        if speaker and not speaker.lower().startswith("sound") and speaker not in speakers:
+            speakers.append(speaker)
+
+    # Published layout: **TR:** "line"
+    for speaker, text in re.findall(r'^\*\*([^*\n]+?):\*\*\s*(.+)$', content, re.MULTILINE):
+        if speaker.strip().lower() not in NON_DIALOGUE_LABELS:
+            add_line(speaker, text)
+
+    # Draft layout: **Dialogue:** followed by "- Speaker: line"
+    for block in re.findall(r'\*\*Dialogue:\*\*(.+?)(?=\n\*\*|\n---|$)', content, re.DOTALL):
+        for speaker, text in re.findall(r'^\s*-\s*([^:\n]+):\s*(.+)$', block, re.MULTILINE):
+            add_line(speaker, text)
+
+    fields["characters"] = speakers
+    return fields
+
+
+def collect_docs(site_dir: Path, scripts_dir: Path) -> List[ComicDoc]:
+    """Published comics (those with a comic-NNN.html page) in publication order."""
+    scripts = {}
+    if scripts_dir.exists():
+        for path in scripts_dir.glob("comic-*.md"):
+            match = SCRIPT_PATTERN.search(path.name)
+            if match:
+                scripts[int(match.group(1))] = path
+
+    docs = []
+    for path in sorted(site_dir.glob("comic-*.html")):
+        doc = parse_comic_page(path)
+        if not doc:
+            continue
+        if doc.number in scripts:
+            fields = parse_script_text(scripts[doc.number])
+            doc.title = doc.title or fields["title"]
+            doc.location = fields["location"]
+            doc.caption = fields["caption"]
+            doc.characters = fields["characters"]
+            doc.dialogue = fields["dialogue"]
+        docs.append(doc)
+
+    docs.sort(key=lambda d: d.number)
+    return docs
+
+
+def build_shard(docs: List[ComicDoc]) -> Dict:
+    """Inverted index for a slice of comics: token -> [[doc, score], ...]."""
+    postings: Dict[str, Dict[int, int]] = {}
+    for local_id, doc in enumerate(docs):
+        for field_name, weight in FIELD_WEIGHTS.items():
+            value = getattr(doc, field_name)
+            text = " ".join(value) if isinstance(value, list) else value
+            for token in tokenize(text):
+                postings.setdefault(token, {})
+                postings[token][local_id] = postings[token].get(local_id, 0) + weight
+
+    return {
+        "docs": [{"n": d.number, "t": d.title, "u": d.url, "d": d.date,
+                  "l": d.location, "c": d.caption[:200]} for d in docs],
+        "postings": {token: sorted(hits.items()) for token, hits in sorted(postings.items())},
+    }
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == content:
+        return False
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+def write_append_only(path: Path, header: str, entries: List[Tuple[str, str]],
+                      footer: str, state: Dict) -> str:
+    """Write header + entries + footer, appending only new tail entries when possible.
+
+    entries are (id, text) pairs in file order. If the file still matches what
+    the state recorded and the old entries are a prefix of the new ones, the
+    new entries overwrite the old footer in place. Returns "unchanged",
+    "appended" or "rewritten".
+    """
+    entry_ids = [[entry_id, _sha1(text)] for entry_id, text in entries]
+    previous = state.get(path.name)
+
+    can_append = (
+        previous is not None and path.exists()
+        and path.stat().st_size == previous["size"]
+        and previous["header"] == _sha1(header + footer)
+        and previous["entries"] == entry_ids[:len(previous["entries"])]
+    )
+
+    if can_append:
+        new_entries = entries[len(previous["entries"]):]
+        if not new_entries:
+            return "unchanged"
+        tail = "".join(text for _, text in new_entries).encode("utf-8")
+        with open(path, 'r+b') as f:
+            f.seek(previous["body_end"])
+            f.write(tail + footer.encode("utf-8"))
+            f.truncate()
+        body_end = previous["body_end"] + len(tail)
+        status = "appended"
+    else:
+        body = (header + "".join(text for _, text in entries)).encode("utf-8")
+        with open(path, 'wb') as f:
+            f.write(body + footer.encode("utf-8"))
+        body_end = len(body)
+        status = "rewritten"
+
+    state[path.name] = {
+        "entries": entry_ids,
+        "header": _sha1(header + footer),
+        "body_end": body_end,
+        "size": path.stat().st_size,
+    }
+    return status
+
+
+class SiteIndexBuilder:
+    def __init__(self, site_dir: str = ".", scripts_dir: str = "scripts", site_url: str = SITE_URL):
+        self.site_dir = Path(site_dir)
+        self.scripts_dir = Path(scripts_dir)
+        self.site_url = site_url.rstrip("/")
+        self.search_dir = self.site_dir / "search"
+        self.state_path = self.site_dir / STATE_FILE
+
+    def _load_state(self) -> Dict:
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+        return {}
+
+    def _absolute(self, url: str) -> str:
+        return f"{self.site_url}/{url}"
+
+    def build(self) -> Dict:
+        docs = collect_docs(self.site_dir, self.scripts_dir)
+        state = self._load_state()
+        results = {"comics": len(docs)}
+
+        results["search"] = self.write_search_index(docs)
+        results["rss"] = self.write_rss(docs, state)
+        results["json_feed"] = self.write_json_feed(docs, state)
+        results["sitemap"] = self.write_sitemap(docs, state)
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        return results
+
+    def write_search_index(self, docs: List[ComicDoc]) -> str:
+        """Write search/index-NNN.json shards plus search/manifest.json."""
+        self.search_dir.mkdir(parents=True, exist_ok=True)
+        shards = []
+        written = 0
+        for start in range(0, len(docs), SHARD_SIZE):
+            name = f"index-{start // SHARD_SIZE:03d}.json"
+            content = json.dumps(build_shard(docs[start:start + SHARD_SIZE]), separators=(",", ":"))
+            if _write_if_changed(self.search_dir / name, content):
+                written += 1
+            # Hash busts browser caches for just the shards that changed
+            shards.append({"file": name, "v": _sha1(content)[:10], "count": len(docs[start:start + SHARD_SIZE])})
+
+        manifest = json.dumps({"total": len(docs), "shards": shards}, separators=(",", ":"))
+        _write_if_changed(self.search_dir / "manifest.json", manifest)
+        return f"{written}/{len(shards)} shards written"
+
+    def write_rss(self, docs: List[ComicDoc], state: Dict) -> str:
+        e = html.escape
+        header = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">\n<channel>\n'
+            f'<title>{e(SITE_TITLE)}</title>\n<link>{e(self.site_url)}/</link>\n'
+            f'<description>{e(SITE_DESCRIPTION)}</description>\n<language>en</language>\n'
+            f'<atom:link href="{e(self._absolute("feed.xml"))}" rel="self" type="application/rss+xml"/>\n'
+        )
+        entries = []
+        for doc in docs:
+            pub_date = ""
+            if doc.date:
+                published = datetime.fromisoformat(doc.date).replace(tzinfo=timezone.utc)
+                pub_date = f'<pubDate>{published.strftime("%a, %d %b %Y %H:%M:%S +0000")}</pubDate>'
+            entries.append((doc.url, (
+                f'<item><title>#{doc.number:03d}: {e(doc.title)}</title>'
+                f'<link>{e(self._absolute(doc.url))}</link>'
+                f'<guid>{e(self._absolute(doc.url))}</guid>{pub_date}'
+                f'<description>{e(doc.caption)}</description></item>\n'
+            )))
+        return write_append_only(self.site_dir / "feed.xml", header, entries, '</channel>\n</rss>\n', state)
+
+    def write_json_feed(self, docs: List[ComicDoc], state: Dict) -> str:
+        header = json.dumps({
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": SITE_TITLE,
+            "home_page_url": f"{self.site_url}/",
+            "feed_url": self._absolute("feed.json"),
+            "description": SITE_DESCRIPTION,
+        })[:-1] + ', "items": [\n'
+        entries = []
+        for i, doc in enumerate(docs):
+            item = {
+                "id": self._absolute(doc.url),
+                "url": self._absolute(doc.url),
+                "title": f"#{doc.number:03d}: {doc.title}",
+                "content_text": doc.caption or doc.title,
+            }
+            if doc.date:
+                item["date_published"] = f"{doc.date}T00:00:00Z"
+            if doc.image:
+                item["image"] = self._absolute(doc.image)
+            entries.append((doc.url, ("" if i == 0 else ",\n") + json.dumps(item)))
+        return write_append_only(self.site_dir / "feed.json", header, entries, "\n]}\n", state)
+
+    def write_sitemap(self, docs: List[ComicDoc], state: Dict) -> str:
+        static_pages = ["index.html", "archive.html", "about.html", "submit.html"]
+        header = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + "".join(f'<url><loc>{html.escape(self._absolute(p))}</loc></url>\n'
+                      for p in static_pages if (self.site_dir / p).exists())
+        )
+        entries = [(doc.url, f'<url><loc>{html.escape(self._absolute(doc.url))}</loc>'
+                             + (f'<lastmod>{doc.date}</lastmod>' if doc.date else '') + '</url>\n')
+                   for doc in docs]
+        return write_append_only(self.site_dir / "sitemap.xml", header, entries, '</urlset>\n', state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build TR search index, feeds and sitemap")
+    parser.add_argument("--site", default=".", help="Site root containing comic-NNN.html")
+    parser.add_argument("--scripts-dir", default="scripts", help="Directory containing comic scripts")
+    parser.add_argument("--site-url", default=SITE_URL, help="Public site URL for feeds and sitemap")
+
+    args = parser.parse_args()
+
+    print("\n🔎 Building search index and feeds...")
+    builder = SiteIndexBuilder(site_dir=args.site, scripts_dir=args.scripts_dir, site_url=args.site_url)
+    results = builder.build()
+    print(f"\nResults: {json.dumps(results, indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
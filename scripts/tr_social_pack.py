@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+TR Comic Social Media Pack
+Turns a comic's finished panels into ready-to-post assets for each platform:
+recomposed grids and strips, smart-cropped story frames, and a caption
+trimmed to the platform's limit. Each image is JPEG quality-searched to
+fit the platform's byte budget.
+
+Platforms render in parallel and are cached by a hash of their inputs, so
+re-running (or adding a platform) only encodes what changed.
+
+Output ({output_dir}/{slug}/):
+  {platform}/{slug}-{platform}[-{n}].jpg
+  {platform}/caption.txt
+  pack.json  (cache keys + file list per platform)
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageStat
+
+from tr_anthology_export import file_sha256
+from tr_artwork_generator import TRArtworkGenerator
+from tr_site_index import SITE_URL, parse_script_text
+
+# Bump when rendering changes so cached packs are rebuilt
+PACK_VERSION = 1
+
+MIN_QUALITY = 40
+MAX_QUALITY = 92
+BACKGROUND = "white"
+GUTTER = 12
+
+CAPTION_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+
+@dataclass
+class PlatformSpec:
+    name: str
+    width: int
+    height: int
+    layout: str  # "grid" (2x2), "strip" (one row) or "frames" (one image per panel)
+    max_bytes: int
+    caption_limit: int
+    caption_band: bool = False  # Print the caption under the art
+
+
+PLATFORMS = {
+    "instagram": PlatformSpec("instagram", 1080, 1080, "grid", 8_000_000, 2200),
+    "instagram-portrait": PlatformSpec("instagram-portrait", 1080, 1350, "grid", 8_000_000, 2200,
+                                       caption_band=True),
+    "story": PlatformSpec("story", 1080, 1920, "frames", 8_000_000, 2200),
+    "x": PlatformSpec("x", 1600, 900, "strip", 5_000_000, 280),
+    "bluesky": PlatformSpec("bluesky", 2000, 1125, "strip", 976_000, 300),
+}
+
+
+@dataclass
+class PackAsset:
+    file: str
+    bytes: int
+    quality: int
+    size: Tuple[int, int]
+
+
+def smart_crop(img: Image.Image, aspect: float) -> Image.Image:
+    """Crop to aspect (w/h), keeping the window with the most edge detail.
+
+    Comic panels put the action (TR, the boat, the punchline) where the line
+    work is densest, so edge energy is a cheap stand-in for saliency.
+    """
+    width, height = img.size
+    if abs(width / height - aspect) < 0.01:
+        return img
+    if width / height > aspect:
+        crop_w, crop_h = round(height * aspect), height
+    else:
+        crop_w, crop_h = width, round(width / aspect)
+
+    # Score candidate windows on a small edge map
+    scale = 128 / max(width, height)
+    edges = img.convert("L").resize((max(1, round(width * scale)), max(1, round(height * scale)))) \
+        .filter(ImageFilter.FIND_EDGES)
+    steps = 16
+    best, best_score = (0, 0), -1.0
+    for i in range(steps + 1):
+        left = round((width - crop_w) * i / steps)
+        top = round((height - crop_h) * i / steps)
+        box = (round(left * scale), round(top * scale),
+               max(round(left * scale) + 1, round((left + crop_w) * scale)),
+               max(round(top * scale) + 1, round((top + crop_h) * scale)))
+        score = ImageStat.Stat(edges.crop(box)).sum[0]
+        if score > best_score:
+            best, best_score = (left, top), score
+    left, top = best
+    return img.crop((left, top, left + crop_w, top + crop_h))
+
+
+def fit_caption(caption: str, limit: int, link: str = SITE_URL) -> str:
+    """Trim to the platform limit on a word boundary, keeping the site link."""
+    suffix = f"\n\n{link}" if link else ""
+    budget = limit - len(suffix)
+    if len(caption) > budget:
+        caption = caption[:max(0, budget - 1)].rsplit(" ", 1)[0].rstrip(" ,.;:") + "…"
+    return caption + suffix
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, max_width: int) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if draw.textlength(candidate, font=font) <= max_width or not line:
+            line = candidate
+        else:
+            lines.append(line)
+            line = word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _draw_caption_band(canvas: Image.Image, caption: str, top: int):
+    draw = ImageDraw.Draw(canvas)
+    band_height = canvas.height - top
+    size = max(18, band_height // 6)
+    try:
+        font = ImageFont.truetype(CAPTION_FONT, size)
+    except OSError:
+        font = ImageFont.load_default()
+    lines = _wrap(draw, caption, font, canvas.width - 4 * GUTTER)
+    max_lines = max(1, (band_height - 2 * GUTTER) // int(size * 1.3))
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip(" ,.;:") + "…"
+    y = top + (band_height - len(lines) * int(size * 1.3)) // 2
+    for line in lines:
+        x = (canvas.width - draw.textlength(line, font=font)) // 2
+        draw.text((x, y), line, fill="black", font=font)
+        y += int(size * 1.3)
+
+
+def compose(spec: PlatformSpec, panels: List[Image.Image], caption: str) -> List[Image.Image]:
+    """Lay panels out for one platform."""
+    if spec.layout == "frames":
+        aspect = spec.width / spec.height
+        return [smart_crop(p, aspect).resize((spec.width, spec.height), Image.Resampling.LANCZOS)
+                for p in panels]
+
+    canvas = Image.new("RGB", (spec.width, spec.height), BACKGROUND)
+    if spec.layout == "grid":
+        columns, rows = 2, (len(panels) + 1) // 2
+    else:
+        columns, rows = len(panels), 1
+
+    art_height = spec.height
+    if spec.caption_band:
+        # Art stays square; the extra height holds the caption
+        art_height = min(spec.height, spec.width * rows // columns)
+
+    cell_w = (spec.width - GUTTER * (columns + 1)) // columns
+    cell_h = (art_height - GUTTER * (rows + 1)) // rows
+    for i, panel in enumerate(panels):
+        cell = smart_crop(panel, cell_w / cell_h).resize((cell_w, cell_h), Image.Resampling.LANCZOS)
+        x = GUTTER + (i % columns) * (cell_w + GUTTER)
+        y = GUTTER + (i // columns) * (cell_h + GUTTER)
+        canvas.paste(cell, (x, y))
+
+    if spec.caption_band and art_height < spec.height and caption:
+        _draw_caption_band(canvas, caption, art_height)
+    return [canvas]
+
+
+def encode_to_budget(img: Image.Image, max_bytes: int) -> Tuple[bytes, int, Tuple[int, int]]:
+    """Highest JPEG quality under max_bytes (binary search), shrinking if needed."""
+    img = img.convert("RGB")
+    while True:
+        best = None
+        lo, hi = MIN_QUALITY, MAX_QUALITY
+        while lo <= hi:
+            quality = (lo + hi) // 2
+            buffer = BytesIO()
+            img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+            if buffer.tell() <= max_bytes:
+                best = (buffer.getvalue(), quality)
+                lo = quality + 1
+            else:
+                hi = quality - 1
+        if best:
+            return best[0], best[1], img.size
+        # Even the floor quality is too big - drop resolution and retry
+        img = img.resize((round(img.width * 0.85), round(img.height * 0.85)), Image.Resampling.LANCZOS)
+
+
+def render_platform(spec: PlatformSpec, panel_paths: List[str], caption: str,
+                    slug: str, out_dir: str) -> List[PackAsset]:
+    """Render, budget-encode and write one platform's assets (runs in a worker)."""
+    directory = Path(out_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.jpg"):
+        stale.unlink()
+
+    panels = []
+    for path in panel_paths:
+        with Image.open(path) as img:
+            panels.append(img.convert("RGB"))
+
+    images = compose(spec, panels, caption)
+    assets = []
+    for i, image in enumerate(images, 1):
+        suffix = f"-{i}" if len(images) > 1 else ""
+        filepath = directory / f"{slug}-{spec.name}{suffix}.jpg"
+        data, quality, size = encode_to_budget(image, spec.max_bytes)
+        filepath.write_bytes(data)
+        assets.append(PackAsset(file=str(filepath), bytes=len(data), quality=quality, size=size))
+
+    (directory / "caption.txt").write_text(fit_caption(caption, spec.caption_limit) + "\n")
+    return assets
+
+
+def find_panels(panels_dir: str, script_path: str, slug: str) -> List[str]:
+    """Finished panels for a comic, preferring text-overlaid finals.
+
+    Published comics are numbered (comic-004-panel1.jpg) while generated
+    ones use the slug, so both names are tried.
+    """
+    keys = [slug]
+    number = re.match(r'comic-(\d+)-', Path(script_path).name)
+    if number:
+        keys.append(number.group(1))
+
+    directory = Path(panels_dir)
+    for key in keys:
+        panels = {}
+        for path in sorted(directory.glob(f"comic-{key}-panel*")):
+            match = re.fullmatch(rf'comic-{re.escape(key)}-panel(\d+)(-final)?\.(png|jpg|jpeg)', path.name)
+            if not match:
+                continue
+            number_, final = int(match.group(1)), bool(match.group(2))
+            # -final beats the raw panel; PNG beats its JPEG copy
+            rank = (final, path.suffix == ".png")
+            if number_ not in panels or rank > panels[number_][0]:
+                panels[number_] = (rank, str(path))
+        if panels:
+            return [panels[n][1] for n in sorted(panels)]
+    return []
+
+
+class SocialPackBuilder:
+    def __init__(self, output_dir: str = "comics/social", workers: int = 0):
+        self.output_dir = Path(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+
+    def _cache_key(self, spec: PlatformSpec, panel_hashes: List[str], caption: str) -> str:
+        payload = json.dumps([PACK_VERSION, asdict(spec), panel_hashes, caption], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def build(self, script_path: str, panels_dir: str, platforms: Optional[List[str]] = None,
+              force: bool = False) -> Dict:
+        script = TRArtworkGenerator.parse_script_file(script_path)
+        slug = script.slug.strip()
+        if script.caption:
+            caption = script.caption.split("\n---")[0].strip()
+        else:
+            # Draft scripts carry their captions per panel
+            caption = " ".join(p.caption for p in script.panels if p.caption) or script.title
+
+        panel_paths = find_panels(panels_dir, script_path, slug)
+        if not panel_paths:
+            print(f"  ❌ No finished panels for {slug} in {panels_dir}")
+            return {"slug": slug, "status": "missing", "platforms": {}}
+        title = script.title
+        if slug == "untitled":
+            # Published scripts use "## Title:" and have no slug - name the pack after the panels
+            slug = Path(panel_paths[0]).name.split("-panel")[0][len("comic-"):]
+            title = parse_script_text(Path(script_path))["title"] or title
+
+        print(f"\n📣 Social pack: {title} ({len(panel_paths)} panels)")
+        pack_dir = self.output_dir / slug
+        pack_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = pack_dir / "pack.json"
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+        panel_hashes = [file_sha256(Path(p)) for p in panel_paths]
+        specs = [PLATFORMS[name] for name in (platforms or PLATFORMS)]
+
+        jobs = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for spec in specs:
+                key = self._cache_key(spec, panel_hashes, caption)
+                cached = manifest.get(spec.name)
+                if (not force and cached and cached["key"] == key
+                        and all(Path(a["file"]).exists() for a in cached["assets"])):
+                    print(f"  ⏭️  {spec.name}: cached")
+                    continue
+                jobs[spec.name] = (key, pool.submit(render_platform, spec, panel_paths, caption,
+                                                    slug, str(pack_dir / spec.name)))
+
+            for name, (key, future) in jobs.items():
+                try:
+                    assets = future.result()
+                except Exception as e:
+                    print(f"  ❌ {name}: {e}")
+                    continue
+                manifest[name] = {"key": key, "assets": [asdict(a) for a in assets]}
+                for asset in assets:
+                    print(f"  ✅ {Path(asset.file).name}: {asset.size[0]}x{asset.size[1]}, "
+                          f"{asset.bytes // 1024}KB @ q{asset.quality}")
+
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_path, manifest_path)
+
+        return {"slug": slug, "status": "success", "rendered": list(jobs),
+                "platforms": {name: manifest[name]["assets"] for name in manifest}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-platform social media assets for a TR comic")
+    parser.add_argument("scripts", nargs="+", help="Comic script .md file(s)")
+    parser.add_argument("--panels-dir", default="comics/final", help="Finished panels directory")
+    parser.add_argument("--output", default="comics/social", help="Output directory")
+    parser.add_argument("--platforms", help=f"Comma-separated subset of: {', '.join(PLATFORMS)}")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Ignore the cache and re-render")
+
+    args = parser.parse_args()
+
+    platforms = [p.strip() for p in args.platforms.split(",")] if args.platforms else None
+    unknown = [p for p in platforms or [] if p not in PLATFORMS]
+    if unknown:
+        parser.error(f"Unknown platform(s): {', '.join(unknown)}")
+
+    builder = SocialPackBuilder(output_dir=args.output, workers=args.workers)
+    for script_path in args.scripts:
+        builder.build(script_path, args.panels_dir, platforms, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+TR Comic Speed-Tier Scheduler
+Picks the cheapest MidAPI speed (relaxed, fast, turbo) for every pending panel
+that still lands each comic before its scheduled_date.
+Reads deadlines from the admin dashboard database and observed latency/cost
+from the MidAPI run log.
+"""
+
+import json
+import time
+import heapq
+import sqlite3
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Optional
+from dataclasses import dataclass, field, asdict
+
+# Cheapest first - order matters for escalation
+SPEED_TIERS = ["relaxed", "fast", "turbo"]
+
+# Fallback numbers until the run log has enough history (see README_midapi.md)
+DEFAULT_TIER_COST = {"relaxed": 0.04, "fast": 0.065, "turbo": 0.10}
+DEFAULT_TIER_LATENCY = {"relaxed": 600.0, "fast": 60.0, "turbo": 30.0}
+
+DEFAULT_DB_PATH = "../admin/data/submissions.db"
+DEFAULT_RUN_LOG = "comics/generated/.midapi-runs.jsonl"
+
+# Comics that still need artwork
+PENDING_STATUSES = ("draft", "art_pending")
+
+# Minimum samples before observed numbers replace the defaults
+MIN_SAMPLES = 3
+
+
+@dataclass
+class TierStats:
+    tier: str
+    cost: float
+    p50: float
+    p90: float
+    samples: int = 0  # Runs the percentiles are computed from (successes and censored)
+    success_rate: float = 1.0
+    censored: int = 0  # Runs abandoned while still pending (timeouts, hedge losers)
+
+
+@dataclass
+class PendingComic:
+    slug: str
+    title: str
+    deadline: Optional[float]  # Unix timestamp, None = no deadline
+    panels: List[int]
+
+
+@dataclass
+class PanelAssignment:
+    slug: str
+    panel: int
+    tier: str
+    cost: float
+    est_finish: float = 0.0
+    deadline: Optional[float] = None
+    at_risk: bool = False
+
+
+@dataclass
+class SchedulePlan:
+    assignments: List[PanelAssignment] = field(default_factory=list)
+    created_at: float = 0.0
+
+    @property
+    def total_cost(self) -> float:
+        return sum(a.cost for a in self.assignments)
+
+    def tiers_for(self, slug: str) -> Dict[int, str]:
+        """Panel number -> speed tier for one comic."""
+        return {a.panel: a.tier for a in self.assignments if a.slug == slug}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of floats."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def load_tier_stats(run_log: str = DEFAULT_RUN_LOG) -> Dict[str, TierStats]:
+    """Summarize observed latency and cost per speed tier from the run log.
+
+    Censored runs (we stopped waiting before they finished) count toward the
+    percentiles at their elapsed time, a lower bound on their real latency.
+    Dropping them would make slow tiers look fast; counting them as failures
+    would skew the success rate.
+    """
+    samples: Dict[str, List[dict]] = {tier: [] for tier in SPEED_TIERS}
+    log_path = Path(run_log)
+
+    if log_path.exists():
+        with open(log_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("speed") in samples:
+                    samples[record["speed"]].append(record)
+
+    stats = {}
+    for tier in SPEED_TIERS:
+        records = samples[tier]
+        latencies = [r["elapsed"] for r in records
+                     if (r.get("success") or r.get("censored")) and r.get("elapsed")]
+        costs = [r["cost"] for r in records if r.get("cost") is not None]
+
+        if len(latencies) >= MIN_SAMPLES:
+            p50 = _percentile(latencies, 50)
+            p90 = _percentile(latencies, 90)
+        else:
+            p50 = p90 = DEFAULT_TIER_LATENCY[tier]
+
+        cost = sum(costs) / len(costs) if len(costs) >= MIN_SAMPLES else DEFAULT_TIER_COST[tier]
+        # Timeouts and hedge losers have an unknown outcome (success is null)
+        finished = [r for r in records if r.get("success") is not None]
+        success_rate = (sum(1 for r in finished if r["success"]) / len(finished)) if finished else 1.0
+
+        stats[tier] = TierStats(tier=tier, cost=cost, p50=p50, p90=p90,
+                                samples=len(latencies), success_rate=success_rate,
+                                censored=sum(1 for r in records if r.get("censored")))
+    return stats
+
+
+def summarize_hedges(run_log: str = DEFAULT_RUN_LOG) -> Dict[str, float]:
+    """Count hedge tasks in the run log, how often they won and their cost."""
+    summary = {"hedges": 0, "wins": 0, "cost": 0.0}
+    log_path = Path(run_log)
+    if not log_path.exists():
+        return summary
+
+    with open(log_path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not record.get("hedge"):
+                continue
+            summary["hedges"] += 1
+            summary["cost"] += record.get("cost") or 0.0
+            if record.get("won"):
+                summary["wins"] += 1
+    return summary
+
+
+def record_run(run_log: str, speed: str, elapsed: float, success: Optional[bool],
+               task_id: Optional[str] = None, **extra) -> None:
+    """Append one generation attempt to the run log."""
+    record = {
+        "ts": time.time(),
+        "speed": speed,
+        "elapsed": round(elapsed, 2),
+        "success": success,
+        "cost": extra.pop("cost", DEFAULT_TIER_COST.get(speed)),
+        "task_id": task_id,
+    }
+    record.update(extra)
+    log_path = Path(run_log)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+class SpeedScheduler:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, run_log: str = DEFAULT_RUN_LOG,
+                 lead_hours: float = 24.0):
+        """Initialize scheduler.
+
+        lead_hours is reserved before each scheduled_date for text overlay,
+        review and publishing.
+        """
+        self.db_path = Path(db_path)
+        self.run_log = run_log
+        self.lead_seconds = lead_hours * 3600
+        self.stats = load_tier_stats(run_log)
+
+    def load_pending_comics(self) -> List[PendingComic]:
+        """Read comics that still need panels from the admin database."""
+        if not self.db_path.exists():
+            print(f"  ⚠️  Database not found: {self.db_path}")
+            return []
+
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            placeholders = ",".join("?" for _ in PENDING_STATUSES)
+            rows = conn.execute(
+                f"""SELECT slug, title, scheduled_date, panel_1, panel_2, panel_3, panel_4
+                    FROM comics WHERE status IN ({placeholders})""",
+                PENDING_STATUSES
+            ).fetchall()
+        finally:
+            conn.close()
+
+        comics = []
+        for slug, title, scheduled_date, *panel_files in rows:
+            missing = [i for i, path in enumerate(panel_files, 1) if not path]
+            if not missing:
+                continue
+            comics.append(PendingComic(
+                slug=slug,
+                title=title,
+                deadline=self._parse_deadline(scheduled_date),
+                panels=missing
+            ))
+        return comics
+
+    def _parse_deadline(self, scheduled_date: Optional[str]) -> Optional[float]:
+        """Convert a scheduled_date column value to an artwork deadline."""
+        if not scheduled_date:
+            return None
+        for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+            try:
+                published = datetime.strptime(scheduled_date, fmt)
+                return published.timestamp() - self.lead_seconds
+            except ValueError:
+                continue
+        return None
+
+    def plan(self, comics: Optional[List[PendingComic]] = None,
+             now: Optional[float] = None) -> SchedulePlan:
+        """Assign a speed tier to every pending panel at minimum cost.
+
+        Panels are generated one at a time (as generate_comic does), earliest
+        deadline first. Everything starts on the cheapest tier; while a comic
+        would miss its deadline, the panel at or ahead of it with the best
+        seconds-saved-per-dollar is escalated to the next tier. If the comic
+        can't be saved, those escalations are undone and it is flagged at_risk.
+        """
+        if comics is None:
+            comics = self.load_pending_comics()
+        now = now or time.time()
+
+        # Earliest deadline first; undated comics go last
+        queue = [(c.deadline if c.deadline is not None else float("inf"), c.slug, c)
+                 for c in comics]
+        heapq.heapify(queue)
+
+        assignments: List[PanelAssignment] = []
+        while queue:
+            _, _, comic = heapq.heappop(queue)
+            for panel in comic.panels:
+                assignments.append(PanelAssignment(
+                    slug=comic.slug,
+                    panel=panel,
+                    tier=SPEED_TIERS[0],
+                    cost=self.stats[SPEED_TIERS[0]].cost,
+                    deadline=comic.deadline
+                ))
+
+        rescuing, before = None, []
+        while True:
+            late_index = self._simulate(assignments, now)
+            if late_index is None:
+                break
+            late_slug = assignments[late_index].slug
+            if late_slug != rescuing:
+                # Remember the tiers so a failed rescue doesn't leave paid-for escalations
+                rescuing, before = late_slug, [(a.tier, a.cost) for a in assignments]
+            if not self._escalate(assignments, late_index):
+                # Already all turbo ahead of this comic - undo, flag it and
+                # keep planning the comics behind it
+                for a, (tier, cost) in zip(assignments, before):
+                    a.tier, a.cost = tier, cost
+                for a in assignments:
+                    if a.slug == late_slug:
+                        a.at_risk = True
+                rescuing = None
+
+        self._simulate(assignments, now)
+        for a in assignments:
+            a.at_risk = a.deadline is not None and a.est_finish > a.deadline
+        return SchedulePlan(assignments=assignments, created_at=now)
+
+    def _simulate(self, assignments: List[PanelAssignment], now: float) -> Optional[int]:
+        """Fill in est_finish and return the index of the first late panel."""
+        clock = now
+        first_late = None
+        for i, a in enumerate(assignments):
+            clock += self.stats[a.tier].p90
+            a.est_finish = clock
+            if first_late is None and a.deadline is not None and clock > a.deadline and not a.at_risk:
+                first_late = i
+        return first_late
+
+    def _escalate(self, assignments: List[PanelAssignment], late_index: int) -> bool:
+        """Move the most cost-effective panel up one tier. False if none can move."""
+        candidates = []
+        for i, a in enumerate(assignments[:late_index + 1]):
+            tier_index = SPEED_TIERS.index(a.tier)
+            if tier_index == len(SPEED_TIERS) - 1:
+                continue
+            current = self.stats[a.tier]
+            faster = self.stats[SPEED_TIERS[tier_index + 1]]
+            saved = current.p90 - faster.p90
+            extra = max(faster.cost - current.cost, 1e-6)
+            if saved > 0:
+                # Max-heap on seconds saved per extra dollar
+                heapq.heappush(candidates, (-saved / extra, i))
+
+        if not candidates:
+            return False
+
+        _, index = heapq.heappop(candidates)
+        a = assignments[index]
+        a.tier = SPEED_TIERS[SPEED_TIERS.index(a.tier) + 1]
+        a.cost = self.stats[a.tier].cost
+        return True
+
+    def print_plan(self, plan: SchedulePlan):
+        """Print a dry-run view of a plan."""
+        print("\n📅 Speed-tier plan")
+        for tier in SPEED_TIERS:
+            s = self.stats[tier]
+            source = "observed" if s.samples >= MIN_SAMPLES else "default"
+            print(f"  {tier:<8} ${s.cost:.3f}/image  p50 {s.p50:.0f}s  p90 {s.p90:.0f}s "
+                  f"({source}, {s.samples} timed runs, {s.censored} censored)")
+
+        hedges = summarize_hedges(self.run_log)
+        if hedges["hedges"]:
+            print(f"  hedges   {hedges['wins']}/{hedges['hedges']} won, ${hedges['cost']:.2f} extra spend")
+
+        if not plan.assignments:
+            print("\n  Nothing pending.")
+            return
+
+        print()
+        for a in plan.assignments:
+            deadline = datetime.fromtimestamp(a.deadline).strftime("%Y-%m-%d %H:%M") if a.deadline else "none"
+            finish = datetime.fromtimestamp(a.est_finish).strftime("%Y-%m-%d %H:%M")
+            flag = "  ⚠️  AT RISK" if a.at_risk else ""
+            print(f"  {a.slug} panel{a.panel}: {a.tier:<8} ${a.cost:.3f}  done ~{finish}  deadline {deadline}{flag}")
+
+        baseline = len(plan.assignments) * self.stats["fast"].cost
+        print(f"\n  Total: ${plan.total_cost:.2f} (all-fast would be ${baseline:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan MidAPI speed tiers from publication deadlines")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Admin dashboard SQLite database")
+    parser.add_argument("--run-log", default=DEFAULT_RUN_LOG, help="MidAPI run log (JSONL)")
+    parser.add_argument("--lead-hours", type=float, default=24.0,
+                        help="Hours reserved before scheduled_date for overlay and review")
+    parser.add_argument("--json", action="store_true", help="Print plan as JSON")
+
+    args = parser.parse_args()
+
+    scheduler = SpeedScheduler(db_path=args.db, run_log=args.run_log, lead_hours=args.lead_hours)
+    plan = scheduler.plan()
+
+    if args.json:
+        print(json.dumps({
+            "total_cost": round(plan.total_cost, 4),
+            "assignments": [asdict(a) for a in plan.assignments]
+        }, indent=2))
+    else:
+        scheduler.print_plan(plan)
+
+
+if __name__ == "__main__":
+    main()
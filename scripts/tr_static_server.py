@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+TR Static Site Server
+Drop-in replacement for `python3 -m http.server` that serves from a thread
+pool, sends files with sendfile(), supports ETag/Last-Modified/Range, sets
+cache headers and serves precompressed .br/.gz siblings.
+
+Build the precompressed siblings first:
+  python tr_static_server.py --precompress ..
+"""
+
+import os
+import re
+import gzip
+import argparse
+import email.utils
+from pathlib import Path
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import brotli  # Optional - only needed to build .br files
+except ImportError:
+    brotli = None
+
+# Text types worth precompressing (images are already compressed)
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".xml", ".svg", ".txt", ".md"}
+MIN_COMPRESS_BYTES = 512
+
+# Preferred encoding first
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Filenames with a content hash (e.g. app.3f9a1c2b.css) never change
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.[a-z0-9]+$')
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_IMAGES = "public, max-age=86400"
+CACHE_REVALIDATE = "no-cache"
+
+# Idle keep-alive connections hold a pool worker; drop them quickly
+KEEPALIVE_TIMEOUT = 5
+MAX_KEEPALIVE_REQUESTS = 100
+
+
+def precompress(root: str, force: bool = False) -> Tuple[int, int]:
+    """Write .gz (and .br if brotli is installed) next to every text asset.
+
+    Returns (files written, bytes saved on the wire for gzip).
+    """
+    written = saved = 0
+    for path in Path(root).rglob("*"):
+        if (path.suffix not in COMPRESSIBLE_EXTENSIONS or not path.is_file()
+                or "node_modules" in path.parts or path.stat().st_size < MIN_COMPRESS_BYTES):
+            continue
+        data = None
+        for encoding, suffix in ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            target = path.with_name(path.name + suffix)
+            if not force and target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            if encoding == "br":
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) >= len(data):
+                continue
+            target.write_bytes(compressed)
+            written += 1
+            if encoding == "gzip":
+                saved += len(data) - len(compressed)
+            print(f"  ✅ {target} ({len(data) // 1024}KB → {len(compressed) // 1024}KB)")
+
+    if brotli is None:
+        print("  ⚠️  brotli not installed - wrote .gz only (pip install brotli)")
+    return written, saved
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding -> {coding: q}. Codings with q=0 are refused."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+class StaticRequestHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with caching, ranges, precompression and sendfile."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    timeout = KEEPALIVE_TIMEOUT  # Socket timeout, so idle connections free their worker
+
+    def end_headers(self):
+        self.send_header("X-Content-Type-Options", "nosniff")
+        # Requests served on this connection (one handler per connection)
+        self._requests = getattr(self, "_requests", 0) + 1
+        if self._requests >= MAX_KEEPALIVE_REQUESTS:
+            # send_header also sets close_connection
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def _cache_control(self, path: str) -> str:
+        name = os.path.basename(path)
+        # ?v=... cache-busts; other query strings (?nav=1) don't make a page immutable
+        if HASHED_NAME.search(name) or "v" in parse_qs(urlsplit(self.path).query):
+            return CACHE_IMMUTABLE
+        if path.endswith((".jpg", ".jpeg", ".png", ".webp", ".gif", ".ico")):
+            return CACHE_IMAGES
+        return CACHE_REVALIDATE
+
+    def _pick_encoding(self, path: str) -> Tuple[str, Optional[str]]:
+        """Return (file to send, Content-Encoding) honoring Accept-Encoding."""
+        accepted = parse_accept_encoding(self.headers.get("Accept-Encoding", ""))
+        if os.path.splitext(path)[1] in COMPRESSIBLE_EXTENSIONS:
+            source_mtime = os.stat(path).st_mtime
+            # Client's q-value first, then our preference order
+            ranked = sorted(ENCODINGS, key=lambda e: -accepted.get(e[0], accepted.get("*", 0.0)))
+            for encoding, suffix in ranked:
+                if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                    continue
+                candidate = path + suffix
+                if os.path.exists(candidate) and os.stat(candidate).st_mtime >= source_mtime:
+                    return candidate, encoding
+        return path, None
+
+    def _parse_range(self, size: int) -> Optional[Tuple[int, int]]:
+        """Single byte range -> (start, end inclusive); None = whole file.
+
+        Multi-range requests are ignored (whole file). The caller answers 416
+        when start > end or start >= size.
+        """
+        header = self.headers.get("Range")
+        if not header:
+            return None
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        if match.group(1):
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else size - 1
+        else:
+            # Suffix range: last N bytes (bytes=-0 is unsatisfiable)
+            suffix = int(match.group(2))
+            start = max(0, size - suffix) if suffix else size
+            end = size - 1
+        if start > end:
+            return (start, end)
+        return (start, min(end, size - 1))
+
+    def send_head(self):
+        # Per-request state - the handler lives for the whole keep-alive connection
+        self._send_range = (0, None)
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Let the base class handle redirects, index.html and listings
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.exists(index):
+                return super().send_head()
+            path = index
+
+        if not os.path.isfile(path) or path.endswith(("/", "\\")):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        send_path, encoding = self._pick_encoding(path)
+        try:
+            f = open(send_path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            stat = os.fstat(f.fileno())
+            etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+            last_modified = self.date_time_string(int(os.stat(path).st_mtime))
+
+            # Conditional requests
+            if_none_match = self.headers.get("If-None-Match")
+            if_modified_since = self.headers.get("If-Modified-Since")
+            not_modified = False
+            if if_none_match:
+                not_modified = etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*"
+            elif if_modified_since:
+                try:
+                    since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+                    not_modified = int(os.stat(path).st_mtime) <= since
+                except (TypeError, ValueError):
+                    pass
+
+            if not_modified:
+                f.close()
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", self._cache_control(path))
+                self.end_headers()
+                return None
+
+            size = stat.st_size
+            byte_range = None if encoding else self._parse_range(size)
+            if byte_range and (byte_range[0] > byte_range[1] or byte_range[0] >= size):
+                f.close()
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+
+            if byte_range:
+                start, end = byte_range
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                start, end = 0, size - 1
+                self.send_response(HTTPStatus.OK)
+
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", self._cache_control(path))
+            if not encoding:
+                # Ranges are ignored for precompressed siblings
+                self.send_header("Accept-Ranges", "bytes")
+            if os.path.splitext(path)[1] in COMPRESSIBLE_EXTENSIONS:
+                self.send_header("Vary", "Accept-Encoding")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.end_headers()
+
+            self._send_range = (start, end - start + 1)
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        """Zero-copy send via sendfile() where the platform supports it."""
+        offset, count = self._send_range
+        self.wfile.flush()
+        try:
+            self.connection.sendfile(source, offset, count)
+        except (AttributeError, OSError, ValueError):
+            source.seek(offset)
+            remaining = count
+            while remaining is None or remaining > 0:
+                chunk = source.read(65536 if remaining is None else min(65536, remaining))
+                if not chunk:
+                    break
+                outputfile.write(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles each connection on a fixed-size thread pool."""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, workers: int = 16, quiet: bool = False):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.quiet = quiet
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the TR site (or precompress its assets)")
+    parser.add_argument("port", nargs="?", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--directory", "-d", default=".", help="Directory to serve")
+    parser.add_argument("--bind", "-b", default="", help="Address to bind (default: all)")
+    parser.add_argument("--workers", type=int, default=16, help="Request handler threads")
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request")
+    parser.add_argument("--precompress", metavar="DIR", help="Write .gz/.br siblings for DIR and exit")
+    parser.add_argument("--force", action="store_true", help="With --precompress: rebuild all siblings")
+
+    args = parser.parse_args()
+
+    if args.precompress:
+        print(f"\n🗜️  Precompressing {args.precompress}...")
+        written, saved = precompress(args.precompress, force=args.force)
+        print(f"\n✅ {written} files written, ~{saved // 1024}KB less per full gzip download")
+        return
+
+    directory = os.path.abspath(args.directory)
+
+    def handler(*handler_args, **handler_kwargs):
+        return StaticRequestHandler(*handler_args, directory=directory, **handler_kwargs)
+
+    server = PooledHTTPServer((args.bind, args.port), handler, workers=args.workers, quiet=args.quiet)
+    print(f"🌐 Serving {directory} on http://localhost:{args.port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+TR Submission Log
+Append-only JSONL log for story submissions with a sidecar offset index,
+so consumers can seek by sequence number or timestamp and resume from a
+saved cursor instead of re-reading the whole file.
+
+Layout ({log_dir}/):
+  requests-{first_seq:012d}.jsonl  segment data, one entry per line
+  requests-{first_seq:012d}.idx    fixed-size records: seq, ts, offset, length
+  cursors/{consumer}.json          next sequence number per consumer
+
+Segments every consumer has finished with are compacted into the
+submission_log table of admin/data/submissions.db.
+"""
+
+import os
+import json
+import time
+import fcntl
+import struct
+import bisect
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+
+DEFAULT_LOG_DIR = "../admin/data/submission-log"
+DEFAULT_DB_PATH = "../admin/data/submissions.db"
+
+SEGMENT_ENTRIES = 100_000  # Entries per segment before rolling over
+FSYNC_EVERY = 64  # Entries per fsync batch
+FSYNC_INTERVAL = 1.0  # Max seconds an acknowledged entry waits for fsync (flusher thread)
+
+INDEX_RECORD = struct.Struct("<QdQI")  # seq, timestamp, byte offset, byte length
+
+
+@dataclass
+class LogEntry:
+    seq: int
+    ts: float
+    data: dict
+
+
+class Segment:
+    """One data file plus its index. Index records are written after the data."""
+
+    def __init__(self, log_dir: Path, first_seq: int):
+        self.first_seq = first_seq
+        self.data_path = log_dir / f"requests-{first_seq:012d}.jsonl"
+        self.index_path = log_dir / f"requests-{first_seq:012d}.idx"
+
+    def __len__(self) -> int:
+        if not self.index_path.exists():
+            return 0
+        return self.index_path.stat().st_size // INDEX_RECORD.size
+
+    @property
+    def last_seq(self) -> int:
+        return self.first_seq + len(self) - 1
+
+    def record(self, index_file, position: int) -> Tuple[int, float, int, int]:
+        index_file.seek(position * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(index_file.read(INDEX_RECORD.size))
+
+    def find_timestamp(self, since: float) -> int:
+        """Position of the first entry with ts >= since (binary search on the index)."""
+        count = len(self)
+        with open(self.index_path, 'rb') as f:
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.record(f, mid)[1] < since:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return lo
+
+    def read(self, start: int = 0, limit: Optional[int] = None) -> Iterator[LogEntry]:
+        """Entries from position start; only entries present in the index are visible."""
+        count = len(self)
+        stop = count if limit is None else min(count, start + limit)
+        if start >= stop:
+            return
+        with open(self.index_path, 'rb') as index_file, open(self.data_path, 'rb') as data_file:
+            seq, ts, offset, _ = self.record(index_file, start)
+            data_file.seek(offset)
+            for _ in range(start, stop):
+                entry = json.loads(data_file.readline())
+                yield LogEntry(seq=entry["seq"], ts=entry["ts"], data=entry["data"])
+
+
+def _line_seq(line: bytes) -> Optional[int]:
+    try:
+        return json.loads(line)["seq"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class SubmissionLog:
+    def __init__(self, log_dir: str = DEFAULT_LOG_DIR, segment_entries: int = SEGMENT_ENTRIES,
+                 fsync_every: int = FSYNC_EVERY, fsync_interval: float = FSYNC_INTERVAL):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        (self.log_dir / "cursors").mkdir(exist_ok=True)
+        self.segment_entries = segment_entries
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._lock_file = None
+        self._data_file = None
+        self._index_file = None
+        self._active: Optional[Segment] = None
+        self._next_seq = 0
+        self._last_ts = 0.0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # The flusher thread fsyncs quiet logs; appends, flushes and rolls share the lock
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    # Segments
+
+    def segments(self) -> List[Segment]:
+        firsts = sorted(int(p.stem.split("-")[1]) for p in self.log_dir.glob("requests-*.jsonl"))
+        return [Segment(self.log_dir, first) for first in firsts]
+
+    def _segment_for(self, seq: int, segments: List[Segment]) -> Optional[Segment]:
+        firsts = [s.first_seq for s in segments]
+        i = bisect.bisect_right(firsts, seq) - 1
+        return segments[i] if i >= 0 else None
+
+    # Writing
+
+    def open_writer(self):
+        """Take the single-writer lock and recover the tail of the active segment."""
+        # Under the lock: two threads opening at once would each flock() their
+        # own .lock descriptor and the second would wait on the first forever
+        with self._lock:
+            if self._data_file:
+                return
+            self._lock_file = open(self.log_dir / ".lock", 'w')
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+            segments = self.segments()
+            if segments:
+                self._active = segments[-1]
+                self._recover(self._active)
+                self._next_seq = self._active.first_seq + len(self._active)
+            else:
+                self._next_seq = self._compacted_through() + 1
+                self._active = Segment(self.log_dir, self._next_seq)
+
+            self._data_file = open(self._active.data_path, 'ab')
+            self._index_file = open(self._active.index_path, 'ab')
+
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        # Bounds the fsync wait when appends stop before a batch fills
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"  ⚠️  Submission log fsync failed: {e}")
+
+    def _recover(self, segment: Segment):
+        """Make the index and data agree after a crash.
+
+        Index records pointing past the data (the index reached disk, the data
+        didn't) are dropped, complete lines written after the last index record
+        are indexed, and a torn data tail is cut off. The data file is only
+        ever shortened.
+        """
+        with open(segment.index_path, 'r+b' if segment.index_path.exists() else 'w+b') as index_file, \
+                open(segment.data_path, 'r+b') as data_file:
+            size = index_file.seek(0, os.SEEK_END)
+            count = size // INDEX_RECORD.size
+            while count:
+                seq, _, offset, length = segment.record(index_file, count - 1)
+                data_file.seek(offset)
+                line = data_file.read(length)
+                if len(line) == length and line.endswith(b"\n") and _line_seq(line) == seq:
+                    break
+                count -= 1
+            index_file.truncate(count * INDEX_RECORD.size)
+
+            end = 0
+            if count:
+                _, self._last_ts, offset, length = segment.record(index_file, count - 1)
+                end = offset + length
+
+            data_file.seek(end)
+            index_file.seek(0, os.SEEK_END)
+            for line in iter(data_file.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                index_file.write(INDEX_RECORD.pack(entry["seq"], entry["ts"], end, len(line)))
+                self._last_ts = entry["ts"]
+                end += len(line)
+            data_file.truncate(end)
+
+    def append(self, data: dict) -> int:
+        """Append one submission. Returns its sequence number.
+
+        Durable after the next fsync batch (see flush()).
+        """
+        with self._lock:
+            self.open_writer()
+            return self._append(data)
+
+    def _append(self, data: dict) -> int:
+        if len(self._active) >= self.segment_entries:
+            self._roll()
+
+        seq = self._next_seq
+        # Timestamps never go backwards so the index stays sorted for seeks
+        ts = max(time.time(), self._last_ts)
+        line = (json.dumps({"seq": seq, "ts": ts, "data": data}, separators=(",", ":")) + "\n").encode()
+
+        offset = self._data_file.tell()
+        self._data_file.write(line)
+        self._data_file.flush()
+        self._index_file.write(INDEX_RECORD.pack(seq, ts, offset, len(line)))
+        self._index_file.flush()
+
+        self._next_seq += 1
+        self._last_ts = ts
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.flush()
+        return seq
+
+    def flush(self):
+        """fsync pending appends (data before index)."""
+        with self._lock:
+            if not self._data_file or not self._unsynced:
+                return
+            os.fsync(self._data_file.fileno())
+            os.fsync(self._index_file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def _roll(self):
+        self.flush()
+        self._data_file.close()
+        self._index_file.close()
+        self._active = Segment(self.log_dir, self._next_seq)
+        self._data_file = open(self._active.data_path, 'ab')
+        self._index_file = open(self._active.index_path, 'ab')
+
+    def close(self):
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+            self._flusher = None
+        if self._data_file:
+            self.flush()
+            self._data_file.close()
+            self._index_file.close()
+            self._data_file = self._index_file = None
+        if self._lock_file:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Reading
+
+    def read(self, from_seq: int = 0, limit: Optional[int] = None) -> Iterator[LogEntry]:
+        """Entries with seq >= from_seq, seeking straight to the right segment and offset."""
+        segments = self.segments()
+        if not segments:
+            return
+        from_seq = max(from_seq, segments[0].first_seq)
+        segment = self._segment_for(from_seq, segments)
+        remaining = limit
+        for seg in segments[segments.index(segment):]:
+            start = max(0, from_seq - seg.first_seq)
+            for entry in seg.read(start, remaining):
+                yield entry
+                if remaining is not None:
+                    remaining -= 1
+            if remaining is not None and remaining <= 0:
+                return
+
+    def seq_at(self, since: float) -> int:
+        """Sequence number of the first entry at or after timestamp since."""
+        segments = [s for s in self.segments() if len(s)]
+        if not segments:
+            return self._compacted_through() + 1
+        # Last segment whose first entry is before since
+        firsts = []
+        for seg in segments:
+            with open(seg.index_path, 'rb') as f:
+                firsts.append(seg.record(f, 0)[1])
+        i = max(0, bisect.bisect_left(firsts, since) - 1)
+        for seg in segments[i:]:
+            position = seg.find_timestamp(since)
+            if position < len(seg):
+                return seg.first_seq + position
+        return segments[-1].last_seq + 1
+
+    def stats(self) -> Dict:
+        segments = self.segments()
+        return {
+            "segments": len(segments),
+            "entries": sum(len(s) for s in segments),
+            "first_seq": segments[0].first_seq if segments else None,
+            "next_seq": segments[-1].first_seq + len(segments[-1]) if segments else None,
+            "bytes": sum(s.data_path.stat().st_size for s in segments),
+            "cursors": self.cursors(),
+        }
+
+    # Consumer cursors
+
+    def _cursor_path(self, consumer: str) -> Path:
+        return self.log_dir / "cursors" / f"{consumer}.json"
+
+    def cursor(self, consumer: str) -> int:
+        """Next sequence number the consumer should read."""
+        path = self._cursor_path(consumer)
+        if not path.exists():
+            return 0
+        with open(path, 'r') as f:
+            return json.load(f)["next_seq"]
+
+    def check_cursor(self, consumer: str) -> int:
+        """The consumer's cursor; ValueError if the entries it needs were compacted."""
+        next_seq = self.cursor(consumer)
+        compacted = self._compacted_through()
+        if next_seq <= compacted:
+            raise ValueError(
+                f"Consumer {consumer} is at seq {next_seq}, but entries through {compacted} were "
+                f"compacted into the submission_log table. Read them from there, then "
+                f"commit({consumer!r}, {compacted + 1}).")
+        return next_seq
+
+    def commit(self, consumer: str, next_seq: int):
+        """Atomically save the consumer's position."""
+        path = self._cursor_path(consumer)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"next_seq": next_seq, "updated": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def cursors(self) -> Dict[str, int]:
+        return {p.stem: self.cursor(p.stem) for p in sorted((self.log_dir / "cursors").glob("*.json"))}
+
+    def consume(self, consumer: str, batch_size: int = 100) -> Iterator[List[LogEntry]]:
+        """Yield batches from the consumer's cursor; the cursor advances after each batch is handled."""
+        while True:
+            next_seq = self.check_cursor(consumer)
+            batch = list(self.read(next_seq, batch_size))
+            if not batch:
+                return
+            yield batch
+            self.commit(consumer, batch[-1].seq + 1)
+
+    # Compaction
+
+    def _compacted_through(self) -> int:
+        marker = self.log_dir / "compacted.json"
+        if marker.exists():
+            with open(marker, 'r') as f:
+                return json.load(f)["through_seq"]
+        return -1
+
+    def compact(self, db_path: str = DEFAULT_DB_PATH) -> int:
+        """Move segments every consumer has read past into SQLite.
+
+        The active (last) segment is never compacted. Returns entries moved.
+        """
+        cursors = self.cursors()
+        if not cursors:
+            return 0
+        low_water = min(cursors.values())
+        segments = self.segments()[:-1]
+        done = [s for s in segments if len(s) and s.last_seq < low_water]
+        if not done:
+            return 0
+
+        conn = sqlite3.connect(db_path)
+        moved = 0
+        try:
+            conn.execute("""CREATE TABLE IF NOT EXISTS submission_log (
+                seq INTEGER PRIMARY KEY,
+                ts REAL NOT NULL,
+                data TEXT NOT NULL
+            )""")
+            for seg in done:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO submission_log (seq, ts, data) VALUES (?, ?, ?)",
+                        ((e.seq, e.ts, json.dumps(e.data)) for e in seg.read())
+                    )
+                moved += len(seg)
+                marker = self.log_dir / "compacted.json"
+                with open(marker.with_suffix(".tmp"), 'w') as f:
+                    json.dump({"through_seq": seg.last_seq}, f)
+                os.replace(marker.with_suffix(".tmp"), marker)
+                seg.data_path.unlink()
+                seg.index_path.unlink()
+        finally:
+            conn.close()
+        return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TR submission log")
+    parser.add_argument("action", choices=["append", "read", "consume", "stats", "compact"])
+    parser.add_argument("--log-dir", default=DEFAULT_LOG_DIR, help="Log directory")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database for compaction")
+    parser.add_argument("--json", help="append: submission JSON (default: one object per stdin line)")
+    parser.add_argument("--from-seq", type=int, default=0, help="read: first sequence number")
+    parser.add_argument("--since", type=float, help="read: first entry at/after this Unix timestamp")
+    parser.add_argument("--limit", type=int, default=20, help="read/consume: max entries")
+    parser.add_argument("--consumer", help="consume: consumer name for the cursor")
+
+    args = parser.parse_args()
+    log = SubmissionLog(args.log_dir)
+
+    if args.action == "append":
+        import sys
+        lines = [args.json] if args.json else [l for l in sys.stdin if l.strip()]
+        with log:
+            seqs = [log.append(json.loads(line)) for line in lines]
+        if seqs:
+            print(f"✅ Appended {len(seqs)} entries (seq {seqs[0]}-{seqs[-1]})")
+
+    elif args.action == "read":
+        from_seq = log.seq_at(args.since) if args.since is not None else args.from_seq
+        for entry in log.read(from_seq, args.limit):
+            print(json.dumps({"seq": entry.seq, "ts": entry.ts, "data": entry.data}))
+
+    elif args.action == "consume":
+        if not args.consumer:
+            parser.error("--consumer is required for consume")
+        try:
+            next_seq = log.check_cursor(args.consumer)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        batch = list(log.read(next_seq, args.limit))
+        for entry in batch:
+            print(json.dumps({"seq": entry.seq, "ts": entry.ts, "data": entry.data}))
+        if batch:
+            log.commit(args.consumer, batch[-1].seq + 1)
+
+    elif args.action == "stats":
+        stats = log.stats()
+        print(f"\n📜 Submission log: {args.log_dir}")
+        print(f"  {stats['entries']} entries in {stats['segments']} segments ({stats['bytes'] // 1024}KB)")
+        print(f"  Sequence range: {stats['first_seq']} → {stats['next_seq']}")
+        for consumer, next_seq in stats["cursors"].items():
+            print(f"  Cursor {consumer}: next {next_seq}")
+
+    elif args.action == "compact":
+        moved = log.compact(args.db)
+        print(f"✅ Compacted {moved} entries into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
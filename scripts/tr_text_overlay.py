@@ -7,12 +7,89 @@ Adds speech bubbles, captions, and dialogue to generated comic panels
 import os
 import re
 import json
+import html
+import shutil
 import argparse
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
-import textwrap
+
+from tr_palette_encode import PaletteOptions, encode_png
+from tr_pixel_cache import PixelCache, open_pixel_cache, DEFAULT_CACHE_DIR
+
+# Bubble may move to the opposite corner when the art there is this much quieter
+VERTICAL_FLIPS = {"top-left": "bottom-left", "bottom-left": "top-left",
+                  "top-right": "bottom-right", "bottom-right": "top-right",
+                  "top-center": "bottom-center", "bottom-center": "top-center"}
+QUIETER_BY = 0.7
+
+FONT_DIR = "/usr/share/fonts/truetype/dejavu"
+BUBBLE_FONT = f"{FONT_DIR}/DejaVuSans-Bold.ttf"
+CAPTION_FONT = f"{FONT_DIR}/DejaVuSans.ttf"
+NARRATOR_FONT = f"{FONT_DIR}/DejaVuSans-Oblique.ttf"
+
+# Caption and speaker-label sizes keep their ratio to the bubble size (18/16/14)
+CAPTION_RATIO = 16 / 18
+NARRATOR_RATIO = 14 / 18
+MIN_FONT_SIZE = 10
+LINE_SPACING = 1.25  # Line height as a multiple of font size
+BUBBLE_PADDING = 15
+CAPTION_MARGIN = 20
+MAX_BUBBLE_SHARE = 0.3  # Tallest a bubble may get, as a share of panel height
+MAX_CAPTION_SHARE = 0.25
+REFERENCE_SIZE = 100  # Glyph advances are measured once at this size and scaled
+FIT_SLACK = 1.03  # Hinting makes small sizes slightly wider than scaled advances
+
+
+def load_font(path: str, size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:  # Pillow < 10.1 only has the fixed-size bitmap font
+            return ImageFont.load_default()
+
+
+class GlyphAdvances:
+    """Character widths for one typeface, measured once and scaled to any size."""
+    
+    def __init__(self, font: ImageFont.ImageFont):
+        self.scalable = hasattr(font, "font_variant")
+        self.font = font.font_variant(size=REFERENCE_SIZE) if self.scalable else font
+        self._advances: Dict[str, float] = {}
+    
+    def width(self, text: str) -> float:
+        """Width at REFERENCE_SIZE."""
+        total = 0.0
+        for char in text:
+            advance = self._advances.get(char)
+            if advance is None:
+                advance = self._advances[char] = self.font.getlength(char)
+            total += advance
+        return total
+    
+    def scale(self, size: int) -> float:
+        return size / REFERENCE_SIZE if self.scalable else 1.0
+
+
+def wrap_words(words: List[str], widths: List[float], space: float, max_width: float) -> List[str]:
+    """Greedy word wrap by pixel width. A word wider than max_width gets its own line."""
+    lines, line, line_width = [], [], 0.0
+    for word, width in zip(words, widths):
+        if line and line_width + space + width > max_width:
+            lines.append(" ".join(line))
+            line, line_width = [], 0.0
+        line_width += space + width if line else width
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def line_height(font: ImageFont.ImageFont) -> int:
+    return round(getattr(font, "size", 14) * LINE_SPACING)
 
 
 @dataclass
@@ -26,6 +103,23 @@ class SpeechBubble:
     style: str = "round"  # "round", "square", "thought", "shout"
 
 
+@dataclass
+class BubbleLayout:
+    style: str
+    box: Tuple[int, int, int, int]
+    lines: List[Tuple[int, int, str]] = field(default_factory=list)  # (x, y, text)
+    tail: List[Tuple[int, int]] = field(default_factory=list)  # Round bubble tail polygon
+    trail: List[Tuple[int, int, int, int]] = field(default_factory=list)  # Thought bubble dots
+    outline: List[Tuple[int, int]] = field(default_factory=list)  # Shout bubble polygon
+    label: Optional[Tuple[int, int, str]] = None  # Speaker label
+
+
+@dataclass
+class CaptionLayout:
+    box: Tuple[int, int, int, int]
+    lines: List[Tuple[int, int, str]] = field(default_factory=list)
+
+
 @dataclass
 class ComicPanel:
     number: int
@@ -35,21 +129,81 @@ class ComicPanel:
 
 
 class TextOverlayTool:
-    def __init__(self, output_dir: str = "comics/final"):
+    def __init__(self, output_dir: str = "comics/final", palette: Optional[PaletteOptions] = None,
+                 pixels: Optional[PixelCache] = None, font_size: int = 18):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.palette = palette  # Write finals as adaptive-palette PNGs
+        self.pixels = pixels  # With a pixel cache, bubbles avoid busy art
+        self.font_size = font_size  # Largest bubble size; fit_comic shrinks it to fit
+        
+        # Comic-style fonts (fall back to the default font if not installed)
+        self.set_font_size(font_size)
+        self.bubble_advances = GlyphAdvances(self.bubble_font)
+        self.caption_advances = GlyphAdvances(self.caption_font)
+    
+    def set_font_size(self, size: int):
+        """Load all three fonts for a bubble font size."""
+        self.bubble_font = load_font(BUBBLE_FONT, size)
+        self.caption_font = load_font(CAPTION_FONT, max(1, round(size * CAPTION_RATIO)))
+        self.narrator_font = load_font(NARRATOR_FONT, max(1, round(size * NARRATOR_RATIO)))
+    
+    def wrap_text(self, text: str, font: ImageFont.ImageFont, advances: GlyphAdvances,
+                  max_width: float) -> List[str]:
+        """Wrap text to max_width pixels at font's size."""
+        scale = advances.scale(getattr(font, "size", REFERENCE_SIZE)) * FIT_SLACK
+        words = text.split()
+        return wrap_words(words, [advances.width(w) * scale for w in words],
+                          advances.width(" ") * scale, max_width)
+    
+    def fit_comic(self, panels: List[ComicPanel], panel_width: int, panel_height: int) -> int:
+        """Pick one font size for every panel of a comic and switch to it.
+        
+        Binary search for the largest size, up to font_size, at which every
+        bubble and caption fits its box. Word widths are measured once from
+        cached glyph advances, so each probe is arithmetic only.
+        """
+        if not (self.bubble_advances.scalable and self.caption_advances.scalable):
+            return self.font_size
+        
+        # (advances, size ratio, words, unit widths, unit space, max width, max height)
+        blocks = []
+        for panel in panels:
+            for bubble in panel.bubbles:
+                words = bubble.text.split()
+                blocks.append((self.bubble_advances, 1.0, words,
+                               [self.bubble_advances.width(w) for w in words], self.bubble_advances.width(" "),
+                               bubble.width - BUBBLE_PADDING * 2,
+                               panel_height * MAX_BUBBLE_SHARE - BUBBLE_PADDING * 2))
+            if panel.caption:
+                words = panel.caption.split()
+                blocks.append((self.caption_advances, CAPTION_RATIO, words,
+                               [self.caption_advances.width(w) for w in words], self.caption_advances.width(" "),
+                               panel_width - CAPTION_MARGIN * 2,
+                               panel_height * MAX_CAPTION_SHARE - 20))
+        
+        def fits(size: int) -> bool:
+            for advances, ratio, words, widths, space, max_width, max_height in blocks:
+                font_size = max(1, round(size * ratio))
+                scale = advances.scale(font_size) * FIT_SLACK
+                scaled = [w * scale for w in widths]
+                if scaled and max(scaled) > max_width:
+                    return False
+                lines = wrap_words(words, scaled, space * scale, max_width)
+                if len(lines) * round(font_size * LINE_SPACING) > max_height:
+                    return False
+            return True
+        
+        low, high, best = MIN_FONT_SIZE, self.font_size, MIN_FONT_SIZE
+        while low <= high:
+            mid = (low + high) // 2
+            if fits(mid):
+                best, low = mid, mid + 1
+            else:
+                high = mid - 1
         
-        # Default fonts - will fall back to system defaults if not found
-        try:
-            # Comic-style fonts (will use system defaults if not available)
-            self.bubble_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 18)
-            self.caption_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-            self.narrator_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Oblique.ttf", 14)
-        except:
-            # Fallback to default font
-            self.bubble_font = ImageFont.load_default()
-            self.caption_font = ImageFont.load_default()
-            self.narrator_font = ImageFont.load_default()
+        self.set_font_size(best)
+        return best
     
     def load_panel_data(self, script_path: str) -> List[ComicPanel]:
         """Extract dialogue and captions from comic script."""
@@ -57,24 +211,35 @@ class TextOverlayTool:
             content = f.read()
         
         panels = []
-        panel_sections = re.split(r'### Panel \d+:', content)[1:]
+        header, *panel_sections = re.split(r'### Panel \d+:', content)
+        
+        # Scripts give the slug once in the header; a panel may override it
+        slug_match = re.search(r'\*\*Slug:\*\* (.+)', header)
+        default_slug = slug_match.group(1).strip() if slug_match else None
         
         for i, section in enumerate(panel_sections, 1):
-            panel = self._parse_panel_text(i, section)
-            if panel:
-                panels.append(panel)
+            panel = self._parse_panel_text(i, section, default_slug)
+            if not panel:
+                print(f"  ⚠️  Panel {i}: no slug found, skipping")
+                continue
+            if not panel.bubbles and not panel.caption:
+                print(f"  ⚠️  Panel {i}: no dialogue or caption found")
+            panels.append(panel)
         
         return panels
     
-    def _parse_panel_text(self, number: int, section: str) -> Optional[ComicPanel]:
+    def _parse_panel_text(self, number: int, section: str,
+                          default_slug: Optional[str] = None) -> Optional[ComicPanel]:
         """Parse dialogue and captions from panel section."""
         # Find image path
         slug_match = re.search(r'\*\*Slug:\*\* (.+)', section)
-        if not slug_match:
-            # Get slug from parent document
+        if slug_match:
+            slug = slug_match.group(1).strip()
+        elif default_slug:
+            slug = default_slug
+        else:
             return None
         
-        slug = slug_match.group(1).strip()
         image_path = f"comics/generated/comic-{slug}-panel{number}.png"
         
         # Extract dialogue
@@ -82,10 +247,10 @@ class TextOverlayTool:
         dialogue_match = re.search(r'\*\*Dialogue:\*\*(.+?)(?=\*\*|$)', section, re.DOTALL)
         if dialogue_match:
             dialogue_text = dialogue_match.group(1).strip()
-            # Parse "Speaker: Text" format
+            # Parse "Speaker: Text" format, optionally as a "- " list item
             lines = dialogue_text.split('\n')
             for line in lines:
-                if ':' in line and not line.startswith('-'):
+                if ':' in line:
                     speaker, text = line.split(':', 1)
                     speaker = speaker.strip('- ')
                     text = text.strip('" ')
@@ -131,75 +296,127 @@ class TextOverlayTool:
         else:
             return "bottom-center"
     
-    def create_speech_bubble(self, draw: ImageDraw.Draw, bubble: SpeechBubble, 
-                            panel_width: int, panel_height: int) -> Tuple[int, int, int, int]:
-        """Draw a speech bubble and return its bounding box."""
+    def layout_speech_bubble(self, draw: ImageDraw.Draw, bubble: SpeechBubble,
+                             panel_width: int, panel_height: int) -> BubbleLayout:
+        """Compute bubble geometry and text positions without drawing."""
         # Calculate bubble dimensions
         max_width = bubble.width
-        wrapped_text = textwrap.fill(bubble.text, width=30)  # ~30 chars per line
-        lines = wrapped_text.split('\n')
+        padding = BUBBLE_PADDING
+        lines = self.wrap_text(bubble.text, self.bubble_font, self.bubble_advances, max_width - padding * 2)
         
         # Get text dimensions
-        line_heights = [draw.textbbox((0, 0), line, font=self.bubble_font)[3] - 
-                       draw.textbbox((0, 0), line, font=self.bubble_font)[1] for line in lines]
-        max_line_height = max(line_heights) if line_heights else 20
+        step = line_height(self.bubble_font)
+        text_width = max((draw.textlength(line, font=self.bubble_font) for line in lines), default=0)
+        text_height = len(lines) * step
         
-        text_width = max([draw.textbbox((0, 0), line, font=self.bubble_font)[2] - 
-                         draw.textbbox((0, 0), line, font=self.bubble_font)[0] for line in lines])
-        text_height = sum(line_heights) + (len(lines) - 1) * 5  # 5px spacing between lines
-        
-        # Bubble padding
-        padding = 15
-        bubble_width = min(text_width + padding * 2, max_width)
+        bubble_width = min(round(text_width) + padding * 2, max_width)
         bubble_height = text_height + padding * 2
         
         # Calculate position based on requested location
         x, y = self._calculate_bubble_position(bubble.position, bubble_width, bubble_height, 
                                               panel_width, panel_height, bubble.x, bubble.y)
         
-        # Draw bubble based on style
+        layout = BubbleLayout(style=bubble.style, box=(x, y, x + bubble_width, y + bubble_height))
+        
         if bubble.style == "round":
-            # Rounded rectangle bubble
-            corner_radius = 20
-            draw.rounded_rectangle([x, y, x + bubble_width, y + bubble_height], 
-                                 radius=corner_radius, fill="white", outline="black", width=2)
-            
             # Add little tail pointing to speaker (simplified - always points down)
             tail_x = x + bubble_width // 2
             tail_y = y + bubble_height
-            draw.polygon([(tail_x - 10, tail_y), (tail_x + 10, tail_y), (tail_x, tail_y + 15)], 
-                        fill="white", outline="black")
-            
+            layout.tail = [(tail_x - 10, tail_y), (tail_x + 10, tail_y), (tail_x, tail_y + 15)]
         elif bubble.style == "thought":
-            # Cloud-like bubble for thoughts
-            draw.ellipse([x, y, x + bubble_width, y + bubble_height], fill="white", outline="black", width=2)
             # Small bubbles leading to character
-            draw.ellipse([x + 10, y + bubble_height, x + 20, y + bubble_height + 10], fill="white", outline="black")
-            draw.ellipse([x + 5, y + bubble_height + 8, x + 12, y + bubble_height + 15], fill="white", outline="black")
-            
+            layout.trail = [(x + 10, y + bubble_height, x + 20, y + bubble_height + 10),
+                            (x + 5, y + bubble_height + 8, x + 12, y + bubble_height + 15)]
         elif bubble.style == "shout":
             # Jagged edges for shouting
-            points = self._create_shout_bubble_points(x, y, bubble_width, bubble_height)
-            draw.polygon(points, fill="white", outline="black")
+            layout.outline = self._create_shout_bubble_points(x, y, bubble_width, bubble_height)
         
-        else:  # square or default
-            draw.rectangle([x, y, x + bubble_width, y + bubble_height], 
-                         fill="white", outline="black", width=2)
-        
-        # Draw text
+        # Text lines
         text_y = y + padding
         for line in lines:
-            text_x = x + padding
-            draw.text((text_x, text_y), line, fill="black", font=self.bubble_font)
-            text_y += max_line_height + 5
+            layout.lines.append((x + padding, text_y, line))
+            text_y += step
         
         # Add speaker label if not narrator
         if bubble.speaker and bubble.speaker not in ["Narrator", "Caption"]:
-            label_text = f"— {bubble.speaker}"
-            label_y = y + bubble_height + 5
-            draw.text((x, label_y), label_text, fill="#666666", font=self.narrator_font)
+            layout.label = (x, y + bubble_height + 5, f"— {bubble.speaker}")
         
-        return (x, y, x + bubble_width, y + bubble_height)
+        return layout
+    
+    def draw_speech_bubble(self, draw: ImageDraw.Draw, layout: BubbleLayout):
+        """Draw a laid-out speech bubble onto the panel."""
+        x, y, x2, y2 = layout.box
+        
+        # Draw bubble based on style
+        if layout.style == "round":
+            # Rounded rectangle bubble
+            corner_radius = 20
+            draw.rounded_rectangle([x, y, x2, y2], 
+                                 radius=corner_radius, fill="white", outline="black", width=2)
+            draw.polygon(layout.tail, fill="white", outline="black")
+            
+        elif layout.style == "thought":
+            # Cloud-like bubble for thoughts
+            draw.ellipse([x, y, x2, y2], fill="white", outline="black", width=2)
+            for ellipse in layout.trail:
+                draw.ellipse(list(ellipse), fill="white", outline="black")
+            
+        elif layout.style == "shout":
+            draw.polygon(layout.outline, fill="white", outline="black")
+        
+        else:  # square or default
+            draw.rectangle([x, y, x2, y2], 
+                         fill="white", outline="black", width=2)
+        
+        # Draw text
+        for text_x, text_y, line in layout.lines:
+            draw.text((text_x, text_y), line, fill="black", font=self.bubble_font)
+        
+        if layout.label:
+            label_x, label_y, label_text = layout.label
+            draw.text((label_x, label_y), label_text, fill="#666666", font=self.narrator_font)
+    
+    def create_speech_bubble(self, draw: ImageDraw.Draw, bubble: SpeechBubble, 
+                            panel_width: int, panel_height: int) -> Tuple[int, int, int, int]:
+        """Draw a speech bubble and return its bounding box."""
+        layout = self.layout_speech_bubble(draw, bubble, panel_width, panel_height)
+        self.draw_speech_bubble(draw, layout)
+        return layout.box
+    
+    def _detail_map(self, image_path: str):
+        """Edge strength of the panel at 256px from the pixel cache, or None."""
+        if not self.pixels or not Path(image_path).exists():
+            return None
+        gray = self.pixels.get(image_path, 256, "L").astype("float32")
+        edges = abs(gray[1:, :] - gray[:-1, :])[:, :-1] + abs(gray[:, 1:] - gray[:, :-1])[:-1, :]
+        return edges
+    
+    def _quieter_position(self, draw: ImageDraw.Draw, bubble: SpeechBubble, detail,
+                          panel_width: int, panel_height: int) -> str:
+        """Flip top/bottom when the other corner covers clearly less line work."""
+        flipped = VERTICAL_FLIPS.get(bubble.position)
+        if detail is None or not flipped:
+            return bubble.position
+        rows, cols = detail.shape
+        
+        def score(position: str) -> float:
+            layout = self.layout_speech_bubble(draw, replace(bubble, position=position),
+                                               panel_width, panel_height)
+            x, y, x2, y2 = layout.box
+            region = detail[max(0, y * rows // panel_height):max(1, y2 * rows // panel_height),
+                            max(0, x * cols // panel_width):max(1, x2 * cols // panel_width)]
+            return float(region.mean()) if region.size else 0.0
+        
+        return flipped if score(flipped) < score(bubble.position) * QUIETER_BY else bubble.position
+    
+    def place_bubbles(self, draw: ImageDraw.Draw, panel: ComicPanel,
+                      panel_width: int, panel_height: int) -> List[SpeechBubble]:
+        """Panel bubbles, moved off busy art when a pixel cache is available."""
+        detail = self._detail_map(panel.image_path)
+        if detail is None:
+            return panel.bubbles
+        return [replace(b, position=self._quieter_position(draw, b, detail, panel_width, panel_height))
+                for b in panel.bubbles]
     
     def _calculate_bubble_position(self, position: str, bubble_width: int, bubble_height: int,
                                   panel_width: int, panel_height: int, 
@@ -252,30 +469,143 @@ class TextOverlayTool:
         
         return points
     
-    def add_caption(self, draw: ImageDraw.Draw, caption: str, panel_width: int, panel_height: int):
-        """Add narrative caption at bottom of panel."""
+    def layout_caption(self, caption: str, panel_width: int, panel_height: int) -> Optional[CaptionLayout]:
+        """Compute the caption box and line positions."""
         if not caption:
-            return
+            return None
         
         # Wrap caption text
-        max_width = panel_width - 40  # 20px margin each side
-        wrapped = textwrap.fill(caption, width=60)  # ~60 chars per line
-        lines = wrapped.split('\n')
+        max_width = panel_width - CAPTION_MARGIN * 2
+        lines = self.wrap_text(caption, self.caption_font, self.caption_advances, max_width)
         
         # Calculate caption box
-        line_height = 20
-        caption_height = len(lines) * line_height + 20  # 10px padding
+        step = line_height(self.caption_font)
+        caption_height = len(lines) * step + 20  # 10px padding
         
-        # Draw caption background
         caption_y = panel_height - caption_height - 10
-        draw.rectangle([10, caption_y, panel_width - 10, panel_height - 10], 
-                      fill=(255, 255, 240), outline=(200, 200, 180), width=1)
+        layout = CaptionLayout(box=(10, caption_y, panel_width - 10, panel_height - 10))
         
-        # Draw caption text
         text_y = caption_y + 10
         for line in lines:
-            draw.text((20, text_y), line, fill="#333333", font=self.caption_font)
-            text_y += line_height
+            layout.lines.append((CAPTION_MARGIN, text_y, line))
+            text_y += step
+        
+        return layout
+    
+    def add_caption(self, draw: ImageDraw.Draw, caption: str, panel_width: int, panel_height: int):
+        """Add narrative caption at bottom of panel."""
+        layout = self.layout_caption(caption, panel_width, panel_height)
+        if not layout:
+            return
+        
+        # Draw caption background
+        draw.rectangle(list(layout.box), 
+                      fill=(255, 255, 240), outline=(200, 200, 180), width=1)
+        
+        # Draw caption text
+        for text_x, text_y, line in layout.lines:
+            draw.text((text_x, text_y), line, fill="#333333", font=self.caption_font)
+    
+    def render_text_layer_svg(self, bubbles: List[BubbleLayout], caption: Optional[CaptionLayout],
+                              panel_width: int, panel_height: int) -> str:
+        """Render bubble and caption layouts as an SVG overlay for the clean panel."""
+        def attr(text: str) -> str:
+            return html.escape(text, quote=True)
+        
+        bubble_size = getattr(self.bubble_font, "size", 18)
+        caption_size = getattr(self.caption_font, "size", 16)
+        narrator_size = getattr(self.narrator_font, "size", 14)
+        
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" class="tr-text-layer" '
+            f'viewBox="0 0 {panel_width} {panel_height}" preserveAspectRatio="none">',
+            f'<style>text{{font-family:"DejaVu Sans",Verdana,sans-serif;dominant-baseline:hanging}}'
+            f'.b{{font-size:{bubble_size}px;font-weight:bold;fill:#000}}'
+            f'.c{{font-size:{caption_size}px;fill:#333}}'
+            f'.s{{font-size:{narrator_size}px;font-style:italic;fill:#666}}'
+            f'.o{{fill:#fff;stroke:#000;stroke-width:2}}</style>',
+        ]
+        
+        for layout in bubbles:
+            x, y, x2, y2 = layout.box
+            w, h = x2 - x, y2 - y
+            if layout.style == "round":
+                parts.append(f'<rect class="o" x="{x}" y="{y}" width="{w}" height="{h}" rx="20"/>')
+                points = " ".join(f"{px},{py}" for px, py in layout.tail)
+                parts.append(f'<polygon class="o" style="stroke-width:1" points="{points}"/>')
+            elif layout.style == "thought":
+                parts.append(f'<ellipse class="o" cx="{x + w / 2}" cy="{y + h / 2}" rx="{w / 2}" ry="{h / 2}"/>')
+                for ex, ey, ex2, ey2 in layout.trail:
+                    parts.append(f'<ellipse class="o" style="stroke-width:1" cx="{(ex + ex2) / 2}" '
+                                 f'cy="{(ey + ey2) / 2}" rx="{(ex2 - ex) / 2}" ry="{(ey2 - ey) / 2}"/>')
+            elif layout.style == "shout":
+                points = " ".join(f"{px},{py}" for px, py in layout.outline)
+                parts.append(f'<polygon class="o" style="stroke-width:1" points="{points}"/>')
+            else:
+                parts.append(f'<rect class="o" x="{x}" y="{y}" width="{w}" height="{h}"/>')
+            
+            for text_x, text_y, line in layout.lines:
+                parts.append(f'<text class="b" x="{text_x}" y="{text_y}">{attr(line)}</text>')
+            if layout.label:
+                label_x, label_y, label_text = layout.label
+                parts.append(f'<text class="s" x="{label_x}" y="{label_y}">{attr(label_text)}</text>')
+        
+        if caption:
+            x, y, x2, y2 = caption.box
+            parts.append(f'<rect x="{x}" y="{y}" width="{x2 - x}" height="{y2 - y}" '
+                         f'fill="#fffff0" stroke="#c8c8b4" stroke-width="1"/>')
+            for text_x, text_y, line in caption.lines:
+                parts.append(f'<text class="c" x="{text_x}" y="{text_y}">{attr(line)}</text>')
+        
+        parts.append('</svg>')
+        return "\n".join(parts)
+    
+    def write_text_layer(self, panel: ComicPanel, output_filename: str) -> bool:
+        """Write the clean panel (once) plus an SVG/HTML text layer instead of burning text in."""
+        image_path = Path(panel.image_path)
+        if not image_path.exists():
+            print(f"  ⚠️  Image not found: {image_path}")
+            return False
+        
+        stem = Path(output_filename).stem
+        if stem.endswith("-final"):
+            stem = stem[:-len("-final")]
+        clean_path = self.output_dir / f"{stem}{image_path.suffix}"
+        
+        # The clean raster only changes when the artwork does
+        source_stat = image_path.stat()
+        if (not clean_path.exists() or clean_path.stat().st_size != source_stat.st_size
+                or clean_path.stat().st_mtime < source_stat.st_mtime):
+            shutil.copy2(image_path, clean_path)
+            print(f"  ✅ Clean panel: {clean_path}")
+        
+        with Image.open(image_path) as img:
+            width, height = img.size
+        
+        # Measure with the same fonts the raster path uses
+        draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+        bubbles = [self.layout_speech_bubble(draw, b, width, height)
+                   for b in self.place_bubbles(draw, panel, width, height)]
+        caption = self.layout_caption(panel.caption, width, height)
+        svg = self.render_text_layer_svg(bubbles, caption, width, height)
+        
+        svg_path = self.output_dir / f"{stem}-text.svg"
+        svg_path.write_text(svg)
+        
+        # Inline SVG so the text is selectable and searchable on the page
+        html_path = self.output_dir / f"{stem}-text.html"
+        alt_text = " ".join(b.text for b in panel.bubbles) or panel.caption
+        inline_svg = svg.replace('<svg ', '<svg style="position:absolute;inset:0;width:100%;height:100%" ', 1)
+        html_path.write_text(
+            f'<figure class="tr-panel" style="position:relative;margin:0">\n'
+            f'<img src="{html.escape(clean_path.name)}" width="{width}" height="{height}" '
+            f'alt="{html.escape(alt_text)}" style="display:block;width:100%;height:auto">\n'
+            f'{inline_svg}\n'
+            f'</figure>\n'
+        )
+        print(f"  ✅ Text layer: {svg_path} ({len(svg)} bytes)")
+        
+        return True
     
     def process_panel(self, panel: ComicPanel, output_filename: str):
         """Process a single panel - add bubbles and caption."""
@@ -286,26 +616,40 @@ class TextOverlayTool:
             return False
         
         img = Image.open(image_path)
+        self.render_panel(img, panel)
+        
+        # Save final image
+        output_path = self.output_dir / output_filename
+        if self.palette:
+            result = encode_png(img, output_path, self.palette)
+            print(f"  ✅ Saved: {output_path} ({result.colors or 'RGB'} colors, {result.encoded_bytes // 1024}KB)")
+        else:
+            img.save(output_path, "PNG")
+            print(f"  ✅ Saved: {output_path}")
+        
+        return True
+    
+    def render_panel(self, img: Image.Image, panel: ComicPanel) -> Image.Image:
+        """Draw bubbles and caption onto an already-decoded image, in place."""
         draw = ImageDraw.Draw(img)
         
         width, height = img.size
         
         # Add speech bubbles
-        for bubble in panel.bubbles:
+        for bubble in self.place_bubbles(draw, panel, width, height):
             self.create_speech_bubble(draw, bubble, width, height)
         
         # Add caption
         self.add_caption(draw, panel.caption, width, height)
         
-        # Save final image
-        output_path = self.output_dir / output_filename
-        img.save(output_path, "PNG")
-        print(f"  ✅ Saved: {output_path}")
-        
-        return True
+        return img
     
-    def process_comic(self, script_path: str):
-        """Process all panels for a comic."""
+    def process_comic(self, script_path: str, text_layer: bool = False):
+        """Process all panels for a comic.
+        
+        With text_layer, writes clean panels plus SVG/HTML text layers
+        instead of burning the text into the image.
+        """
         print(f"\n📝 Processing text overlays for: {script_path}")
         
         panels = self.load_panel_data(script_path)
@@ -314,6 +658,14 @@ class TextOverlayTool:
             print("  ⚠️  No panel data found")
             return
         
+        # One font size for the whole comic, fitted to its longest text
+        first = next((p for p in panels if Path(p.image_path).exists()), None)
+        if first:
+            with Image.open(first.image_path) as img:
+                panel_size = img.size
+            size = self.fit_comic(panels, *panel_size)
+            print(f"  🔤 Font size {size}px fits all {len(panels)} panels")
+        
         success_count = 0
         for panel in panels:
             print(f"\n  Panel {panel.number}:")
@@ -323,7 +675,11 @@ class TextOverlayTool:
             slug = slug_match.group(1) if slug_match else "unknown"
             output_filename = f"comic-{slug}-panel{panel.number}-final.png"
             
-            if self.process_panel(panel, output_filename):
+            if text_layer:
+                processed = self.write_text_layer(panel, output_filename)
+            else:
+                processed = self.process_panel(panel, output_filename)
+            if processed:
                 success_count += 1
         
         print(f"\n✅ Complete! Processed {success_count}/{len(panels)} panels")
@@ -334,12 +690,22 @@ def main():
     parser = argparse.ArgumentParser(description="Add text overlays to TR comics")
     parser.add_argument("script", help="Path to comic script .md file")
     parser.add_argument("--output", default="comics/final", help="Output directory")
-    parser.add_argument("--font-size", type=int, default=18, help="Font size for bubbles")
+    parser.add_argument("--font-size", type=int, default=18,
+                        help="Largest font size for bubbles (shrunk per comic until all text fits)")
+    parser.add_argument("--palette", action="store_true", help="Write finals as adaptive-palette PNGs")
+    parser.add_argument("--palette-colors", type=int, default=128, help="Starting palette size")
+    parser.add_argument("--text-layer", action="store_true",
+                        help="Write clean panels + SVG/HTML text layers instead of burning in text")
+    parser.add_argument("--avoid-art", action="store_true",
+                        help="Move bubbles off busy areas of the art (needs numpy)")
+    parser.add_argument("--pixel-cache", default=DEFAULT_CACHE_DIR, help="Decoded-pixel cache directory")
     
     args = parser.parse_args()
     
-    tool = TextOverlayTool(output_dir=args.output)
-    tool.process_comic(args.script)
+    palette = PaletteOptions(colors=args.palette_colors) if args.palette else None
+    pixels = open_pixel_cache(args.pixel_cache) if args.avoid_art else None
+    tool = TextOverlayTool(output_dir=args.output, palette=palette, pixels=pixels, font_size=args.font_size)
+    tool.process_comic(args.script, text_layer=args.text_layer)
 
 
 if __name__ == "__main__":
@@ -7,7 +7,7 @@ echo ""
 # Start main project dashboard (Python)
 if ! curl -s http://localhost:8080 > /dev/null; then
     echo "📊 Starting Project Dashboard on http://localhost:8080..."
-    python3 -m http.server 8080 --directory /home/captain_tommy/.openclaw/workspace > /tmp/dashboard.log 2>&1 &
+    python3 "$(dirname "$0")/scripts/tr_static_server.py" 8080 --directory /home/captain_tommy/.openclaw/workspace > /tmp/dashboard.log 2>&1 &
 else
     echo "📊 Project Dashboard already running on http://localhost:8080"
 fi
@@ -4,7 +4,7 @@
 echo "🛑 Stopping dashboards..."
 
 # Stop Python HTTP server
-pkill -f "python.*http.server 8080" 2>/dev/null
+pkill -f "python.*tr_static_server.py 8080" 2>/dev/null
 
 # Stop Node.js admin server
 pkill -f "node.*server.js" 2>/dev/null